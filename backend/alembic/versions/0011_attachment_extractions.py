@@ -0,0 +1,81 @@
+"""Add content-addressed attachment extraction store.
+
+Revision ID: 0011_attachment_extractions
+Revises: 0010_add_digests_alerts
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0011_attachment_extractions"
+down_revision = "0010_add_digests_alerts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "attachment_extractions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("mime_type", sa.String(length=255), nullable=True),
+        sa.Column("extracted_text", sa.Text(), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ux_attachment_extractions_sha256",
+        "attachment_extractions",
+        ["sha256"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_attachment_extractions_ref_count",
+        "attachment_extractions",
+        ["ref_count"],
+    )
+    op.create_index("ix_attachments_sha256", "attachments", ["sha256"])
+
+    # Seed the store from attachments that were already extracted so existing
+    # content is reused instead of parsed again.
+    op.execute(
+        """
+        INSERT INTO attachment_extractions
+            (sha256, mime_type, extracted_text, summary, ref_count)
+        SELECT DISTINCT ON (sha256)
+            sha256,
+            mime_type,
+            extracted_text,
+            summary,
+            COUNT(*) OVER (PARTITION BY sha256)
+        FROM attachments
+        WHERE sha256 IS NOT NULL AND extraction_status = 'OK'
+        ORDER BY sha256, id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attachments_sha256", table_name="attachments")
+    op.drop_index(
+        "ix_attachment_extractions_ref_count", table_name="attachment_extractions"
+    )
+    op.drop_index(
+        "ux_attachment_extractions_sha256", table_name="attachment_extractions"
+    )
+    op.drop_table("attachment_extractions")
@@ -0,0 +1,24 @@
+"""Index attachment extraction status for the extraction queue.
+
+Revision ID: 0012_attachment_extraction_queue
+Revises: 0011_attachment_extractions
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0012_attachment_extraction_queue"
+down_revision = "0011_attachment_extractions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_attachments_extraction_status", "attachments", ["extraction_status"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attachments_extraction_status", table_name="attachments")
@@ -0,0 +1,32 @@
+"""Index emails for keyset pagination and triage by email.
+
+Revision ID: 0013_email_keyset_indexes
+Revises: 0012_attachment_extraction_queue
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0013_email_keyset_indexes"
+down_revision = "0012_attachment_extraction_queue"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_emails_user_internal_date_id",
+        "emails",
+        ["user_id", "internal_date_ts", "id"],
+    )
+    op.drop_index("ix_emails_user_internal_date", table_name="emails")
+    op.create_index("ix_email_triage_email_id", "email_triage", ["email_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_triage_email_id", table_name="email_triage")
+    op.create_index(
+        "ix_emails_user_internal_date", "emails", ["user_id", "internal_date_ts"]
+    )
+    op.drop_index("ix_emails_user_internal_date_id", table_name="emails")
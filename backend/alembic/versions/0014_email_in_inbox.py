@@ -0,0 +1,41 @@
+"""Add a maintained in_inbox flag with a partial index for inbox listing.
+
+Revision ID: 0014_email_in_inbox
+Revises: 0013_email_keyset_indexes
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0014_email_in_inbox"
+down_revision = "0013_email_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "emails",
+        sa.Column("in_inbox", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE emails
+        SET in_inbox = TRUE
+        WHERE label_ids @> '["INBOX"]'::jsonb
+        """
+    )
+    op.create_index(
+        "ix_emails_user_inbox_date_id",
+        "emails",
+        ["user_id", "internal_date_ts", "id"],
+        postgresql_where=sa.text("in_inbox"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_emails_user_inbox_date_id", table_name="emails")
+    op.drop_column("emails", "in_inbox")
@@ -0,0 +1,68 @@
+"""Add tsvector search columns with GIN indexes.
+
+Revision ID: 0015_search_vectors
+Revises: 0014_email_in_inbox
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0015_search_vectors"
+down_revision = "0014_email_in_inbox"
+branch_labels = None
+depends_on = None
+
+# Must match app.services.search (config, weights and indexed prefix length).
+MAX_INDEXED_CHARS = 200000
+
+
+def _vector(column: str, weight: str) -> str:
+    return (
+        "setweight(to_tsvector('english'::regconfig, "
+        f"left(coalesce({column}, ''), {MAX_INDEXED_CHARS})), '{weight}')"
+    )
+
+
+def upgrade() -> None:
+    op.add_column("emails", sa.Column("search_tsv", postgresql.TSVECTOR()))
+    op.add_column("email_triage", sa.Column("summary_tsv", postgresql.TSVECTOR()))
+    op.add_column("attachments", sa.Column("text_tsv", postgresql.TSVECTOR()))
+
+    op.execute(
+        f"UPDATE emails SET search_tsv = "
+        f"{_vector('subject', 'A')} || {_vector('clean_body_text', 'B')}"
+    )
+    op.execute(
+        f"UPDATE email_triage SET summary_tsv = {_vector('summary', 'B')} "
+        "WHERE summary IS NOT NULL"
+    )
+    op.execute(
+        f"UPDATE attachments SET text_tsv = {_vector('extracted_text', 'C')} "
+        "WHERE extracted_text IS NOT NULL"
+    )
+
+    op.create_index(
+        "ix_emails_search_tsv", "emails", ["search_tsv"], postgresql_using="gin"
+    )
+    op.create_index(
+        "ix_email_triage_summary_tsv",
+        "email_triage",
+        ["summary_tsv"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_attachments_text_tsv", "attachments", ["text_tsv"], postgresql_using="gin"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attachments_text_tsv", table_name="attachments")
+    op.drop_index("ix_email_triage_summary_tsv", table_name="email_triage")
+    op.drop_index("ix_emails_search_tsv", table_name="emails")
+    op.drop_column("attachments", "text_tsv")
+    op.drop_column("email_triage", "summary_tsv")
+    op.drop_column("emails", "search_tsv")
@@ -0,0 +1,33 @@
+"""Allow one open, incrementally maintained digest per user.
+
+Revision ID: 0016_open_digests
+Revises: 0015_search_vectors
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0016_open_digests"
+down_revision = "0015_search_vectors"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column("digests", "digest_date", existing_type=sa.Date(), nullable=True)
+    op.create_index(
+        "ux_digests_user_open",
+        "digests",
+        ["user_id"],
+        unique=True,
+        postgresql_where=sa.text("digest_date IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_digests_user_open", table_name="digests")
+    op.execute("DELETE FROM digests WHERE digest_date IS NULL")
+    op.alter_column("digests", "digest_date", existing_type=sa.Date(), nullable=False)
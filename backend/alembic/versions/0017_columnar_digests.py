@@ -0,0 +1,115 @@
+"""Store digest sections as id/timestamp columns instead of full entries.
+
+Revision ID: 0017_columnar_digests
+Revises: 0016_open_digests
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0017_columnar_digests"
+down_revision = "0016_open_digests"
+branch_labels = None
+depends_on = None
+
+digests = sa.table(
+    "digests",
+    sa.column("id", sa.Integer),
+    sa.column("user_id", sa.Integer),
+    sa.column("content_json", postgresql.JSONB),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for digest_id, content in bind.execute(
+        sa.select(digests.c.id, digests.c.content_json)
+    ).all():
+        sections = (content or {}).get("sections")
+        if not sections or not all(
+            isinstance(items, list) for items in sections.values()
+        ):
+            continue
+        columnar = {}
+        for name, items in sections.items():
+            ordered = sorted(
+                items, key=lambda item: (item.get("internal_date_ts") or "", item["id"])
+            )
+            columnar[name] = {
+                "ids": [item["id"] for item in ordered],
+                "ts": [item.get("internal_date_ts") for item in ordered],
+            }
+        pending = [
+            item["id"]
+            for item in sections.get("everything_else", [])
+            if item.get("needs_response") is None
+        ]
+        bind.execute(
+            digests.update()
+            .where(digests.c.id == digest_id)
+            .values(content_json={**content, "sections": columnar, "pending": pending})
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for digest_id, user_id, content in bind.execute(
+        sa.select(digests.c.id, digests.c.user_id, digests.c.content_json)
+    ).all():
+        sections = (content or {}).get("sections")
+        if not sections or not all(
+            isinstance(items, dict) for items in sections.values()
+        ):
+            continue
+        ids = [email_id for items in sections.values() for email_id in items["ids"]]
+        rows = {}
+        if ids:
+            rows = {
+                row.id: row
+                for row in bind.execute(
+                    sa.text(
+                        "SELECT e.id, e.subject, e.from_email, e.snippet, "
+                        "e.internal_date_ts, t.importance_label, t.needs_response, "
+                        "t.reasoning FROM emails e "
+                        "LEFT JOIN email_triage t ON t.email_id = e.id "
+                        "WHERE e.user_id = :user_id AND e.id = ANY(:ids)"
+                    ),
+                    {"user_id": user_id, "ids": ids},
+                )
+            }
+        expanded = {}
+        for name, items in sections.items():
+            entries = []
+            for email_id in reversed(items["ids"]):
+                row = rows.get(email_id)
+                if row is None:
+                    continue
+                reasoning = row.reasoning or {}
+                entries.append(
+                    {
+                        "id": row.id,
+                        "subject": row.subject,
+                        "from_email": row.from_email,
+                        "snippet": row.snippet,
+                        "internal_date_ts": (
+                            row.internal_date_ts.isoformat()
+                            if row.internal_date_ts
+                            else None
+                        ),
+                        "importance_label": row.importance_label,
+                        "needs_response": row.needs_response,
+                        "why_important": reasoning.get("why_important"),
+                        "summary_bullets": reasoning.get("summary_bullets", []),
+                    }
+                )
+            expanded[name] = entries
+        restored = {key: value for key, value in content.items() if key != "pending"}
+        bind.execute(
+            digests.update()
+            .where(digests.c.id == digest_id)
+            .values(content_json={**restored, "sections": expanded})
+        )
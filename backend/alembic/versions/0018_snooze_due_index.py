@@ -0,0 +1,29 @@
+"""Add a partial index on snoozed emails by wakeup time.
+
+Revision ID: 0018_snooze_due_index
+Revises: 0017_columnar_digests
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0018_snooze_due_index"
+down_revision = "0017_columnar_digests"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_emails_snooze_due",
+        "emails",
+        ["snooze_until_ts"],
+        postgresql_where=sa.text("is_snoozed"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_emails_snooze_due", table_name="emails")
@@ -0,0 +1,92 @@
+"""Add the local calendar event mirror and its sync state.
+
+Revision ID: 0019_calendar_mirror
+Revises: 0018_snooze_due_index
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0019_calendar_mirror"
+down_revision = "0018_snooze_due_index"
+branch_labels = None
+depends_on = None
+
+
+def _timestamps() -> list[sa.Column]:
+    return [
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "calendar_sync_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("calendar_id", sa.String(length=255), nullable=False),
+        sa.Column("sync_token", sa.Text(), nullable=True),
+        sa.Column("last_full_sync_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_synced_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("channel_id", sa.String(length=64), nullable=True, unique=True),
+        sa.Column("channel_resource_id", sa.String(length=255), nullable=True),
+        sa.Column("channel_token", sa.String(length=128), nullable=True),
+        sa.Column("channel_expiration", sa.DateTime(timezone=True), nullable=True),
+        *_timestamps(),
+        sa.UniqueConstraint("user_id", "calendar_id", name="uq_calendar_sync_state"),
+    )
+    op.create_table(
+        "calendar_event_mirror",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("calendar_id", sa.String(length=255), nullable=False),
+        sa.Column("event_id", sa.String(length=1024), nullable=False),
+        sa.Column("ical_uid", sa.String(length=1024), nullable=True),
+        sa.Column("status", sa.String(length=50), nullable=True),
+        sa.Column("start_ts", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("end_ts", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "blocks_time", sa.Boolean(), nullable=False, server_default=sa.true()
+        ),
+        sa.Column("payload", postgresql.JSONB(), nullable=True),
+        *_timestamps(),
+        sa.UniqueConstraint(
+            "user_id", "calendar_id", "event_id", name="uq_calendar_event_mirror"
+        ),
+    )
+    op.create_index(
+        "ix_calendar_event_mirror_user_start",
+        "calendar_event_mirror",
+        ["user_id", "start_ts"],
+    )
+    op.create_index(
+        "ix_calendar_event_mirror_user_ical_uid",
+        "calendar_event_mirror",
+        ["user_id", "ical_uid"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_calendar_event_mirror_user_ical_uid", table_name="calendar_event_mirror"
+    )
+    op.drop_index(
+        "ix_calendar_event_mirror_user_start", table_name="calendar_event_mirror"
+    )
+    op.drop_table("calendar_event_mirror")
+    op.drop_table("calendar_sync_state")
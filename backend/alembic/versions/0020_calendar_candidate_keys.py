@@ -0,0 +1,36 @@
+"""Key calendar candidates so regeneration can upsert them.
+
+Revision ID: 0020_calendar_candidate_keys
+Revises: 0019_calendar_mirror
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0020_calendar_candidate_keys"
+down_revision = "0019_calendar_mirror"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "calendar_candidates",
+        sa.Column("dedupe_key", sa.String(length=64), nullable=True),
+    )
+    # Existing rows keep a NULL key; they are pruned or replaced the next time
+    # their email's candidates are regenerated.
+    op.create_index(
+        "ux_calendar_candidates_email_key",
+        "calendar_candidates",
+        ["user_id", "email_id", "dedupe_key"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_calendar_candidates_email_key", table_name="calendar_candidates")
+    op.drop_column("calendar_candidates", "dedupe_key")
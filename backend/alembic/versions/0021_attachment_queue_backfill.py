@@ -0,0 +1,53 @@
+"""Move attachments ingested before the extraction queue onto it.
+
+Revision ID: 0021_attachment_queue_backfill
+Revises: 0020_calendar_candidate_keys
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0021_attachment_queue_backfill"
+down_revision = "0020_calendar_candidate_keys"
+branch_labels = None
+depends_on = None
+
+# Ingest rules as of this revision: PDF, Word and text/* are extractable, and
+# anything over the default 10 MiB queue limit waits for an explicit request.
+MAX_SIZE_BYTES = 10 * 1024 * 1024
+
+
+def upgrade() -> None:
+    op.execute(
+        f"""
+        UPDATE attachments
+        SET extraction_status = CASE
+            WHEN mime_type IS NULL
+                OR NOT (
+                    mime_type IN (
+                        'application/pdf',
+                        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+                        'application/msword'
+                    )
+                    OR mime_type LIKE 'text/%'
+                )
+                THEN 'UNSUPPORTED'
+            WHEN size_bytes > {MAX_SIZE_BYTES} THEN 'SKIPPED_TOO_LARGE'
+            ELSE 'QUEUED'
+        END
+        WHERE extraction_status = 'NOT_PROCESSED' OR extraction_status IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        UPDATE attachments
+        SET extraction_status = 'NOT_PROCESSED'
+        WHERE extraction_status IN (
+            'QUEUED', 'PROCESSING', 'DEFERRED', 'SKIPPED_TOO_LARGE', 'UNSUPPORTED'
+        )
+        """
+    )
@@ -0,0 +1,31 @@
+"""Store the mirrored calendar's time zone for all-day events.
+
+Revision ID: 0022_calendar_sync_time_zone
+Revises: 0021_attachment_queue_backfill
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0022_calendar_sync_time_zone"
+down_revision = "0021_attachment_queue_backfill"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "calendar_sync_state",
+        sa.Column("time_zone", sa.String(length=64), nullable=True),
+    )
+    # Mirrored all-day events were stored as UTC midnights; drop the sync
+    # tokens so the next sync re-seeds the mirror in the calendar's zone.
+    # Callers use live API calls until then.
+    op.execute("UPDATE calendar_sync_state SET sync_token = NULL")
+
+
+def downgrade() -> None:
+    op.drop_column("calendar_sync_state", "time_zone")
@@ -51,6 +51,25 @@ class Settings(BaseSettings):
     cloud_tasks_service_account: str = Field(default="")
     cloud_tasks_target_url: str = Field(default="")
 
+    attachment_extraction_workers: int = Field(default=2)
+    attachment_extraction_timeout_s: float = Field(default=20.0)
+    attachment_extraction_max_rss_mb: int = Field(default=512)
+    attachment_extraction_max_pdf_pages: int = Field(default=50)
+    attachment_extraction_tasks_per_child: int = Field(default=25)
+    attachment_spool_dir: str = Field(default="")
+    attachment_queue_batch_size: int = Field(default=50)
+    snooze_sweep_batch_size: int = Field(default=200)
+    snooze_sweep_max_batches: int = Field(default=25)
+    calendar_sync_past_days: int = Field(default=30)
+    calendar_watch_ttl_s: int = Field(default=7 * 24 * 3600)
+    freebusy_cache_ttl_s: float = Field(default=60.0)
+    calendar_recurrence_horizon_days: int = Field(default=90)
+    calendar_recurrence_max_occurrences: int = Field(default=100)
+    # Locales dateparser may load and try, e.g. DATEPARSER_LANGUAGES='["en","de"]'.
+    dateparser_languages: list[str] = Field(default_factory=lambda: ["en"])
+    attachment_queue_max_size_bytes: int = Field(default=10 * 1024 * 1024)
+    attachment_triage_text_budget: int = Field(default=20000)
+
     def resolved_database_url(self) -> str:
         """Return a SQLAlchemy-compatible database URL."""
         if self.database_url:
@@ -1,7 +1,10 @@
 """Public API application entrypoint."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 
 from app.auth import AuthError, authenticate_request
@@ -17,13 +20,23 @@ from app.routes.emails import router as emails_router
 from app.routes.feedback import router as feedback_router
 from app.routes.integrations import router as integrations_router
 from app.routes.preferences import router as preferences_router
+from app.routes.search import router as search_router
 from app.routes.sync import router as sync_router
 from app.routes.triage import router as triage_router
 from app.routes.webhooks import router as webhooks_router
+from app.services.warmup import start_warm_up
 
 settings = get_settings()
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm dateparser off the boot path; see app.services.warmup.
+    start_warm_up(settings)
+    yield
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 allowed_origins = {
     settings.web_base_url,
     "http://localhost:3000",
@@ -35,7 +48,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 app.include_router(auth_router)
 app.include_router(actions_router)
 app.include_router(alerts_router)
@@ -47,6 +62,7 @@ app.include_router(emails_router)
 app.include_router(feedback_router)
 app.include_router(integrations_router)
 app.include_router(preferences_router)
+app.include_router(search_router)
 app.include_router(sync_router)
 app.include_router(triage_router)
 app.include_router(webhooks_router)
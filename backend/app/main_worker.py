@@ -1,5 +1,7 @@
 """Worker application entrypoint."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI
 from pydantic import BaseModel
 from sqlalchemy import select
@@ -7,15 +9,28 @@ from sqlalchemy import select
 from app.config import Settings, get_settings
 from app.crypto import get_crypto
 from app.db import get_db
-from app.models import Digest, User
+from app.models import User
+from app.services.attachment_queue import drain_attachment_queue
+from app.services.attachments import collect_unreferenced_extractions
 from app.services.automation import snooze_sweep
-from app.services.digest import default_since_ts, generate_daily_digest
+from app.services.calendar_sync import sync_calendar, watch_calendar
+from app.services.digest import generate_daily_digest
 from app.services.gmail_sync import full_sync_inbox, incremental_sync
 from app.services.gmail_watch import renew_watch
+from app.services.metrics import metrics
+from app.services.warmup import start_warm_up
 
 settings = get_settings()
 
-app = FastAPI(title=f"{settings.app_name}-worker")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm dateparser off the boot path; see app.services.warmup.
+    start_warm_up(settings)
+    yield
+
+
+app = FastAPI(title=f"{settings.app_name}-worker", lifespan=lifespan)
 
 
 @app.get("/health")
@@ -24,6 +39,12 @@ async def health_check() -> dict:
     return {"status": "ok", "service": "worker"}
 
 
+@app.get("/internal/metrics")
+def metrics_snapshot() -> dict:
+    """In-process metrics snapshot."""
+    return metrics.snapshot()
+
+
 @app.post("/internal/jobs/snooze_sweep")
 def run_snooze_sweep(
     settings: Settings = Depends(get_settings),  # noqa: B008
@@ -33,6 +54,33 @@ def run_snooze_sweep(
     return snooze_sweep(db, settings, crypto)
 
 
+@app.post("/internal/jobs/attachment_extraction")
+def run_attachment_extraction(
+    settings: Settings = Depends(get_settings),  # noqa: B008
+    db=Depends(get_db),  # noqa: B008
+):
+    crypto = get_crypto(settings)
+    result = drain_attachment_queue(db, settings, crypto)
+    return {
+        "status": "ok",
+        "claimed": result.claimed,
+        "processed": result.processed,
+        "reused": result.reused,
+        "failed": result.failed,
+        "deferred": result.deferred,
+        "remaining": result.remaining,
+        "elapsed_s": result.elapsed_s,
+    }
+
+
+@app.post("/internal/jobs/attachment_extraction_gc")
+def run_attachment_extraction_gc(
+    db=Depends(get_db),  # noqa: B008
+):
+    deleted = collect_unreferenced_extractions(db)
+    return {"status": "ok", "deleted": deleted}
+
+
 class IncrementalSyncRequest(BaseModel):
     user_id: int
     history_id: str
@@ -60,6 +108,55 @@ def run_incremental_sync(
     }
 
 
+class CalendarSyncRequest(BaseModel):
+    user_id: int
+
+
+@app.post("/internal/jobs/calendar_sync")
+def run_calendar_sync(
+    payload: CalendarSyncRequest,
+    settings: Settings = Depends(get_settings),  # noqa: B008
+    db=Depends(get_db),  # noqa: B008
+):
+    crypto = get_crypto(settings)
+    result = sync_calendar(db, settings, crypto, payload.user_id)
+    return {
+        "status": "ok",
+        "fetched": result.fetched,
+        "upserted": result.upserted,
+        "deleted": result.deleted,
+        "full_sync": result.full_sync,
+    }
+
+
+@app.post("/internal/jobs/renew_calendar_watches")
+def renew_calendar_watches(
+    settings: Settings = Depends(get_settings),  # noqa: B008
+    db=Depends(get_db),  # noqa: B008
+):
+    crypto = get_crypto(settings)
+    users = db.execute(select(User)).scalars().all()
+    results = []
+    for user in users:
+        try:
+            response = watch_calendar(db, settings, crypto, user.id)
+            # Pushes only say that something changed, so catch up now in case
+            # notifications were missed while no channel was open.
+            sync = sync_calendar(db, settings, crypto, user.id)
+            results.append(
+                {
+                    "user_id": user.id,
+                    "status": "ok",
+                    "response": response,
+                    "full_sync": sync.full_sync,
+                }
+            )
+        except Exception as exc:
+            db.rollback()
+            results.append({"user_id": user.id, "status": "error", "error": str(exc)})
+    return {"status": "ok", "results": results}
+
+
 @app.post("/internal/jobs/renew_watches")
 def renew_watches(
     settings: Settings = Depends(get_settings),  # noqa: B008
@@ -89,17 +186,7 @@ def run_digest_job(
     for user in users:
         try:
             sync_result = full_sync_inbox(db, user.id, settings, crypto)
-            latest = (
-                db.execute(
-                    select(Digest)
-                    .where(Digest.user_id == user.id)
-                    .order_by(Digest.created_at.desc())
-                )
-                .scalars()
-                .first()
-            )
-            since_ts = default_since_ts(latest)
-            digest = generate_daily_digest(db, settings, user.id, since_ts)
+            digest = generate_daily_digest(db, settings, user.id)
             results.append(
                 {
                     "user_id": user.id,
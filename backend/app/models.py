@@ -5,6 +5,7 @@ from __future__ import annotations
 from datetime import date, datetime
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     Date,
     DateTime,
@@ -15,15 +16,25 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    event,
+    false,
     func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from sqlalchemy.types import JSON
 
 from app.db import Base
 
 JSONBType = JSONB().with_variant(JSON(), "sqlite")
+# SQLite has no tsvector; search there goes through the search_fts FTS5 table.
+TSVectorType = TSVECTOR().with_variant(Text(), "sqlite")
+
+
+def is_inbox(label_ids: list[str] | None) -> bool:
+    """Whether a Gmail label list places the message in the inbox."""
+    return bool(label_ids) and "INBOX" in label_ids
 
 
 class TimestampMixin:
@@ -109,9 +120,25 @@ class Email(Base, TimestampMixin):
 
     __tablename__ = "emails"
     __table_args__ = (
-        Index("ix_emails_user_internal_date", "user_id", "internal_date_ts"),
+        Index("ix_emails_user_internal_date_id", "user_id", "internal_date_ts", "id"),
+        Index(
+            "ix_emails_user_inbox_date_id",
+            "user_id",
+            "internal_date_ts",
+            "id",
+            postgresql_where=text("in_inbox"),
+            sqlite_where=text("in_inbox = 1"),
+        ),
+        # Only snoozed rows are indexed, ordered by wakeup for the sweep.
+        Index(
+            "ix_emails_snooze_due",
+            "snooze_until_ts",
+            postgresql_where=text("is_snoozed"),
+            sqlite_where=text("is_snoozed = 1"),
+        ),
         Index("ux_emails_user_message", "user_id", "gmail_message_id", unique=True),
         Index("ix_emails_user_thread", "user_id", "gmail_thread_id"),
+        Index("ix_emails_search_tsv", "search_tsv", postgresql_using="gin"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -127,6 +154,10 @@ class Email(Base, TimestampMixin):
     to_emails: Mapped[list[str] | None] = mapped_column(JSONBType, nullable=True)
     cc_emails: Mapped[list[str] | None] = mapped_column(JSONBType, nullable=True)
     label_ids: Mapped[list[str] | None] = mapped_column(JSONBType, nullable=True)
+    # Denormalized from label_ids so inbox listing can use a partial index.
+    in_inbox: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false(), nullable=False
+    )
     raw_payload: Mapped[dict | None] = mapped_column(JSONBType, nullable=True)
     ingest_status: Mapped[str | None] = mapped_column(String(50), nullable=True)
     ingest_error: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -135,6 +166,9 @@ class Email(Base, TimestampMixin):
         DateTime(timezone=True), nullable=True
     )
     is_snoozed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    search_tsv: Mapped[str | None] = mapped_column(
+        TSVectorType, nullable=True, deferred=True
+    )
 
     user: Mapped[User] = relationship(back_populates="emails")
     attachments: Mapped[list[Attachment]] = relationship(back_populates="email")
@@ -145,6 +179,11 @@ class Email(Base, TimestampMixin):
     )
     alerts: Mapped[list[Alert]] = relationship(back_populates="email")
 
+    @validates("label_ids")
+    def _sync_in_inbox(self, key: str, value: list[str] | None) -> list[str] | None:
+        self.in_inbox = is_inbox(value)
+        return value
+
 
 class Attachment(Base, TimestampMixin):
     """Email attachment metadata and extracted text."""
@@ -152,6 +191,9 @@ class Attachment(Base, TimestampMixin):
     __tablename__ = "attachments"
     __table_args__ = (
         Index("ix_attachments_email_id", "email_id"),
+        Index("ix_attachments_sha256", "sha256"),
+        Index("ix_attachments_extraction_status", "extraction_status"),
+        Index("ix_attachments_text_tsv", "text_tsv", postgresql_using="gin"),
         UniqueConstraint("email_id", "gmail_attachment_id"),
     )
 
@@ -167,16 +209,38 @@ class Attachment(Base, TimestampMixin):
     extraction_status: Mapped[str | None] = mapped_column(String(50), nullable=True)
     sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    text_tsv: Mapped[str | None] = mapped_column(
+        TSVectorType, nullable=True, deferred=True
+    )
 
     email: Mapped[Email] = relationship(back_populates="attachments")
 
 
+class AttachmentExtraction(Base, TimestampMixin):
+    """Extracted attachment text shared by content hash across users."""
+
+    __tablename__ = "attachment_extractions"
+    __table_args__ = (
+        Index("ux_attachment_extractions_sha256", "sha256", unique=True),
+        Index("ix_attachment_extractions_ref_count", "ref_count"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    mime_type: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    extracted_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
 class EmailTriage(Base, TimestampMixin):
     """LLM triage results for an email."""
 
     __tablename__ = "email_triage"
     __table_args__ = (
         Index("ix_email_triage_importance_needs", "importance_label", "needs_response"),
+        Index("ix_email_triage_email_id", "email_id"),
+        Index("ix_email_triage_summary_tsv", "summary_tsv", postgresql_using="gin"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -189,6 +253,9 @@ class EmailTriage(Base, TimestampMixin):
     model_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
     prompt_version: Mapped[str | None] = mapped_column(String(50), nullable=True)
     schema_version: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    summary_tsv: Mapped[str | None] = mapped_column(
+        TSVectorType, nullable=True, deferred=True
+    )
 
     email: Mapped[Email] = relationship(back_populates="triage")
 
@@ -216,10 +283,22 @@ class CalendarCandidate(Base, TimestampMixin):
     """Proposed calendar candidates extracted from emails."""
 
     __tablename__ = "calendar_candidates"
+    __table_args__ = (
+        Index(
+            "ux_calendar_candidates_email_key",
+            "user_id",
+            "email_id",
+            "dedupe_key",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     email_id: Mapped[int] = mapped_column(ForeignKey("emails.id"), nullable=False)
+    # Invites are keyed by UID (and RECURRENCE-ID), other candidates by a hash
+    # of their normalized fields; regenerating upserts on this key.
+    dedupe_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
     payload: Mapped[dict | None] = mapped_column(JSONBType, nullable=True)
     status: Mapped[str | None] = mapped_column(String(50), nullable=True)
     model_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
@@ -249,6 +328,68 @@ class CalendarEventCreated(Base, TimestampMixin):
     candidate: Mapped[CalendarCandidate] = relationship(back_populates="events_created")
 
 
+class CalendarSyncState(Base, TimestampMixin):
+    """Per-user bookkeeping for the local mirror of the primary calendar."""
+
+    __tablename__ = "calendar_sync_state"
+    __table_args__ = (
+        UniqueConstraint("user_id", "calendar_id", name="uq_calendar_sync_state"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    calendar_id: Mapped[str] = mapped_column(
+        String(255), nullable=False, default="primary"
+    )
+    # Set once a full sync has completed; the mirror is only trusted after that.
+    sync_token: Mapped[str | None] = mapped_column(Text, nullable=True)
+    last_full_sync_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_synced_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # IANA zone of the calendar; all-day events are midnights in this zone.
+    time_zone: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    channel_id: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, unique=True
+    )
+    channel_resource_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    channel_token: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    channel_expiration: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class CalendarEventMirror(Base, TimestampMixin):
+    """Local copy of a calendar event, kept current by incremental sync."""
+
+    __tablename__ = "calendar_event_mirror"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "calendar_id", "event_id", name="uq_calendar_event_mirror"
+        ),
+        Index("ix_calendar_event_mirror_user_start", "user_id", "start_ts"),
+        Index("ix_calendar_event_mirror_user_ical_uid", "user_id", "ical_uid"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    calendar_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    event_id: Mapped[str] = mapped_column(String(1024), nullable=False)
+    ical_uid: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    status: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    start_ts: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    end_ts: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # False for transparent ("free") events and ones the user declined.
+    blocks_time: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    payload: Mapped[dict | None] = mapped_column(JSONBType, nullable=True)
+
+
 class Digest(Base, TimestampMixin):
     """Daily digest records for a user."""
 
@@ -256,11 +397,20 @@ class Digest(Base, TimestampMixin):
     __table_args__ = (
         Index("ix_digests_user_created", "user_id", "created_at"),
         Index("ux_digests_user_date", "user_id", "digest_date", unique=True),
+        # At most one open (not yet published) digest per user.
+        Index(
+            "ux_digests_user_open",
+            "user_id",
+            unique=True,
+            postgresql_where=text("digest_date IS NULL"),
+            sqlite_where=text("digest_date IS NULL"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    digest_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # NULL while the digest is open and still collecting entries.
+    digest_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     content_json: Mapped[dict | None] = mapped_column(JSONBType, nullable=True)
 
     user: Mapped[User] = relationship(back_populates="digests")
@@ -341,3 +491,21 @@ class AuditLog(Base, TimestampMixin):
     metadata_json: Mapped[dict | None] = mapped_column(
         "metadata", JSONBType, nullable=True
     )
+
+
+# Local dev and tests run on SQLite, where search uses this FTS5 table instead
+# of the tsvector columns. Rows are keyed by rowid; see app.services.search.
+event.listen(
+    Email.__table__,
+    "after_create",
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+        "subject, body, user_id UNINDEXED, email_id UNINDEXED, "
+        "tokenize = 'porter unicode61')"
+    ).execute_if(dialect="sqlite"),
+)
+event.listen(
+    Email.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS search_fts").execute_if(dialect="sqlite"),
+)
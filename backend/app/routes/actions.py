@@ -2,16 +2,24 @@
 
 from __future__ import annotations
 
+import json
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 
 from app.auth import get_current_user
 from app.config import Settings, get_settings
 from app.crypto import get_crypto
-from app.db import get_db
+from app.db import SessionLocal, get_db
 from app.models import AuditLog
-from app.schemas import AuditLogRead, EmailActionsRequest
-from app.services.automation import execute_actions, run_automation_for_email
+from app.schemas import AuditLogRead, BulkAutomationRequest, EmailActionsRequest
+from app.services.automation import (
+    BulkSelection,
+    execute_actions,
+    run_automation_bulk,
+    run_automation_for_email,
+)
 
 router = APIRouter(prefix="/api")
 
@@ -60,6 +68,32 @@ def run_automation(
     }
 
 
+@router.post("/automation/run_bulk")
+def run_automation_bulk_endpoint(
+    payload: BulkAutomationRequest,
+    current_user=Depends(get_current_user),  # noqa: B008
+    settings: Settings = Depends(get_settings),  # noqa: B008
+):
+    """Run automation over many emails, streaming NDJSON progress events."""
+    selection = BulkSelection(**payload.model_dump())
+    crypto = get_crypto(settings)
+    user_id = current_user.id
+
+    def events():
+        # The request-scoped session is closed once the response starts.
+        with SessionLocal() as db:
+            try:
+                for event in run_automation_bulk(
+                    db, settings, crypto, user_id, selection
+                ):
+                    yield json.dumps(event) + "\n"
+            except Exception as exc:
+                db.rollback()
+                yield json.dumps({"event": "error", "error": str(exc)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @router.get("/audit", response_model=list[AuditLogRead])
 def list_audit(
     current_user=Depends(get_current_user),  # noqa: B008
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 from app.auth import get_current_user
 from app.config import Settings, get_settings
@@ -19,9 +19,10 @@ def process_attachments(
     current_user=Depends(get_current_user),  # noqa: B008
     settings: Settings = Depends(get_settings),  # noqa: B008
     db=Depends(get_db),  # noqa: B008
+    force: bool = Query(default=False),
 ):
     crypto = get_crypto(settings)
     result = process_attachments_for_email(
-        db, current_user.id, email_id, settings, crypto
+        db, current_user.id, email_id, settings, crypto, include_large=force
     )
     return {"status": "ok", **result}
@@ -2,17 +2,26 @@
 
 from __future__ import annotations
 
+import logging
 import secrets
 from datetime import UTC, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
 from fastapi.responses import RedirectResponse
 from sqlalchemy import select
 
 from app.auth import clear_session_cookie, create_session_token, set_session_cookie
 from app.config import Settings, get_settings
 from app.crypto import get_crypto
-from app.db import get_db
+from app.db import SessionLocal, get_db
 from app.models import GmailSyncState, GoogleOAuthToken, User, UserPreferences
 from app.services.google_oauth import (
     GOOGLE_OAUTH_SCOPES,
@@ -24,6 +33,9 @@ from app.services.google_oauth import (
 )
 from app.services.label_bootstrap import ensure_copilot_labels
 from app.services.preferences import default_preferences
+from app.services.queueing import enqueue_calendar_sync
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -57,6 +69,7 @@ def google_oauth_start(
 @router.get("/auth/google/callback")
 def google_oauth_callback(
     request: Request,
+    background_tasks: BackgroundTasks,
     settings: Settings = Depends(get_settings),  # noqa: B008
     db=Depends(get_db),  # noqa: B008
 ) -> RedirectResponse:
@@ -169,6 +182,10 @@ def google_oauth_callback(
             detail=f"Failed to create Copilot labels: {exc}",
         ) from exc
 
+    # Seed the calendar mirror and open its push channel once the redirect has
+    # been sent, so login does not wait on a full calendar sync.
+    background_tasks.add_task(_enqueue_initial_calendar_sync, settings, user.id)
+
     session_token = create_session_token(user, settings)
     response = RedirectResponse(
         f"{settings.web_base_url}/dashboard", status_code=status.HTTP_302_FOUND
@@ -178,6 +195,21 @@ def google_oauth_callback(
     return response
 
 
+def _enqueue_initial_calendar_sync(settings: Settings, user_id: int) -> None:
+    # The request-scoped session is closed once the response is sent.
+    with SessionLocal() as db:
+        try:
+            enqueue_calendar_sync(db, settings, get_crypto(settings), user_id)
+        except Exception:
+            # The daily renew_calendar_watches job catches the user up instead.
+            db.rollback()
+            logger.warning(
+                "Initial calendar sync failed",
+                exc_info=True,
+                extra={"user_id": user_id},
+            )
+
+
 @router.post("/auth/logout")
 def logout(
     response: Response,
@@ -2,9 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import UTC
-
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 
 from app.auth import get_current_user
@@ -13,21 +11,29 @@ from app.crypto import get_crypto
 from app.db import get_db
 from app.models import Digest
 from app.schemas import DigestRead
-from app.services.digest import default_since_ts, generate_daily_digest
+from app.services.digest import generate_daily_digest
+from app.services.digest_store import SECTION_NAMES, hydrate_digest
 from app.services.gmail_sync import full_sync_inbox
 
 router = APIRouter(prefix="/api")
 
+DEFAULT_SECTION_LIMIT = 50
+SECTION_PATTERN = f"^({'|'.join(SECTION_NAMES)})$"
+
 
 @router.get("/digests/latest", response_model=DigestRead)
 def get_latest_digest(
+    section: str | None = Query(default=None, pattern=SECTION_PATTERN),
+    limit: int = Query(default=DEFAULT_SECTION_LIMIT, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
     current_user=Depends(get_current_user),  # noqa: B008
     db=Depends(get_db),  # noqa: B008
 ):
+    """Latest published digest; ``limit``/``offset`` page within each section."""
     digest = (
         db.execute(
             select(Digest)
-            .where(Digest.user_id == current_user.id)
+            .where(Digest.user_id == current_user.id, Digest.digest_date.is_not(None))
             .order_by(Digest.created_at.desc())
         )
         .scalars()
@@ -35,7 +41,7 @@ def get_latest_digest(
     )
     if not digest:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No digest")
-    return DigestRead.model_validate(digest)
+    return _digest_read(db, digest, section, limit, offset)
 
 
 @router.post("/digests/run_now", response_model=DigestRead)
@@ -46,17 +52,14 @@ def run_digest_now(
 ):
     crypto = get_crypto(settings)
     full_sync_inbox(db, current_user.id, settings, crypto)
-    latest = (
-        db.execute(
-            select(Digest)
-            .where(Digest.user_id == current_user.id)
-            .order_by(Digest.created_at.desc())
-        )
-        .scalars()
-        .first()
+    digest = generate_daily_digest(db, settings, current_user.id)
+    return _digest_read(db, digest, None, DEFAULT_SECTION_LIMIT, 0)
+
+
+def _digest_read(
+    db, digest: Digest, section: str | None, limit: int, offset: int
+) -> DigestRead:
+    content = hydrate_digest(db, digest, section, limit, offset)
+    return DigestRead.model_validate(digest).model_copy(
+        update={"content_json": content}
     )
-    since_ts = default_since_ts(latest)
-    if since_ts.tzinfo is None:
-        since_ts = since_ts.replace(tzinfo=UTC)
-    digest = generate_daily_digest(db, settings, current_user.id, since_ts)
-    return DigestRead.model_validate(digest)
@@ -2,50 +2,52 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 from app.auth import get_current_user
 from app.db import get_db
 from app.models import Email
 from app.schemas import AttachmentRead, EmailDetail, EmailRead
+from app.services.email_listing import (
+    InvalidCursorError,
+    decode_cursor,
+    list_email_page,
+)
 
 router = APIRouter(prefix="/api")
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 @router.get("/emails", response_model=list[EmailRead])
 def list_emails(
+    response: Response,
     current_user=Depends(get_current_user),  # noqa: B008
     db=Depends(get_db),  # noqa: B008
     filter: str = Query(default="inbox"),
     limit: int = Query(default=50, ge=1, le=200),
-    offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None),
+    offset: int | None = Query(default=None, deprecated=True),
 ):
-    query = select(Email).where(Email.user_id == current_user.id)
-    if filter == "inbox":
-        query = query.where(Email.label_ids.contains(["INBOX"]))
-    query = (
-        query.order_by(Email.internal_date_ts.desc().nullslast())
-        .limit(limit)
-        .offset(offset)
-    )
-    result = db.execute(query)
-    emails = []
-    for email in result.scalars().all():
-        triage = email.triage
-        why_important = None
-        if triage and triage.reasoning:
-            why_important = triage.reasoning.get("why_important")
-        payload = EmailRead.model_validate(email).model_dump()
-        payload.update(
-            {
-                "importance_label": triage.importance_label if triage else None,
-                "needs_response": triage.needs_response if triage else None,
-                "why_important": why_important,
-            }
+    """List emails newest first; the next page's cursor is in X-Next-Cursor."""
+    if offset is not None:
+        # Rejected rather than ignored, so offset-paging clients do not loop
+        # on the first page.
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offset is no longer supported; page with the X-Next-Cursor "
+            "header's cursor instead",
         )
-        emails.append(EmailRead(**payload))
-    return emails
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+    page = list_email_page(db, current_user.id, filter, limit, position)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/emails/{email_id}", response_model=EmailDetail)
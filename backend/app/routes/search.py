@@ -0,0 +1,28 @@
+"""Full-text search endpoints."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.auth import get_current_user
+from app.db import get_db
+from app.schemas import SearchResult
+from app.services.search import MAX_OFFSET, search_emails
+
+router = APIRouter(prefix="/api")
+
+
+@router.get("/search", response_model=list[SearchResult])
+def search(
+    q: str = Query(..., max_length=500),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=MAX_OFFSET),
+    current_user=Depends(get_current_user),  # noqa: B008
+    db=Depends(get_db),  # noqa: B008
+):
+    """Search subjects, bodies, triage summaries and attachment text."""
+    if not q.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Query must not be empty"
+        )
+    return search_emails(db, current_user.id, q, limit, offset)
@@ -15,7 +15,8 @@ from app.config import Settings, get_settings
 from app.crypto import get_crypto
 from app.db import get_db
 from app.models import User
-from app.services.queueing import enqueue_incremental_sync
+from app.services.calendar_sync import user_for_channel
+from app.services.queueing import enqueue_calendar_sync, enqueue_incremental_sync
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +76,35 @@ async def gmail_push(
     return {"status": "ok"}
 
 
+@router.post("/webhooks/calendar/push")
+def calendar_push(
+    request: Request,
+    settings: Settings = Depends(get_settings),  # noqa: B008
+    db=Depends(get_db),  # noqa: B008
+):
+    channel_id = request.headers.get("X-Goog-Channel-ID")
+    resource_state = request.headers.get("X-Goog-Resource-State")
+    if not channel_id or not resource_state:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Missing channel headers",
+        )
+    # Channels are verified by the per-channel token Google echoes back.
+    user_id = user_for_channel(
+        db, channel_id, request.headers.get("X-Goog-Channel-Token")
+    )
+    if user_id is None:
+        logger.info("Calendar push for unknown channel", extra={"channel": channel_id})
+        return {"status": "ignored"}
+    if resource_state == "sync":
+        # Sent once when the channel is opened; there are no changes yet.
+        return {"status": "ok"}
+
+    crypto = get_crypto(settings)
+    enqueue_calendar_sync(db, settings, crypto, user_id)
+    return {"status": "ok"}
+
+
 def _verify_webhook(request: Request, settings: Settings) -> None:
     auth_header = request.headers.get("Authorization")
     if auth_header:
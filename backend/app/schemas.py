@@ -3,7 +3,7 @@
 from datetime import date, datetime
 from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, model_validator
 
 
 class APIModel(BaseModel):
@@ -44,6 +44,11 @@ class EmailRead(APIModel):
     updated_at: datetime
 
 
+class SearchResult(EmailRead):
+    rank: float
+    matched_in: list[str]
+
+
 class EmailDetail(APIModel):
     id: int
     user_id: int
@@ -95,6 +100,23 @@ class EmailActionsRequest(APIModel):
     actions: list[str]
 
 
+class BulkAutomationRequest(APIModel):
+    email_ids: list[int] | None = Field(default=None, max_length=10000)
+    since: datetime | None = None
+    until: datetime | None = None
+    importance_labels: list[str] | None = None
+    from_email: str | None = None
+
+    @model_validator(mode="after")
+    def require_selection(self) -> "BulkAutomationRequest":
+        # An empty selection would match every triaged email the user has.
+        if self.email_ids is None and not (
+            self.since or self.until or self.importance_labels or self.from_email
+        ):
+            raise ValueError("Provide email_ids or at least one filter")
+        return self
+
+
 class AuditLogRead(APIModel):
     id: int
     action: str
@@ -0,0 +1,190 @@
+"""Background attachment extraction queue backed by attachment status."""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.crypto import CryptoProvider
+from app.models import Attachment, Email, EmailTriage
+from app.services.attachments import (
+    is_extractable_mime,
+    is_over_size_limit,
+    process_selected_attachments,
+)
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "QUEUED"
+PROCESSING = "PROCESSING"
+SKIPPED_TOO_LARGE = "SKIPPED_TOO_LARGE"
+DEFERRED = "DEFERRED"
+UNSUPPORTED = "UNSUPPORTED"
+STALE_CLAIM_MINUTES = 15
+
+
+@dataclass(frozen=True)
+class DrainResult:
+    claimed: int
+    processed: int
+    reused: int
+    failed: int
+    deferred: int
+    remaining: int
+    elapsed_s: float
+
+
+def initial_extraction_status(
+    mime_type: str | None, size_bytes: int | None, settings: Settings
+) -> str:
+    """Status for a newly ingested attachment: queued unless it cannot be used."""
+    if not is_extractable_mime(mime_type):
+        return UNSUPPORTED
+    if is_over_size_limit(size_bytes, settings):
+        return SKIPPED_TOO_LARGE
+    return QUEUED
+
+
+def queue_depth(db: Session) -> int:
+    return db.execute(
+        select(func.count())
+        .select_from(Attachment)
+        .where(Attachment.extraction_status == QUEUED)
+    ).scalar_one()
+
+
+def drain_attachment_queue(
+    db: Session,
+    settings: Settings,
+    crypto: CryptoProvider,
+    limit: int | None = None,
+    now: datetime | None = None,
+) -> DrainResult:
+    """Extract the highest-priority queued attachments."""
+    started = time.perf_counter()
+    now = now or datetime.now(UTC)
+    claimed = _claim(db, limit or settings.attachment_queue_batch_size, now)
+
+    by_email: dict[int, list[Attachment]] = {}
+    for attachment in claimed:
+        by_email.setdefault(attachment.email_id, []).append(attachment)
+
+    processed = reused = failed = deferred = 0
+    batch_size = max(1, settings.attachment_extraction_workers)
+    for email_id, attachments in by_email.items():
+        email = db.get(Email, email_id)
+        if email is None:
+            continue
+        for offset in range(0, len(attachments), batch_size):
+            if _triage_text_collected(email) >= settings.attachment_triage_text_budget:
+                # Enough text for triage; leave the rest for an explicit request.
+                for attachment in attachments[offset:]:
+                    attachment.extraction_status = DEFERRED
+                    deferred += 1
+                db.commit()
+                break
+            batch = attachments[offset : offset + batch_size]
+            try:
+                result = process_selected_attachments(
+                    db, email, batch, settings, crypto
+                )
+            except Exception:
+                # Do not leave the claim to expire; a batch that raised once
+                # would most likely raise again, so fail it instead of requeueing.
+                logger.exception(
+                    "Attachment extraction batch failed", extra={"email_id": email_id}
+                )
+                db.rollback()
+                for attachment in batch:
+                    attachment.extraction_status = "FAILED"
+                db.commit()
+                failed += len(batch)
+                continue
+            processed += result["processed"]
+            reused += result["reused"]
+            failed += result["failed"]
+
+    elapsed_s = time.perf_counter() - started
+    remaining = queue_depth(db)
+    metrics.set_gauge("attachment_queue_depth", remaining)
+    metrics.inc("attachment_queue_processed_total", processed, outcome="ok")
+    metrics.inc("attachment_queue_processed_total", failed, outcome="failed")
+    metrics.inc("attachment_queue_processed_total", deferred, outcome="deferred")
+    metrics.observe("attachment_queue_drain_seconds", elapsed_s)
+    if elapsed_s > 0:
+        metrics.set_gauge(
+            "attachment_queue_throughput_per_second",
+            (processed + failed) / elapsed_s,
+        )
+    return DrainResult(
+        claimed=len(claimed),
+        processed=processed,
+        reused=reused,
+        failed=failed,
+        deferred=deferred,
+        remaining=remaining,
+        elapsed_s=round(elapsed_s, 3),
+    )
+
+
+def _claim(db: Session, limit: int, now: datetime) -> list[Attachment]:
+    stale_before = now - timedelta(minutes=STALE_CLAIM_MINUTES)
+    rows = (
+        db.execute(
+            select(Attachment)
+            .join(Email, Email.id == Attachment.email_id)
+            .outerjoin(EmailTriage, EmailTriage.email_id == Attachment.email_id)
+            .where(
+                or_(
+                    Attachment.extraction_status == QUEUED,
+                    (Attachment.extraction_status == PROCESSING)
+                    & (Attachment.updated_at < stale_before),
+                )
+            )
+            .order_by(*_priority_order())
+            .limit(limit)
+            .with_for_update(of=Attachment, skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+    for attachment in rows:
+        attachment.extraction_status = PROCESSING
+        attachment.updated_at = now
+    db.commit()
+    return rows
+
+
+def _priority_order() -> list:
+    email_rank = case(
+        (EmailTriage.needs_response.is_(True), 0),
+        (EmailTriage.importance_label == "HIGH", 1),
+        (EmailTriage.importance_label == "MEDIUM", 2),
+        else_=3,
+    )
+    mime_rank = case(
+        (Attachment.mime_type.like("text/%"), 0),
+        (Attachment.mime_type == "application/pdf", 1),
+        else_=2,
+    )
+    return [
+        email_rank,
+        mime_rank,
+        Attachment.size_bytes.asc().nullslast(),
+        Attachment.id,
+    ]
+
+
+def _triage_text_collected(email: Email) -> int:
+    return sum(
+        len(attachment.extracted_text or "")
+        for attachment in email.attachments
+        if attachment.extraction_status == "OK"
+    )
@@ -1,27 +1,61 @@
-"""Attachment download and extraction pipeline."""
+"""Attachment download and extraction pipeline.
+
+PyMuPDF (``fitz``) and python-docx are imported inside the extractors, so only
+processes that actually extract attachments pay for loading them.
+"""
 
 from __future__ import annotations
 
 import base64
 import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import UTC, datetime
 from io import BytesIO
+from typing import Any, BinaryIO
 
-import fitz
-from docx import Document
-from sqlalchemy import select
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from app.config import Settings
 from app.crypto import CryptoProvider
-from app.models import Email, GoogleOAuthToken
+from app.models import Attachment, AttachmentExtraction, Email, GoogleOAuthToken
+from app.services.extraction_pool import get_extractor
 from app.services.gmail_client import GmailClient
 from app.services.google_credentials import build_credentials
+from app.services.search import index_attachment
 
 
 class AttachmentProcessingError(RuntimeError):
     """Raised when attachment processing fails."""
 
 
+DOCX_MIME_TYPES = {
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+}
+# Multiple of 4 so each base64 chunk decodes independently of its neighbours.
+DECODE_CHUNK_CHARS = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class DownloadedAttachment:
+    """Attachment content spooled to a temp file, hashed while it was written."""
+
+    path: str
+    sha256: str
+    size_bytes: int
+
+    def cleanup(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
 def download_attachment_bytes(
     db: Session,
     user_id: int,
@@ -30,6 +64,53 @@ def download_attachment_bytes(
     settings: Settings,
     crypto: CryptoProvider,
 ) -> bytes:
+    data = _fetch_attachment_data(
+        db, user_id, gmail_message_id, gmail_attachment_id, settings, crypto
+    )
+    buffer = BytesIO()
+    _decode_base64url_into(data, buffer)
+    return buffer.getvalue()
+
+
+def download_attachment_to_file(
+    db: Session,
+    user_id: int,
+    gmail_message_id: str,
+    gmail_attachment_id: str,
+    settings: Settings,
+    crypto: CryptoProvider,
+) -> DownloadedAttachment:
+    """Download an attachment into a temp file without a full decoded copy."""
+    data = _fetch_attachment_data(
+        db, user_id, gmail_message_id, gmail_attachment_id, settings, crypto
+    )
+    return spool_base64url(data, settings.attachment_spool_dir or None)
+
+
+def spool_base64url(data: str, directory: str | None = None) -> DownloadedAttachment:
+    """Decode base64url data chunk by chunk into a temp file, hashing as it goes."""
+    handle = tempfile.NamedTemporaryFile(
+        prefix="attachment-", dir=directory, delete=False
+    )
+    try:
+        with handle:
+            digest, size_bytes = _decode_base64url_into(data, handle)
+    except Exception:
+        os.unlink(handle.name)
+        raise
+    return DownloadedAttachment(
+        path=handle.name, sha256=digest.hexdigest(), size_bytes=size_bytes
+    )
+
+
+def _fetch_attachment_data(
+    db: Session,
+    user_id: int,
+    gmail_message_id: str,
+    gmail_attachment_id: str,
+    settings: Settings,
+    crypto: CryptoProvider,
+) -> str:
     token_row = db.execute(
         select(GoogleOAuthToken).where(GoogleOAuthToken.user_id == user_id)
     ).scalar_one_or_none()
@@ -38,40 +119,92 @@ def download_attachment_bytes(
     creds = build_credentials(db, token_row, settings, crypto).credentials
     client = GmailClient(credentials=creds)
     response = client.get_attachment(gmail_message_id, gmail_attachment_id)
-    data = response.get("data")
+    # Detach the payload so the response dict does not keep a second reference.
+    data = response.pop("data", None)
     if not data:
         raise AttachmentProcessingError("Attachment data missing")
-    padding = "=" * (-len(data) % 4)
-    return base64.urlsafe_b64decode(data + padding)
+    return data
+
+
+def _decode_base64url_into(data: str, sink: BinaryIO) -> tuple[Any, int]:
+    digest = hashlib.sha256()
+    size_bytes = 0
+    length = len(data)
+    for offset in range(0, length, DECODE_CHUNK_CHARS):
+        chunk = data[offset : offset + DECODE_CHUNK_CHARS]
+        if offset + DECODE_CHUNK_CHARS >= length:
+            chunk += "=" * (-len(chunk) % 4)
+        decoded = base64.urlsafe_b64decode(chunk)
+        digest.update(decoded)
+        sink.write(decoded)
+        size_bytes += len(decoded)
+    return digest, size_bytes
+
+
+def extract_text_from_bytes(
+    mime_type: str | None, content: bytes, max_pdf_pages: int | None = None
+) -> str:
+    return _extract_text(mime_type, content, max_pdf_pages)
+
+
+def extract_text_from_file(
+    mime_type: str | None, path: str, max_pdf_pages: int | None = None
+) -> str:
+    return _extract_text(mime_type, path, max_pdf_pages)
+
+
+def is_extractable_mime(mime_type: str | None) -> bool:
+    if not mime_type:
+        return False
+    return (
+        mime_type == "application/pdf"
+        or mime_type in DOCX_MIME_TYPES
+        or mime_type.startswith("text/")
+    )
 
 
-def extract_text_from_bytes(mime_type: str | None, content: bytes) -> str:
+def _extract_text(
+    mime_type: str | None, source: bytes | str, max_pdf_pages: int | None
+) -> str:
     if not mime_type:
         raise AttachmentProcessingError("Unknown mime type")
     if mime_type == "application/pdf":
-        return extract_text_from_pdf(content)
-    if mime_type in {
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/msword",
-    }:
-        return extract_text_from_docx(content)
+        return extract_text_from_pdf(source, max_pages=max_pdf_pages)
+    if mime_type in DOCX_MIME_TYPES:
+        return extract_text_from_docx(source)
     if mime_type.startswith("text/"):
-        return extract_text_from_text(content)
+        return extract_text_from_text(source)
     raise AttachmentProcessingError(f"Unsupported mime type: {mime_type}")
 
 
-def extract_text_from_pdf(content: bytes) -> str:
-    with fitz.open(stream=content, filetype="pdf") as doc:
-        return "\n".join(page.get_text() for page in doc).strip()
+def extract_text_from_pdf(content: bytes | str, max_pages: int | None = None) -> str:
+    import fitz
 
+    if isinstance(content, str):
+        doc = fitz.open(content, filetype="pdf")
+    else:
+        doc = fitz.open(stream=content, filetype="pdf")
+    with doc:
+        texts = []
+        for index, page in enumerate(doc):
+            if max_pages and index >= max_pages:
+                break
+            texts.append(page.get_text())
+        return "\n".join(texts).strip()
 
-def extract_text_from_docx(content: bytes) -> str:
-    doc = Document(BytesIO(content))
+
+def extract_text_from_docx(content: bytes | str) -> str:
+    from docx import Document
+
+    doc = Document(content if isinstance(content, str) else BytesIO(content))
     paragraphs = [paragraph.text for paragraph in doc.paragraphs if paragraph.text]
     return "\n".join(paragraphs).strip()
 
 
-def extract_text_from_text(content: bytes) -> str:
+def extract_text_from_text(content: bytes | str) -> str:
+    if isinstance(content, str):
+        with open(content, "rb") as handle:
+            content = handle.read()
     return content.decode("utf-8", errors="replace").strip()
 
 
@@ -81,40 +214,207 @@ def process_attachments_for_email(
     email_id: int,
     settings: Settings,
     crypto: CryptoProvider,
+    include_large: bool = False,
 ) -> dict:
     email = db.get(Email, email_id)
     if not email or email.user_id != user_id:
         raise AttachmentProcessingError("Email not found")
 
+    # Claim rows the way the extraction queue does: rows it holds are locked or
+    # already PROCESSING, and are left to it so the extraction is linked once.
+    candidates = (
+        db.execute(
+            select(Attachment)
+            .where(
+                Attachment.email_id == email.id,
+                or_(
+                    Attachment.extraction_status.is_(None),
+                    Attachment.extraction_status.not_in(("OK", "PROCESSING")),
+                ),
+            )
+            .order_by(Attachment.id)
+            .with_for_update(skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+    selected = []
+    skipped = 0
+    for attachment in candidates:
+        if not include_large and is_over_size_limit(attachment.size_bytes, settings):
+            skipped += 1
+            continue
+        attachment.extraction_status = "PROCESSING"
+        attachment.updated_at = datetime.now(UTC)
+        selected.append(attachment)
+    db.commit()
+    result = process_selected_attachments(db, email, selected, settings, crypto)
+    return {**result, "skipped": skipped}
+
+
+def process_selected_attachments(
+    db: Session,
+    email: Email,
+    attachments: list[Attachment],
+    settings: Settings,
+    crypto: CryptoProvider,
+) -> dict:
+    """Download and extract the given attachments of one email."""
     processed = 0
+    reused = 0
     failed = 0
+    pending: dict[str, list[Attachment]] = {}
+    jobs: dict[str, tuple[str | None, str]] = {}
+    downloads: list[DownloadedAttachment] = []
 
-    for attachment in email.attachments:
-        if attachment.extraction_status == "OK":
-            continue
-        if not attachment.gmail_attachment_id:
-            attachment.extraction_status = "FAILED"
-            failed += 1
-            continue
+    try:
+        for attachment in attachments:
+            # Re-processing replaces the link, so drop the old reference first.
+            release_attachment_extraction(db, attachment)
+            if not attachment.gmail_attachment_id:
+                attachment.extraction_status = "FAILED"
+                failed += 1
+                continue
 
-        try:
-            content = download_attachment_bytes(
-                db,
-                user_id,
-                email.gmail_message_id,
-                attachment.gmail_attachment_id,
-                settings,
-                crypto,
-            )
-            sha256 = hashlib.sha256(content).hexdigest()
-            extracted = extract_text_from_bytes(attachment.mime_type, content)
-            attachment.sha256 = sha256
-            attachment.extracted_text = extracted
-            attachment.extraction_status = "OK"
-            processed += 1
-        except Exception:
-            attachment.extraction_status = "FAILED"
-            failed += 1
+            try:
+                download = download_attachment_to_file(
+                    db,
+                    email.user_id,
+                    email.gmail_message_id,
+                    attachment.gmail_attachment_id,
+                    settings,
+                    crypto,
+                )
+                downloads.append(download)
+                extraction = _find_extraction(db, download.sha256)
+                if extraction is not None:
+                    _link_extraction(db, attachment, extraction)
+                    reused += 1
+                    processed += 1
+                    continue
+                pending.setdefault(download.sha256, []).append(attachment)
+                jobs.setdefault(download.sha256, (attachment.mime_type, download.path))
+            except Exception:
+                attachment.extraction_status = "FAILED"
+                failed += 1
+
+        if jobs:
+            # Extractions for all attachments of the email run in parallel and
+            # read the spooled files by path rather than receiving the bytes.
+            outcomes = get_extractor(settings).extract_many(jobs)
+            for sha256, attachments in pending.items():
+                outcome = outcomes[sha256]
+                if outcome.error is not None:
+                    for attachment in attachments:
+                        attachment.extraction_status = "FAILED"
+                        failed += 1
+                    continue
+                extraction = _store_extraction(
+                    db, sha256, jobs[sha256][0], outcome.text or ""
+                )
+                for index, attachment in enumerate(attachments):
+                    _link_extraction(db, attachment, extraction)
+                    processed += 1
+                    if index:
+                        reused += 1
+    finally:
+        for download in downloads:
+            download.cleanup()
+
+    db.commit()
+    return {"processed": processed, "reused": reused, "failed": failed}
+
+
+def is_over_size_limit(size_bytes: int | None, settings: Settings) -> bool:
+    """Whether an attachment is too large to extract without an explicit ask."""
+    limit = settings.attachment_queue_max_size_bytes
+    return bool(limit and size_bytes and size_bytes > limit)
+
+
+def release_attachment_extraction(db: Session, attachment: Attachment) -> None:
+    """Drop an attachment's reference to its shared extraction."""
+    if not attachment.sha256 or attachment.extraction_status != "OK":
+        return
+    db.execute(
+        update(AttachmentExtraction)
+        .where(AttachmentExtraction.sha256 == attachment.sha256)
+        .values(
+            ref_count=AttachmentExtraction.ref_count - 1,
+            updated_at=datetime.now(UTC),
+        )
+    )
+    attachment.extraction_status = "NOT_PROCESSED"
+    attachment.extracted_text = None
+    attachment.summary = None
+    index_attachment(db, attachment)
 
+
+def delete_attachments(db: Session, attachments: list[Attachment]) -> None:
+    """Delete attachment rows, releasing their shared extractions first."""
+    for attachment in attachments:
+        release_attachment_extraction(db, attachment)
+        db.delete(attachment)
+
+
+def collect_unreferenced_extractions(db: Session) -> int:
+    """Delete shared extractions that no attachment references anymore."""
+    result = db.execute(
+        delete(AttachmentExtraction).where(AttachmentExtraction.ref_count <= 0)
+    )
     db.commit()
-    return {"processed": processed, "failed": failed}
+    return result.rowcount or 0
+
+
+def _find_extraction(db: Session, sha256: str) -> AttachmentExtraction | None:
+    return db.execute(
+        select(AttachmentExtraction).where(AttachmentExtraction.sha256 == sha256)
+    ).scalar_one_or_none()
+
+
+def _store_extraction(
+    db: Session, sha256: str, mime_type: str | None, extracted_text: str
+) -> AttachmentExtraction:
+    dialect = db.bind.dialect.name if db.bind else "postgresql"
+    values = {
+        "sha256": sha256,
+        "mime_type": mime_type,
+        "extracted_text": extracted_text,
+        "ref_count": 0,
+    }
+    if dialect == "sqlite":
+        insert_stmt = sqlite_insert(AttachmentExtraction).values(**values)
+    else:
+        insert_stmt = pg_insert(AttachmentExtraction).values(**values)
+    # A concurrent worker may have stored the same content first; keep its row.
+    db.execute(insert_stmt.on_conflict_do_nothing(index_elements=["sha256"]))
+    return _find_extraction(db, sha256)
+
+
+def _link_extraction(
+    db: Session, attachment: Attachment, extraction: AttachmentExtraction
+) -> None:
+    if not _increment_ref_count(db, extraction):
+        # collect_unreferenced_extractions deleted the unreferenced row between
+        # the lookup and this link; store the content again and link to that.
+        extraction = _store_extraction(
+            db, extraction.sha256, extraction.mime_type, extraction.extracted_text or ""
+        )
+        if extraction is None or not _increment_ref_count(db, extraction):
+            raise AttachmentProcessingError("Extraction disappeared while linking")
+    attachment.sha256 = extraction.sha256
+    attachment.extracted_text = extraction.extracted_text
+    attachment.summary = extraction.summary
+    attachment.extraction_status = "OK"
+    index_attachment(db, attachment)
+
+
+def _increment_ref_count(db: Session, extraction: AttachmentExtraction) -> bool:
+    result = db.execute(
+        update(AttachmentExtraction)
+        .where(AttachmentExtraction.id == extraction.id)
+        .values(
+            ref_count=AttachmentExtraction.ref_count + 1,
+            updated_at=datetime.now(UTC),
+        )
+    )
+    return bool(result.rowcount)
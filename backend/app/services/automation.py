@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import logging
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
 from datetime import UTC, datetime
+from functools import partial
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.config import Settings
@@ -20,6 +23,9 @@ from app.models import (
 )
 from app.services.gmail_client import GmailClient
 from app.services.google_credentials import build_credentials
+from app.services.queueing import enqueue_snooze_sweep
+
+logger = logging.getLogger(__name__)
 
 SNOOZE_LABEL_NAME = "Copilot/Snoozed"
 ACTION_LABELS = {
@@ -29,6 +35,9 @@ ACTION_LABELS = {
     "IGNORE": "Copilot/Ignore",
 }
 SYSTEM_LABELS = {"INBOX"}
+# Gmail's limit on message ids per messages.batchModify request.
+BATCH_MODIFY_MAX_IDS = 1000
+BULK_CHUNK_SIZE = 500
 
 
 @dataclass(frozen=True)
@@ -44,6 +53,75 @@ class AutomationResult:
     skipped: list[str]
 
 
+@dataclass(frozen=True)
+class BulkSelection:
+    """Emails a bulk automation run covers; unset fields do not filter."""
+
+    email_ids: list[int] | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    importance_labels: list[str] | None = None
+    from_email: str | None = None
+
+
+class LabelDeltaBatch:
+    """Label changes collected across messages and sent in as few calls as possible.
+
+    Changes to one message are merged (a later add cancels an earlier remove of
+    the same label and vice versa); messages with identical changes then share a
+    ``messages.batchModify`` call of up to ``BATCH_MODIFY_MAX_IDS`` ids.
+    """
+
+    def __init__(self) -> None:
+        # Dicts keep insertion order, so they double as ordered sets.
+        self._deltas: dict[str, tuple[dict[str, None], dict[str, None]]] = {}
+
+    def add(
+        self,
+        message_id: str,
+        add: list[str] | None = None,
+        remove: list[str] | None = None,
+    ) -> None:
+        adds, removes = self._deltas.setdefault(message_id, ({}, {}))
+        for label in add or []:
+            removes.pop(label, None)
+            adds[label] = None
+        for label in remove or []:
+            adds.pop(label, None)
+            removes[label] = None
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    def flush(self, client: GmailClient) -> int:
+        """Send the collected changes and return the number of API calls made."""
+        groups: dict[tuple[tuple[str, ...], tuple[str, ...]], list[str]] = {}
+        for message_id, (adds, removes) in self._deltas.items():
+            if adds or removes:
+                key = (tuple(sorted(adds)), tuple(sorted(removes)))
+                groups.setdefault(key, []).append(message_id)
+        self._deltas = {}
+
+        calls = 0
+        for (adds, removes), message_ids in groups.items():
+            if len(message_ids) == 1:
+                client.modify_message_labels(
+                    message_ids[0],
+                    add_label_ids=list(adds),
+                    remove_label_ids=list(removes),
+                )
+                calls += 1
+                continue
+            for offset in range(0, len(message_ids), BATCH_MODIFY_MAX_IDS):
+                client.batch_modify_labels(
+                    message_ids[offset : offset + BATCH_MODIFY_MAX_IDS],
+                    add_label_ids=list(adds),
+                    remove_label_ids=list(removes),
+                )
+                calls += 1
+        return calls
+
+
 def execute_actions(
     db: Session,
     settings: Settings,
@@ -53,11 +131,36 @@ def execute_actions(
     actions: list[str],
     client: GmailClient | None = None,
 ) -> ActionResult:
-    email = db.execute(
-        select(Email).where(Email.id == email_id, Email.user_id == user_id)
-    ).scalar_one_or_none()
-    if not email:
+    results = execute_actions_many(
+        db, settings, crypto, user_id, [email_id], actions, client
+    )
+    if email_id not in results:
         raise ValueError("Email not found")
+    return results[email_id]
+
+
+def execute_actions_many(
+    db: Session,
+    settings: Settings,
+    crypto: CryptoProvider,
+    user_id: int,
+    email_ids: list[int],
+    actions: list[str],
+    client: GmailClient | None = None,
+) -> dict[int, ActionResult]:
+    """Apply ``actions`` to each of the user's emails, batching label changes.
+
+    Returns results keyed by email id; ids that are not the user's are omitted.
+    """
+    emails = (
+        db.execute(
+            select(Email).where(Email.id.in_(email_ids), Email.user_id == user_id)
+        )
+        .scalars()
+        .all()
+    )
+    if not emails:
+        return {}
 
     if client is None:
         token_row = db.execute(
@@ -65,69 +168,202 @@ def execute_actions(
         ).scalar_one_or_none()
         if not token_row:
             raise ValueError("Missing OAuth token row for user")
-        creds = build_credentials(db, token_row, settings, crypto).credentials
-        client = GmailClient(credentials=creds)
+        client = _gmail_client(db, settings, crypto, token_row)
 
     label_map = _label_map(db, user_id)
-    applied: list[str] = []
-    skipped: list[str] = []
+    results, _ = _apply_actions(
+        db, [(email, actions) for email in emails], label_map, client
+    )
+    snoozes = [action for action in actions if action.startswith("SNOOZE_UNTIL:")]
+    for action in snoozes:
+        _schedule_snooze_sweep(settings, _parse_rfc3339(action.split(":", 1)[1]))
+    return results
 
-    for action in actions:
-        try:
-            if action.startswith("ADD_LABEL:"):
-                label_name = action.split(":", 1)[1]
-                label_id = _resolve_label_id(label_map, label_name)
-                if not label_id:
-                    skipped.append(action)
-                    continue
-                client.modify_message_labels(
-                    email.gmail_message_id,
-                    add_label_ids=[label_id],
-                    remove_label_ids=[],
-                )
-                applied.append(action)
-            elif action.startswith("REMOVE_LABEL:"):
-                label_name = action.split(":", 1)[1]
-                label_id = _resolve_label_id(label_map, label_name)
-                if not label_id:
-                    skipped.append(action)
-                    continue
-                client.modify_message_labels(
-                    email.gmail_message_id,
-                    add_label_ids=[],
-                    remove_label_ids=[label_id],
-                )
-                applied.append(action)
-            elif action == "ARCHIVE":
-                client.modify_message_labels(
-                    email.gmail_message_id, add_label_ids=[], remove_label_ids=["INBOX"]
-                )
-                applied.append(action)
-            elif action == "MARK_READ":
-                client.modify_message_labels(
-                    email.gmail_message_id,
-                    add_label_ids=[],
-                    remove_label_ids=["UNREAD"],
-                )
-                if email.label_ids:
-                    email.label_ids = [
-                        label for label in email.label_ids if label != "UNREAD"
-                    ]
-                applied.append(action)
-            elif action == "TRASH":
+
+def run_automation_bulk(
+    db: Session,
+    settings: Settings,
+    crypto: CryptoProvider,
+    user_id: int,
+    selection: BulkSelection,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    client: GmailClient | None = None,
+) -> Iterator[dict]:
+    """Run the user's automation rules over every triaged email in ``selection``.
+
+    Preferences, the label map and the Gmail client are resolved once. Emails
+    are processed in chunks whose label changes share batched Gmail calls,
+    and a progress event is yielded after each chunk.
+    """
+    preferences = db.execute(
+        select(UserPreferences).where(UserPreferences.user_id == user_id)
+    ).scalar_one_or_none()
+    automation_level = _automation_level(preferences)
+    candidates = db.execute(_bulk_query(user_id, selection)).all()
+    planned = []
+    suggested_total = 0
+    for candidate in candidates:
+        suggested = _suggest_actions(candidate)
+        suggested_total += len(suggested)
+        allowed = _filter_actions_by_level(suggested, automation_level)
+        if allowed:
+            planned.append((candidate.id, allowed))
+
+    yield {
+        "event": "start",
+        "automation_level": automation_level,
+        "matched": len(candidates),
+        "suggested": suggested_total,
+        "to_apply": len(planned),
+    }
+
+    totals = {"processed": 0, "applied": 0, "skipped": 0, "gmail_calls": 0}
+    if planned:
+        if client is None:
+            token_row = db.execute(
+                select(GoogleOAuthToken).where(GoogleOAuthToken.user_id == user_id)
+            ).scalar_one_or_none()
+            if not token_row:
+                raise ValueError("Missing OAuth token row for user")
+            client = _gmail_client(db, settings, crypto, token_row)
+        label_map = _label_map(db, user_id)
+
+    for offset in range(0, len(planned), chunk_size):
+        chunk = dict(planned[offset : offset + chunk_size])
+        emails = (
+            db.execute(
+                select(Email).where(Email.id.in_(chunk), Email.user_id == user_id)
+            )
+            .scalars()
+            .all()
+        )
+        results, calls = _apply_actions(
+            db, [(email, chunk[email.id]) for email in emails], label_map, client
+        )
+        totals["processed"] += len(results)
+        totals["applied"] += sum(len(result.applied) for result in results.values())
+        totals["skipped"] += sum(len(result.skipped) for result in results.values())
+        totals["gmail_calls"] += calls
+        db.expunge_all()
+        yield {"event": "progress", "total": len(planned), **totals}
+
+    yield {"event": "done", "total": len(planned), **totals}
+
+
+def _bulk_query(user_id: int, selection: BulkSelection):
+    query = (
+        select(Email.id, EmailTriage.importance_label, EmailTriage.needs_response)
+        .join(EmailTriage, EmailTriage.email_id == Email.id)
+        .where(Email.user_id == user_id)
+        .order_by(Email.id)
+    )
+    if selection.email_ids is not None:
+        query = query.where(Email.id.in_(selection.email_ids))
+    if selection.since is not None:
+        query = query.where(Email.internal_date_ts >= selection.since)
+    if selection.until is not None:
+        query = query.where(Email.internal_date_ts < selection.until)
+    if selection.importance_labels:
+        query = query.where(
+            EmailTriage.importance_label.in_(selection.importance_labels)
+        )
+    if selection.from_email:
+        query = query.where(
+            func.lower(Email.from_email) == selection.from_email.lower()
+        )
+    return query
+
+
+def _apply_actions(
+    db: Session,
+    planned: list[tuple[Email, list[str]]],
+    label_map: dict[str, str],
+    client: GmailClient,
+) -> tuple[dict[int, ActionResult], int]:
+    """Apply each email's actions in order, batching label changes across emails.
+
+    Label changes before an email's first TRASH share the batched calls; TRASH
+    and anything after it then run one by one. Local state changes and actions
+    count as applied only once Gmail has accepted them.
+    """
+    batch = LabelDeltaBatch()
+    staged = []
+    for email, actions in planned:
+        cut = actions.index("TRASH") if "TRASH" in actions else len(actions)
+        pending, skipped = _stage_actions(email, actions[:cut], label_map, batch)
+        staged.append((email, actions, pending, skipped, actions[cut:]))
+    calls = batch.flush(client)
+
+    results = {}
+    for email, actions, pending, skipped, rest in staged:
+        applied = _finish_staged(pending)
+        for action in rest:
+            if action == "TRASH":
                 client.trash_message(email.gmail_message_id)
+                calls += 1
                 applied.append(action)
-            elif action.startswith("SNOOZE_UNTIL:"):
-                snooze_until = action.split(":", 1)[1]
-                _apply_snooze(db, email, client, label_map, snooze_until)
-                applied.append(action)
-            else:
+                continue
+            single = LabelDeltaBatch()
+            step_pending, step_skipped = _stage_actions(
+                email, [action], label_map, single
+            )
+            calls += single.flush(client)
+            applied += _finish_staged(step_pending)
+            skipped += step_skipped
+        for action in actions:
+            _log_action(db, email.user_id, email.id, action)
+        results[email.id] = ActionResult(applied=applied, skipped=skipped)
+    db.commit()
+    return results, calls
+
+
+def _stage_actions(
+    email: Email,
+    actions: list[str],
+    label_map: dict[str, str],
+    batch: LabelDeltaBatch,
+) -> tuple[list[tuple[str, Callable[[], None] | None]], list[str]]:
+    """Queue label actions on ``batch``; return them with their local updates.
+
+    The local updates must only run after ``batch`` has been flushed.
+    """
+    pending: list[tuple[str, Callable[[], None] | None]] = []
+    skipped: list[str] = []
+    for action in actions:
+        if action.startswith("ADD_LABEL:") or action.startswith("REMOVE_LABEL:"):
+            label_name = action.split(":", 1)[1]
+            label_id = _resolve_label_id(label_map, label_name)
+            if not label_id:
                 skipped.append(action)
-        finally:
-            _log_action(db, user_id, email_id, action)
+                continue
+            if action.startswith("ADD_LABEL:"):
+                batch.add(email.gmail_message_id, add=[label_id])
+            else:
+                batch.add(email.gmail_message_id, remove=[label_id])
+            pending.append((action, None))
+        elif action in {"ARCHIVE", "MARK_READ"}:
+            label = "INBOX" if action == "ARCHIVE" else "UNREAD"
+            batch.add(email.gmail_message_id, remove=[label])
+            pending.append(
+                (action, partial(_update_local_labels, email, remove=[label]))
+            )
+        elif action.startswith("SNOOZE_UNTIL:"):
+            snooze_until = action.split(":", 1)[1]
+            pending.append(
+                (action, _stage_snooze(email, batch, label_map, snooze_until))
+            )
+        else:
+            skipped.append(action)
+    return pending, skipped
 
-    db.commit()
-    return ActionResult(applied=applied, skipped=skipped)
+
+def _finish_staged(pending: list[tuple[str, Callable[[], None] | None]]) -> list[str]:
+    applied = []
+    for action, update_local in pending:
+        if update_local is not None:
+            update_local()
+        applied.append(action)
+    return applied
 
 
 def run_automation_for_email(
@@ -152,11 +388,7 @@ def run_automation_for_email(
     preferences = db.execute(
         select(UserPreferences).where(UserPreferences.user_id == user_id)
     ).scalar_one_or_none()
-    automation_level = (
-        (preferences.preferences or {}).get("automation_level", "SUGGEST_ONLY")
-        if preferences
-        else "SUGGEST_ONLY"
-    )
+    automation_level = _automation_level(preferences)
 
     suggested = _suggest_actions(triage)
     if automation_level == "SUGGEST_ONLY":
@@ -169,6 +401,12 @@ def run_automation_for_email(
     )
 
 
+def _automation_level(preferences: UserPreferences | None) -> str:
+    if not preferences:
+        return "SUGGEST_ONLY"
+    return (preferences.preferences or {}).get("automation_level", "SUGGEST_ONLY")
+
+
 def _label_map(db: Session, user_id: int) -> dict[str, str]:
     result = db.execute(
         select(UserGmailLabel).where(UserGmailLabel.user_id == user_id)
@@ -210,22 +448,33 @@ def _filter_actions_by_level(actions: list[str], automation_level: str) -> list[
     return []
 
 
-def _apply_snooze(
-    db: Session,
+def _stage_snooze(
     email: Email,
-    client: GmailClient,
+    batch: LabelDeltaBatch,
     label_map: dict[str, str],
     snooze_until: str,
-) -> None:
+) -> Callable[[], None]:
     snooze_label_id = label_map.get(SNOOZE_LABEL_NAME)
     add_labels = [snooze_label_id] if snooze_label_id else []
-    client.modify_message_labels(
-        email.gmail_message_id,
-        add_label_ids=add_labels,
-        remove_label_ids=["INBOX"],
-    )
-    email.snooze_until_ts = _parse_rfc3339(snooze_until)
-    email.is_snoozed = True
+    batch.add(email.gmail_message_id, add=add_labels, remove=["INBOX"])
+
+    def update_local() -> None:
+        _update_local_labels(email, add=add_labels, remove=["INBOX"])
+        email.snooze_until_ts = _parse_rfc3339(snooze_until)
+        email.is_snoozed = True
+
+    return update_local
+
+
+def _update_local_labels(
+    email: Email, add: list[str] | None = None, remove: list[str] | None = None
+) -> None:
+    """Mirror a Gmail label change locally until the next sync refreshes it."""
+    if email.label_ids is None and not add:
+        return
+    labels = [label for label in email.label_ids or [] if label not in (remove or [])]
+    labels += [label for label in add or [] if label not in labels]
+    email.label_ids = labels
 
 
 def _parse_rfc3339(value: str) -> datetime:
@@ -234,44 +483,149 @@ def _parse_rfc3339(value: str) -> datetime:
 
 
 def snooze_sweep(
-    db: Session, settings: Settings, crypto: CryptoProvider
-) -> dict[str, int]:
-    now = datetime.now(UTC)
-    due_emails = (
-        db.execute(
-            select(Email).where(
-                Email.is_snoozed.is_(True),
-                Email.snooze_until_ts.is_not(None),
-                Email.snooze_until_ts <= now,
-            )
+    db: Session,
+    settings: Settings,
+    crypto: CryptoProvider,
+    now: datetime | None = None,
+) -> dict:
+    """Un-snooze due emails, then schedule the next sweep for the next due time.
+
+    Due emails are claimed in batches with ``FOR UPDATE SKIP LOCKED`` so several
+    workers can sweep at once; each batch is grouped by user so credentials,
+    the label map and one batched Gmail call are shared per user.
+    """
+    now = now or datetime.now(UTC)
+    processed = batches = 0
+    capped = False
+    # Users whose emails cannot be un-snoozed now (no token, Gmail failure);
+    # excluded from later claims so the loop does not spin on them.
+    skipped_users: set[int] = set()
+    failures: list[dict] = []
+    while batches < settings.snooze_sweep_max_batches:
+        due_emails = _claim_due_snoozes(
+            db, now, settings.snooze_sweep_batch_size, skipped_users
         )
-        .scalars()
-        .all()
-    )
-    processed = 0
-    for email in due_emails:
-        token_row = db.execute(
-            select(GoogleOAuthToken).where(GoogleOAuthToken.user_id == email.user_id)
+        if not due_emails:
+            break
+        batches += 1
+        by_user: dict[int, list[Email]] = {}
+        for email in due_emails:
+            by_user.setdefault(email.user_id, []).append(email)
+        token_rows = {
+            row.user_id: row
+            for row in db.execute(
+                select(GoogleOAuthToken).where(GoogleOAuthToken.user_id.in_(by_user))
+            ).scalars()
+        }
+        for user_id, emails in by_user.items():
+            token_row = token_rows.get(user_id)
+            if not token_row:
+                logger.warning(
+                    "Snooze sweep skipped user without token",
+                    extra={"user_id": user_id},
+                )
+                skipped_users.add(user_id)
+                failures.append({"user_id": user_id, "error": "Missing OAuth token"})
+                continue
+            try:
+                _unsnooze_user_emails(db, settings, crypto, token_row, emails)
+            except Exception as exc:
+                logger.exception(
+                    "Snooze sweep failed for user", extra={"user_id": user_id}
+                )
+                skipped_users.add(user_id)
+                failures.append({"user_id": user_id, "error": str(exc)})
+                continue
+            processed += len(emails)
+        db.commit()
+        if len(due_emails) < settings.snooze_sweep_batch_size:
+            break
+        capped = batches >= settings.snooze_sweep_max_batches
+
+    if capped:
+        # Stopped at the batch cap with due emails likely left; continue now.
+        next_due = now
+    else:
+        next_due = db.execute(
+            select(func.min(Email.snooze_until_ts)).where(
+                Email.is_snoozed, Email.snooze_until_ts > now
+            )
         ).scalar_one_or_none()
-        if not token_row:
-            continue
-        creds = build_credentials(db, token_row, settings, crypto).credentials
-        client = GmailClient(credentials=creds)
-        label_map = _label_map(db, email.user_id)
-        snooze_label_id = label_map.get(SNOOZE_LABEL_NAME)
-        remove_labels = [snooze_label_id] if snooze_label_id else []
-        client.modify_message_labels(
-            email.gmail_message_id,
-            add_label_ids=["INBOX"],
-            remove_label_ids=remove_labels,
+    scheduled = None
+    if next_due is not None:
+        if next_due.tzinfo is None:
+            next_due = next_due.replace(tzinfo=UTC)
+        scheduled = _schedule_snooze_sweep(settings, next_due)
+    return {
+        "processed": processed,
+        "batches": batches,
+        "skipped_users": len(skipped_users),
+        "failures": failures,
+        "next_due_at": next_due.isoformat() if next_due else None,
+        "scheduled": scheduled,
+    }
+
+
+def _schedule_snooze_sweep(settings: Settings, run_at: datetime) -> str | None:
+    """Schedule a sweep for ``run_at``; failures are logged, not raised.
+
+    Callers have already committed their changes, and the ``snooze_sweep``
+    cron picks up any wakeup that could not be scheduled.
+    """
+    try:
+        return enqueue_snooze_sweep(settings, run_at).status
+    except Exception:
+        logger.exception(
+            "Failed to schedule snooze sweep", extra={"run_at": run_at.isoformat()}
         )
+        return None
+
+
+def _claim_due_snoozes(
+    db: Session, now: datetime, limit: int, skipped_users: set[int]
+) -> list[Email]:
+    query = (
+        select(Email)
+        .where(Email.is_snoozed, Email.snooze_until_ts <= now)
+        .order_by(Email.snooze_until_ts)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if skipped_users:
+        query = query.where(Email.user_id.not_in(skipped_users))
+    return db.execute(query).scalars().all()
+
+
+def _unsnooze_user_emails(
+    db: Session,
+    settings: Settings,
+    crypto: CryptoProvider,
+    token_row: GoogleOAuthToken,
+    emails: list[Email],
+) -> None:
+    client = _gmail_client(db, settings, crypto, token_row)
+    snooze_label_id = _label_map(db, token_row.user_id).get(SNOOZE_LABEL_NAME)
+    remove_labels = [snooze_label_id] if snooze_label_id else []
+    batch = LabelDeltaBatch()
+    for email in emails:
+        batch.add(email.gmail_message_id, add=["INBOX"], remove=remove_labels)
+    # Gmail first: if it fails, the rows stay snoozed for the next sweep.
+    batch.flush(client)
+    for email in emails:
+        _update_local_labels(email, add=["INBOX"], remove=remove_labels)
         email.is_snoozed = False
         email.snooze_until_ts = None
         _log_action(db, email.user_id, email.id, "SNOOZE_SWEEP")
-        processed += 1
 
-    db.commit()
-    return {"processed": processed}
+
+def _gmail_client(
+    db: Session,
+    settings: Settings,
+    crypto: CryptoProvider,
+    token_row: GoogleOAuthToken,
+) -> GmailClient:
+    creds = build_credentials(db, token_row, settings, crypto).credentials
+    return GmailClient(credentials=creds)
 
 
 def _log_action(db: Session, user_id: int, email_id: int, action: str) -> None:
@@ -63,6 +63,51 @@ class CalendarClient:
             params["timeMax"] = time_max
         return self._service.events().list(**params).execute()
 
+    def sync_events(
+        self,
+        calendar_id,
+        sync_token=None,
+        page_token=None,
+        time_min=None,
+        max_results=2500,
+    ):
+        """List events for incremental sync.
+
+        Pass ``sync_token`` for changes since the last sync, or ``time_min`` for
+        a full sync; the last page carries ``nextSyncToken``.
+        """
+        params = {
+            "calendarId": calendar_id,
+            "singleEvents": True,
+            "showDeleted": True,
+            "maxResults": max_results,
+        }
+        if sync_token:
+            params["syncToken"] = sync_token
+        elif time_min:
+            params["timeMin"] = time_min
+        if page_token:
+            params["pageToken"] = page_token
+        return self._service.events().list(**params).execute()
+
+    def watch_events(self, calendar_id, channel_id, address, token, ttl_s=None):
+        body = {
+            "id": channel_id,
+            "type": "web_hook",
+            "address": address,
+            "token": token,
+        }
+        if ttl_s:
+            body["params"] = {"ttl": str(int(ttl_s))}
+        return self._service.events().watch(calendarId=calendar_id, body=body).execute()
+
+    def stop_channel(self, channel_id, resource_id):
+        return (
+            self._service.channels()
+            .stop(body={"id": channel_id, "resourceId": resource_id})
+            .execute()
+        )
+
     def patch_event(self, calendar_id, event_id, event_body, send_updates="all"):
         return (
             self._service.events()
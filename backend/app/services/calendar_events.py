@@ -17,6 +17,12 @@ from app.models import (
     User,
 )
 from app.services.calendar_client import CalendarClient
+from app.services.calendar_sync import (
+    find_mirrored_event,
+    mirror_ready,
+    upsert_mirror_event,
+)
+from app.services.freebusy_cache import freebusy_cache
 from app.services.google_credentials import build_credentials
 
 
@@ -88,6 +94,9 @@ def create_event(
     response = client.create_event(
         calendar_id="primary", event_body=event_body, send_updates="all"
     )
+    freebusy_cache.invalidate(user_id)
+    if mirror_ready(db, user_id):
+        upsert_mirror_event(db, user_id, response)
     event = CalendarEventCreated(
         user_id=user_id,
         calendar_candidate_id=candidate.id,
@@ -145,7 +154,7 @@ def accept_invite(
         db.commit()
         return existing_record
 
-    existing_event = _find_existing_invite_event(client, payload)
+    existing_event = _find_existing_invite_event(db, client, user_id, payload)
     if existing_event:
         patched = _accept_invite_event(db, client, user_id, existing_event)
         record = CalendarEventCreated(
@@ -200,7 +209,9 @@ def _parse_datetime(value: str | datetime | None) -> datetime | None:
     return _ensure_aware(datetime.fromisoformat(normalized))
 
 
-def _find_existing_invite_event(client: CalendarClient, payload: dict) -> dict | None:
+def _find_existing_invite_event(
+    db: Session, client: CalendarClient, user_id: int, payload: dict
+) -> dict | None:
     ical_uid = payload.get("ical_uid")
     if not ical_uid:
         return None
@@ -208,13 +219,17 @@ def _find_existing_invite_event(client: CalendarClient, payload: dict) -> dict |
     end_dt = _parse_datetime(payload.get("end"))
     if not start_dt or not end_dt:
         return None
-    time_min = (start_dt - timedelta(days=1)).isoformat()
-    time_max = (end_dt + timedelta(days=1)).isoformat()
+    time_min = start_dt - timedelta(days=1)
+    time_max = end_dt + timedelta(days=1)
+    if mirror_ready(db, user_id):
+        return find_mirrored_event(
+            db, user_id, ical_uid=ical_uid, time_min=time_min, time_max=time_max
+        )
     response = client.list_events(
         calendar_id="primary",
         ical_uid=ical_uid,
-        time_min=time_min,
-        time_max=time_max,
+        time_min=time_min.isoformat(),
+        time_max=time_max.isoformat(),
     )
     items = response.get("items") if isinstance(response, dict) else None
     if not items:
@@ -231,7 +246,9 @@ def _accept_existing_event(
 ) -> None:
     if not event_id:
         return
-    event = _find_existing_invite_event(client, payload)
+    event = _find_existing_invite_event(db, client, user_id, payload)
+    if not event and mirror_ready(db, user_id):
+        event = find_mirrored_event(db, user_id, event_id=event_id)
     if not event:
         event = client.get_event(calendar_id="primary", event_id=event_id)
     _accept_invite_event(db, client, user_id, event)
@@ -266,12 +283,16 @@ def _accept_invite_event(
     patch_body = {"status": "confirmed"}
     if updated_attendees:
         patch_body["attendees"] = updated_attendees
-    return client.patch_event(
+    patched = client.patch_event(
         calendar_id="primary",
         event_id=event_id,
         event_body=patch_body,
         send_updates="all",
     )
+    freebusy_cache.invalidate(user_id)
+    if mirror_ready(db, user_id):
+        upsert_mirror_event(db, user_id, patched)
+    return patched
 
 
 def _ensure_aware(value: datetime) -> datetime:
@@ -1,23 +1,36 @@
-"""Calendar candidate extraction from emails."""
+"""Calendar candidate extraction from emails.
+
+dateparser and icalendar are imported where they are used: this module sits
+in the API's import graph through ``gmail_sync``, and most requests never parse
+a date or an invite.
+"""
 
 from __future__ import annotations
 
 import base64
+import hashlib
+import json
 import logging
 import re
 from datetime import UTC, date, datetime, time, timedelta
 from typing import Any
 
-import dateparser
-from dateparser.search import search_dates
-from icalendar import Calendar
-from sqlalchemy import delete, select
+from sqlalchemy import delete, exists, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from app.config import Settings
 from app.crypto import CryptoProvider
-from app.models import CalendarCandidate, Email, GoogleOAuthToken, UserPreferences
+from app.models import (
+    CalendarCandidate,
+    CalendarEventCreated,
+    Email,
+    GoogleOAuthToken,
+    UserPreferences,
+)
 from app.services.attachments import download_attachment_bytes
+from app.services.email_parser import walk_parts
 from app.services.gmail_client import GmailClient
 from app.services.google_credentials import build_credentials
 from app.services.llm_client import LLMClient
@@ -26,6 +39,7 @@ from app.services.llm_schemas import (
     CALENDAR_CANDIDATE_SCHEMA_VERSION,
 )
 from app.services.preferences import default_preferences
+from app.services.recurrence import expand_event, is_recurring
 
 PROMPT_VERSION = "v1"
 DEFAULT_WINDOW_DAYS = 7
@@ -49,6 +63,32 @@ MEETING_INTENT_PATTERNS = [
         r"\bfree to (meet|call|chat|talk)\b",
     ]
 ]
+# Cheap pre-scan for anything dateparser could turn into a date. dateparser
+# only runs on windows around these hits, and not at all when there are none.
+DATE_HINT_PATTERN = re.compile(
+    r"""
+    \b(?:
+        (?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?
+      | (?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:day|nesday|sday|urday)?\.?
+      | today | tonight | tomorrow | yesterday | noon | midnight
+      | weekend | eod | eow
+      | (?:next|this|last|coming)\s+(?:week|month|year|quarter|morning|afternoon
+            |evening)
+      | in\s+(?:a|an|one|two|three|four|five|six|seven|\d+)\s+
+            (?:minute|hour|day|week|month)s?
+      | \d+\s+(?:minute|hour|day|week|month|year)s?\s+(?:ago|from\s+now)
+      | \d{1,2}(?:st|nd|rd|th)
+      | \d{4}-\d{1,2}-\d{1,2}
+      | \d{1,2}[/.-]\d{1,2}(?:[/.-]\d{2,4})?
+      | \d{1,2}:\d{2}
+      | \d{1,2}\s?(?:am|pm|a\.m\.|p\.m\.)
+    )
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+# Characters of context kept on each side of a hint, so phrases such as
+# "on March 5 at 3pm" are parsed whole.
+DATE_WINDOW_CHARS = 48
 logger = logging.getLogger(__name__)
 
 
@@ -59,8 +99,14 @@ def detect_ics_invites(
     user_id: int,
     email_id: int,
     include_inline: bool = True,
+    now: datetime | None = None,
 ) -> list[CalendarCandidate]:
-    """Extract calendar invites from ICS attachments or inline calendar parts."""
+    """Extract calendar invites from ICS attachments or inline calendar parts.
+
+    Recurring invites are expanded from the start of today over
+    ``calendar_recurrence_horizon_days``; the payload then describes the next
+    occurrence and lists the expanded ones.
+    """
     email = db.execute(
         select(Email).where(Email.id == email_id, Email.user_id == user_id)
     ).scalar_one_or_none()
@@ -68,52 +114,35 @@ def detect_ics_invites(
         raise ValueError("Email not found")
 
     duration_min = _meeting_duration(db, user_id)
-    candidates: list[CalendarCandidate] = []
-
-    attachments = [
-        attachment
-        for attachment in email.attachments
-        if _is_calendar_attachment(attachment.filename, attachment.mime_type)
-        and attachment.gmail_attachment_id
-    ]
-
-    for attachment in attachments:
-        content = download_attachment_bytes(
-            db,
-            user_id,
-            email.gmail_message_id,
-            attachment.gmail_attachment_id,
-            settings,
-            crypto,
-        )
-        candidates.extend(
-            _store_invites_from_ics(
-                db,
-                user_id,
-                email_id,
-                content,
-                duration_min,
-                source="ICS_ATTACHMENT",
-            )
-        )
-
-    if include_inline:
-        inline_payloads = _fetch_inline_calendar_parts(
-            db, settings, crypto, user_id, email.gmail_message_id
+    blobs = _calendar_blobs(db, settings, crypto, user_id, email, include_inline)
+    events = _latest_revisions(blobs)
+    now = now or datetime.now(UTC)
+    window_start = datetime.combine(now.astimezone(UTC).date(), time(0), UTC)
+    window = (
+        now,
+        window_start,
+        window_start + timedelta(days=settings.calendar_recurrence_horizon_days),
+    )
+    overridden: dict[str, set[str]] = {}
+    for component, _ in events:
+        recurrence_id = _recurrence_id(component)
+        if recurrence_id:
+            uid = _string_or_none(component.get("uid")) or ""
+            overridden.setdefault(uid, set()).add(recurrence_id)
+    payloads = []
+    for component, source in events:
+        exclude = overridden.get(_string_or_none(component.get("uid")) or "", set())
+        payload = _invite_payload(
+            component,
+            duration_min,
+            source,
+            window,
+            settings.calendar_recurrence_max_occurrences,
+            frozenset(exclude),
         )
-        for content in inline_payloads:
-            candidates.extend(
-                _store_invites_from_ics(
-                    db,
-                    user_id,
-                    email_id,
-                    content,
-                    duration_min,
-                    source="INLINE",
-                )
-            )
-
-    return candidates
+        if payload is not None:
+            payloads.append(payload)
+    return _store_candidates(db, user_id, email_id, payloads)
 
 
 def extract_in_text_candidates(
@@ -144,7 +173,7 @@ def extract_in_text_candidates(
         "TO_TIMEZONE": "UTC",
         "RELATIVE_BASE": base,
     }
-    parsed = search_dates(text, settings=settings_map) or []
+    parsed = _search_dates(text, settings_map, settings.dateparser_languages)
     meeting_intent = _has_meeting_intent(text)
 
     deterministic = len(parsed) == 1 and _contains_explicit_time(parsed[0][0])
@@ -214,11 +243,19 @@ def generate_calendar_candidates(
     user_id: int,
     email_id: int,
 ) -> list[CalendarCandidate]:
-    """Regenerate all calendar candidates for an email."""
-    _clear_candidates(db, user_id, email_id)
+    """Regenerate all calendar candidates for an email.
+
+    Candidates are upserted by ``dedupe_key``, so rows the user already acted
+    on keep their status; untouched proposals that were not produced again are
+    removed afterwards.
+    """
     invites = detect_ics_invites(db, settings, crypto, user_id, email_id)
     proposed = extract_in_text_candidates(db, settings, user_id, email_id)
-    return invites + proposed
+    candidates = invites + proposed
+    _prune_candidates(
+        db, user_id, email_id, {candidate.dedupe_key for candidate in candidates}
+    )
+    return candidates
 
 
 def list_calendar_candidates(
@@ -238,11 +275,21 @@ def list_calendar_candidates(
     )
 
 
-def _clear_candidates(db: Session, user_id: int, email_id: int) -> None:
+def _prune_candidates(
+    db: Session, user_id: int, email_id: int, keep_keys: set[str]
+) -> None:
     db.execute(
         delete(CalendarCandidate).where(
             CalendarCandidate.user_id == user_id,
             CalendarCandidate.email_id == email_id,
+            CalendarCandidate.status == "PROPOSED",
+            or_(
+                CalendarCandidate.dedupe_key.is_(None),
+                CalendarCandidate.dedupe_key.not_in(keep_keys),
+            ),
+            ~exists().where(
+                CalendarEventCreated.calendar_candidate_id == CalendarCandidate.id
+            ),
         )
     )
     db.commit()
@@ -275,85 +322,185 @@ def _is_calendar_attachment(filename: str | None, mime_type: str | None) -> bool
     return False
 
 
-def _fetch_inline_calendar_parts(
+def _calendar_blobs(
     db: Session,
     settings: Settings,
     crypto: CryptoProvider,
     user_id: int,
-    gmail_message_id: str,
-) -> list[bytes]:
+    email: Email,
+    include_inline: bool,
+) -> list[tuple[bytes, str]]:
+    """Distinct calendar payloads of the message as ``(content, source)``.
+
+    With ``include_inline`` the message is fetched once and every calendar part
+    is read from it: inline data directly and attachments by id through the
+    same client. Otherwise the stored attachment rows are downloaded. Blobs
+    are deduplicated by SHA-256, since an invite is often sent both ways.
+    """
+    blobs: dict[str, tuple[bytes, str]] = {}
+
+    def add(content: bytes, source: str) -> None:
+        blobs.setdefault(hashlib.sha256(content).hexdigest(), (content, source))
+
+    client = _gmail_client(db, settings, crypto, user_id) if include_inline else None
+    if client is None:
+        for attachment in email.attachments:
+            if not attachment.gmail_attachment_id or not _is_calendar_attachment(
+                attachment.filename, attachment.mime_type
+            ):
+                continue
+            content = download_attachment_bytes(
+                db,
+                user_id,
+                email.gmail_message_id,
+                attachment.gmail_attachment_id,
+                settings,
+                crypto,
+            )
+            add(content, "ICS_ATTACHMENT")
+        return list(blobs.values())
+
+    message = client.get_message(email.gmail_message_id, format="full")
+    for part in walk_parts(message.get("payload", {}) or {}):
+        if not _is_calendar_attachment(part.get("filename"), part.get("mimeType")):
+            continue
+        body = part.get("body", {}) or {}
+        attachment_id = body.get("attachmentId")
+        source = "ICS_ATTACHMENT" if attachment_id or part.get("filename") else "INLINE"
+        data = body.get("data")
+        if not data and attachment_id:
+            data = client.get_attachment(email.gmail_message_id, attachment_id).get(
+                "data"
+            )
+        if data:
+            add(_decode_base64url(data), source)
+    return list(blobs.values())
+
+
+def _gmail_client(
+    db: Session, settings: Settings, crypto: CryptoProvider, user_id: int
+) -> GmailClient | None:
     token_row = db.execute(
         select(GoogleOAuthToken).where(GoogleOAuthToken.user_id == user_id)
     ).scalar_one_or_none()
     if not token_row:
-        return []
+        return None
     creds = build_credentials(db, token_row, settings, crypto).credentials
-    client = GmailClient(credentials=creds)
-    message = client.get_message(gmail_message_id, format="full")
-    payload = message.get("payload", {}) or {}
-    parts = list(_walk_parts(payload))
-    contents = []
-    for part in parts:
-        if part.get("mimeType") != "text/calendar":
-            continue
-        body = part.get("body", {}) or {}
-        data = body.get("data")
-        if not data:
-            continue
-        padding = "=" * (-len(data) % 4)
-        contents.append(base64.urlsafe_b64decode(data + padding))
-    return contents
+    return GmailClient(credentials=creds)
+
+
+def _decode_base64url(data: str) -> bytes:
+    padding = "=" * (-len(data) % 4)
+    return base64.urlsafe_b64decode(data + padding)
+
+
+def _latest_revisions(blobs: list[tuple[bytes, str]]) -> list[tuple[Any, str]]:
+    """Parse each blob and keep the newest revision of every event.
+
+    Events are identified by UID and RECURRENCE-ID; the highest SEQUENCE wins,
+    then the latest DTSTAMP. Events without a UID are all kept.
+    """
+    from icalendar import Calendar
+
+    latest: dict[tuple[str, str | None], tuple[tuple[int, float], Any, str]] = {}
+    anonymous: list[tuple[Any, str]] = []
+    for content, source in blobs:
+        for component in Calendar.from_ical(content).walk("VEVENT"):
+            uid = _string_or_none(component.get("uid"))
+            if not uid:
+                anonymous.append((component, source))
+                continue
+            key = (uid, _recurrence_id(component))
+            dtstamp = component.get("dtstamp")
+            revision = (
+                int(component.get("sequence") or 0),
+                _coerce_datetime(dtstamp.dt).timestamp() if dtstamp else 0.0,
+            )
+            current = latest.get(key)
+            if current is None or revision > current[0]:
+                latest[key] = (revision, component, source)
+    revisions = [(component, source) for _, component, source in latest.values()]
+    return revisions + anonymous
 
 
-def _walk_parts(payload: dict[str, Any]):
-    yield payload
-    for part in payload.get("parts", []) or []:
-        yield from _walk_parts(part)
+def _recurrence_id(component: Any) -> str | None:
+    value = component.get("recurrence-id")
+    if not value:
+        return None
+    return _coerce_datetime(value.dt).astimezone(UTC).isoformat()
 
 
-def _store_invites_from_ics(
-    db: Session,
-    user_id: int,
-    email_id: int,
-    content: bytes,
+def _invite_payload(
+    component: Any,
     duration_min: int,
     source: str,
-) -> list[CalendarCandidate]:
-    candidates_payloads = []
-    calendar = Calendar.from_ical(content)
-    for component in calendar.walk("VEVENT"):
-        dtstart = component.get("dtstart")
-        if not dtstart:
-            continue
-        start = _coerce_datetime(dtstart.dt)
-        dtend = component.get("dtend")
-        if dtend:
-            end = _coerce_datetime(dtend.dt)
+    window: tuple[datetime, datetime, datetime],
+    max_occurrences: int,
+    exclude: frozenset[str],
+) -> dict | None:
+    dtstart = component.get("dtstart")
+    if not dtstart:
+        return None
+    start = _coerce_datetime(dtstart.dt)
+    dtend = component.get("dtend")
+    if dtend:
+        end = _coerce_datetime(dtend.dt)
+    else:
+        duration = component.get("duration")
+        if duration:
+            end = start + duration.dt
         else:
-            duration = component.get("duration")
-            if duration:
-                end = start + duration.dt
-            else:
-                end = start + timedelta(minutes=duration_min)
-        title = _string_or_none(component.get("summary"))
-        location = _string_or_none(component.get("location"))
-        attendees = _parse_attendees(component.get("attendee"))
-        ical_uid = _string_or_none(component.get("uid"))
-        candidates_payloads.append(
-            _build_candidate_payload(
-                candidate_type="INVITE",
-                title=title,
-                start=start,
-                end=end,
-                attendees=attendees,
-                location=location,
-                confidence=1.0,
-                source=source,
-                ical_uid=ical_uid,
-            )
+            end = start + timedelta(minutes=duration_min)
+
+    recurrence = None
+    if is_recurring(component) and not component.get("recurrence-id"):
+        now, window_start, window_end = window
+        occurrences = expand_event(
+            component,
+            window_start,
+            window_end,
+            timedelta(minutes=duration_min),
+            max_occurrences,
+            exclude,
         )
+        # The candidate describes the next occurrence that has not ended yet.
+        upcoming = [interval for interval in occurrences.intervals if interval[1] > now]
+        if upcoming:
+            start, end = upcoming[0]
+        recurrence = {
+            "rules": [
+                rule.to_ical().decode() for rule in _as_list(component.get("rrule"))
+            ],
+            "occurrences": [
+                [occurrence_start.isoformat(), occurrence_end.isoformat()]
+                for occurrence_start, occurrence_end in occurrences.intervals
+            ],
+            "truncated": occurrences.truncated,
+        }
+
+    payload = _build_candidate_payload(
+        candidate_type="INVITE",
+        title=_string_or_none(component.get("summary")),
+        start=start,
+        end=end,
+        attendees=_parse_attendees(component.get("attendee")),
+        location=_string_or_none(component.get("location")),
+        confidence=1.0,
+        source=source,
+        ical_uid=_string_or_none(component.get("uid")),
+    )
+    recurrence_id = _recurrence_id(component)
+    if recurrence_id:
+        payload["recurrence_id"] = recurrence_id
+    if recurrence is not None:
+        payload["recurrence"] = recurrence
+    return payload
 
-    return _store_candidates(db, user_id, email_id, candidates_payloads)
+
+def _as_list(value: Any) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
 
 
 def _extract_with_llm(
@@ -378,8 +525,8 @@ def _extract_with_llm(
         payload = _build_candidate_payload(
             candidate_type=candidate.get("type"),
             title=candidate.get("title"),
-            start=_parse_dt(candidate.get("start")),
-            end=_parse_dt(candidate.get("end")),
+            start=_parse_dt(candidate.get("start"), settings.dateparser_languages),
+            end=_parse_dt(candidate.get("end"), settings.dateparser_languages),
             attendees=candidate.get("attendees") or [],
             location=candidate.get("location"),
             confidence=_clamp_confidence(candidate.get("confidence")),
@@ -407,40 +554,61 @@ def _store_candidates(
     prompt_version: str | None = None,
     schema_version: str | None = None,
 ) -> list[CalendarCandidate]:
+    """Upsert candidates by ``dedupe_key``, keeping the status of existing rows."""
     if not payloads:
         return []
-    existing = (
+    now = datetime.now(UTC)
+    values_by_key: dict[str, dict[str, Any]] = {}
+    for payload in payloads:
+        key = _dedupe_key(payload)
+        values_by_key.setdefault(
+            key,
+            {
+                "user_id": user_id,
+                "email_id": email_id,
+                "dedupe_key": key,
+                "payload": payload,
+                "status": "PROPOSED",
+                "model_id": model_id,
+                "prompt_version": prompt_version,
+                "schema_version": schema_version,
+                "updated_at": now,
+            },
+        )
+    if db.get_bind().dialect.name == "sqlite":
+        insert_stmt = sqlite_insert(CalendarCandidate)
+    else:
+        insert_stmt = pg_insert(CalendarCandidate)
+    insert_stmt = insert_stmt.values(list(values_by_key.values()))
+    db.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["user_id", "email_id", "dedupe_key"],
+            set_={
+                key: insert_stmt.excluded[key]
+                for key in (
+                    "payload",
+                    "model_id",
+                    "prompt_version",
+                    "schema_version",
+                    "updated_at",
+                )
+            },
+        )
+    )
+    db.commit()
+    rows = (
         db.execute(
             select(CalendarCandidate).where(
                 CalendarCandidate.user_id == user_id,
                 CalendarCandidate.email_id == email_id,
+                CalendarCandidate.dedupe_key.in_(values_by_key),
             )
         )
         .scalars()
         .all()
     )
-    existing_keys = {_candidate_key(row.payload or {}) for row in existing}
-    seen: set[tuple] = set()
-    rows = []
-    for payload in payloads:
-        key = _candidate_key(payload)
-        if key in existing_keys or key in seen:
-            continue
-        seen.add(key)
-        rows.append(
-            CalendarCandidate(
-                user_id=user_id,
-                email_id=email_id,
-                payload=payload,
-                status="PROPOSED",
-                model_id=model_id,
-                prompt_version=prompt_version,
-                schema_version=schema_version,
-            )
-        )
-    db.add_all(rows)
-    db.commit()
-    return rows
+    by_key = {row.dedupe_key: row for row in rows}
+    return [by_key[key] for key in values_by_key]
 
 
 def _build_llm_prompt(email: Email, text: str) -> str:
@@ -478,10 +646,12 @@ def _build_candidate_payload(
     }
 
 
-def _parse_dt(value: str | None) -> datetime:
+def _parse_dt(value: str | None, languages: list[str]) -> datetime:
+    import dateparser
+
     if not value:
         raise ValueError("Missing datetime")
-    parsed = dateparser.parse(value)
+    parsed = dateparser.parse(value, languages=languages)
     if not parsed:
         raise ValueError(f"Unable to parse datetime: {value}")
     return _ensure_datetime(parsed)
@@ -499,6 +669,46 @@ def _coerce_datetime(value: datetime | date) -> datetime:
     return _ensure_datetime(value)
 
 
+def find_date_windows(text: str) -> list[tuple[int, int]]:
+    """Return merged ``(start, end)`` spans of ``text`` around date-like hints."""
+    windows: list[tuple[int, int]] = []
+    for match in DATE_HINT_PATTERN.finditer(text):
+        start = max(0, match.start() - DATE_WINDOW_CHARS)
+        end = min(len(text), match.end() + DATE_WINDOW_CHARS)
+        # Widen to whole words so a clipped token is not misread.
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        while end < len(text) and not text[end].isspace():
+            end += 1
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def _search_dates(
+    text: str, settings_map: dict, languages: list[str]
+) -> list[tuple[str, datetime]]:
+    from dateparser.search import search_dates
+
+    # The hint pattern only knows English words, so other locales get the
+    # whole text. Windows are too short for dateparser to detect their
+    # language reliably (it reads "me" or "to" as dates elsewhere), so the
+    # configured languages are always passed.
+    if set(languages) <= {"en"}:
+        windows = find_date_windows(text)
+    else:
+        windows = [(0, len(text))]
+    parsed: list[tuple[str, datetime]] = []
+    for start, end in windows:
+        window = text[start:end]
+        parsed.extend(
+            search_dates(window, languages=languages, settings=settings_map) or []
+        )
+    return parsed
+
+
 def _contains_explicit_time(match_text: str) -> bool:
     return bool(TIME_PATTERN.search(match_text))
 
@@ -606,6 +816,15 @@ def _candidate_key(payload: dict[str, Any]) -> tuple:
     return (candidate_type, start, end, title, location, ical_uid, normalized_attendees)
 
 
+def _dedupe_key(payload: dict[str, Any]) -> str:
+    # Invites are identified by UID so a new revision updates the same row.
+    if payload.get("type") == "INVITE" and payload.get("ical_uid"):
+        parts: tuple = ("invite", payload["ical_uid"], payload.get("recurrence_id"))
+    else:
+        parts = _candidate_key(payload)
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
 def _normalize_text(value: Any) -> str:
     if value is None:
         return ""
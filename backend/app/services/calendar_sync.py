@@ -0,0 +1,388 @@
+"""Local mirror of the user's primary calendar.
+
+Events are copied into ``calendar_event_mirror`` by a full sync and then kept
+current with the Calendar API's ``syncToken`` incremental sync, triggered by
+push channel notifications. A full sync only runs again when Google
+invalidates the sync token (HTTP 410). Until the first full sync completes the
+mirror is not trusted and callers fall back to live API calls.
+"""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import secrets
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from googleapiclient.errors import HttpError
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.crypto import CryptoProvider
+from app.models import CalendarEventMirror, CalendarSyncState, GoogleOAuthToken
+from app.services.calendar_client import CalendarClient
+from app.services.google_credentials import build_credentials
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_CALENDAR = "primary"
+# Renew push channels this long before they expire.
+CHANNEL_RENEW_MARGIN = timedelta(days=2)
+
+
+@dataclass(frozen=True)
+class CalendarSyncResult:
+    fetched: int
+    upserted: int
+    deleted: int
+    full_sync: bool
+
+
+def sync_calendar(
+    db: Session,
+    settings: Settings,
+    crypto: CryptoProvider,
+    user_id: int,
+    client: CalendarClient | None = None,
+    now: datetime | None = None,
+) -> CalendarSyncResult:
+    """Bring the mirror up to date, incrementally when a sync token is stored."""
+    now = now or datetime.now(UTC)
+    client = client or _calendar_client(db, settings, crypto, user_id)
+    state = _get_sync_state(db, user_id)
+    time_min = now - timedelta(days=settings.calendar_sync_past_days)
+    if state.sync_token:
+        try:
+            return _run_sync(db, client, user_id, state, now)
+        except HttpError as exc:
+            if _status_code(exc) != 410:
+                raise
+        # The sync token was invalidated; start over from a full sync.
+        db.rollback()
+        state = _get_sync_state(db, user_id)
+        state.sync_token = None
+    result = _run_sync(db, client, user_id, state, now, time_min)
+    if not state.channel_id:
+        # First sync for this user: open the push channel now rather than
+        # waiting for the daily renewal job.
+        try:
+            watch_calendar(db, settings, crypto, user_id, client=client, now=now)
+        except Exception:
+            db.rollback()
+            logger.warning(
+                "Could not open calendar push channel",
+                exc_info=True,
+                extra={"user_id": user_id},
+            )
+    return result
+
+
+def mirror_ready(db: Session, user_id: int) -> bool:
+    """Whether the user's mirror has completed a full sync."""
+    return (
+        db.execute(
+            select(CalendarSyncState.id).where(
+                CalendarSyncState.user_id == user_id,
+                CalendarSyncState.calendar_id == PRIMARY_CALENDAR,
+                CalendarSyncState.sync_token.is_not(None),
+            )
+        ).first()
+        is not None
+    )
+
+
+def mirrored_busy(
+    db: Session, user_id: int, time_min: datetime, time_max: datetime
+) -> list[tuple[datetime, datetime]]:
+    """Busy intervals overlapping ``[time_min, time_max)`` from the mirror."""
+    rows = db.execute(
+        select(CalendarEventMirror.start_ts, CalendarEventMirror.end_ts)
+        .where(
+            CalendarEventMirror.user_id == user_id,
+            CalendarEventMirror.calendar_id == PRIMARY_CALENDAR,
+            CalendarEventMirror.blocks_time,
+            CalendarEventMirror.start_ts < time_max,
+            CalendarEventMirror.end_ts > time_min,
+        )
+        .order_by(CalendarEventMirror.start_ts)
+    ).all()
+    return [(_ensure_aware(start), _ensure_aware(end)) for start, end in rows]
+
+
+def find_mirrored_event(
+    db: Session,
+    user_id: int,
+    ical_uid: str | None = None,
+    event_id: str | None = None,
+    time_min: datetime | None = None,
+    time_max: datetime | None = None,
+) -> dict | None:
+    """Return the stored API payload of a mirrored event, if any."""
+    query = select(CalendarEventMirror.payload).where(
+        CalendarEventMirror.user_id == user_id,
+        CalendarEventMirror.calendar_id == PRIMARY_CALENDAR,
+    )
+    if ical_uid:
+        query = query.where(CalendarEventMirror.ical_uid == ical_uid)
+    if event_id:
+        query = query.where(CalendarEventMirror.event_id == event_id)
+    if time_min:
+        query = query.where(CalendarEventMirror.end_ts > time_min)
+    if time_max:
+        query = query.where(CalendarEventMirror.start_ts < time_max)
+    return db.execute(
+        query.order_by(CalendarEventMirror.start_ts).limit(1)
+    ).scalar_one_or_none()
+
+
+def upsert_mirror_event(
+    db: Session,
+    user_id: int,
+    event: dict,
+    calendar_id: str = PRIMARY_CALENDAR,
+    time_zone: str | None = None,
+) -> None:
+    """Write one API event into the mirror; cancelled events are removed.
+
+    All-day events are stored as midnights in the event's ``timeZone``, else in
+    ``time_zone`` or the zone recorded by the last sync of the calendar.
+    """
+    event_id = event.get("id")
+    if not event_id:
+        return
+    if event.get("status") == "cancelled":
+        db.execute(
+            delete(CalendarEventMirror).where(
+                CalendarEventMirror.user_id == user_id,
+                CalendarEventMirror.calendar_id == calendar_id,
+                CalendarEventMirror.event_id == event_id,
+            )
+        )
+        return
+    zone = _event_zone(db, user_id, calendar_id, event, time_zone)
+    values = {
+        "user_id": user_id,
+        "calendar_id": calendar_id,
+        "event_id": event_id,
+        "ical_uid": event.get("iCalUID"),
+        "status": event.get("status"),
+        "start_ts": _event_time(event.get("start"), zone),
+        "end_ts": _event_time(event.get("end"), zone),
+        "blocks_time": _blocks_time(event),
+        "payload": event,
+        "updated_at": datetime.now(UTC),
+    }
+    if db.get_bind().dialect.name == "sqlite":
+        insert_stmt = sqlite_insert(CalendarEventMirror).values(**values)
+    else:
+        insert_stmt = pg_insert(CalendarEventMirror).values(**values)
+    db.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["user_id", "calendar_id", "event_id"],
+            set_={
+                key: insert_stmt.excluded[key]
+                for key in values
+                if key not in {"user_id", "calendar_id", "event_id"}
+            },
+        )
+    )
+
+
+def watch_calendar(
+    db: Session,
+    settings: Settings,
+    crypto: CryptoProvider,
+    user_id: int,
+    client: CalendarClient | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """Open a push channel for the primary calendar unless one is still fresh."""
+    now = now or datetime.now(UTC)
+    state = _get_sync_state(db, user_id)
+    if (
+        state.channel_id
+        and state.channel_expiration
+        and _ensure_aware(state.channel_expiration) - now > CHANNEL_RENEW_MARGIN
+    ):
+        return {"status": "skipped", "channel_id": state.channel_id}
+
+    client = client or _calendar_client(db, settings, crypto, user_id)
+    previous = (state.channel_id, state.channel_resource_id)
+    channel_id = uuid.uuid4().hex
+    token = secrets.token_urlsafe(32)
+    response = client.watch_events(
+        PRIMARY_CALENDAR,
+        channel_id=channel_id,
+        address=f"{settings.api_base_url.rstrip('/')}/webhooks/calendar/push",
+        token=token,
+        ttl_s=settings.calendar_watch_ttl_s,
+    )
+    state.channel_id = channel_id
+    state.channel_token = token
+    state.channel_resource_id = response.get("resourceId")
+    expiration = response.get("expiration")
+    state.channel_expiration = (
+        datetime.fromtimestamp(int(expiration) / 1000, tz=UTC) if expiration else None
+    )
+    db.commit()
+    if previous[0] and previous[1]:
+        try:
+            client.stop_channel(*previous)
+        except HttpError:
+            # The old channel expires on its own; notifications for it are
+            # ignored because its id no longer matches.
+            pass
+    return {"status": "ok", "channel_id": channel_id}
+
+
+def user_for_channel(db: Session, channel_id: str, token: str | None) -> int | None:
+    """Resolve a push notification to its user, checking the channel token."""
+    state = db.execute(
+        select(CalendarSyncState).where(CalendarSyncState.channel_id == channel_id)
+    ).scalar_one_or_none()
+    if state is None or not state.channel_token or not token:
+        return None
+    if not hmac.compare_digest(state.channel_token, token):
+        return None
+    return state.user_id
+
+
+def _run_sync(
+    db: Session,
+    client: CalendarClient,
+    user_id: int,
+    state: CalendarSyncState,
+    now: datetime,
+    time_min: datetime | None = None,
+) -> CalendarSyncResult:
+    full_sync = time_min is not None
+    if full_sync:
+        db.execute(
+            delete(CalendarEventMirror).where(
+                CalendarEventMirror.user_id == user_id,
+                CalendarEventMirror.calendar_id == PRIMARY_CALENDAR,
+            )
+        )
+    fetched = upserted = deleted = 0
+    page_token = None
+    next_sync_token = None
+    while True:
+        response = client.sync_events(
+            PRIMARY_CALENDAR,
+            sync_token=None if full_sync else state.sync_token,
+            page_token=page_token,
+            time_min=time_min.isoformat() if full_sync else None,
+        )
+        state.time_zone = response.get("timeZone") or state.time_zone
+        for event in response.get("items", []) or []:
+            fetched += 1
+            upsert_mirror_event(db, user_id, event, time_zone=state.time_zone or "UTC")
+            if event.get("status") == "cancelled":
+                deleted += 1
+            else:
+                upserted += 1
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            next_sync_token = response.get("nextSyncToken")
+            break
+
+    state.sync_token = next_sync_token
+    state.last_synced_at = now
+    if full_sync:
+        state.last_full_sync_at = now
+    db.commit()
+    return CalendarSyncResult(
+        fetched=fetched, upserted=upserted, deleted=deleted, full_sync=full_sync
+    )
+
+
+def _get_sync_state(db: Session, user_id: int) -> CalendarSyncState:
+    state = db.execute(
+        select(CalendarSyncState).where(
+            CalendarSyncState.user_id == user_id,
+            CalendarSyncState.calendar_id == PRIMARY_CALENDAR,
+        )
+    ).scalar_one_or_none()
+    if state is None:
+        state = CalendarSyncState(user_id=user_id, calendar_id=PRIMARY_CALENDAR)
+        db.add(state)
+        db.flush()
+    return state
+
+
+def _calendar_client(
+    db: Session, settings: Settings, crypto: CryptoProvider, user_id: int
+) -> CalendarClient:
+    token_row = db.execute(
+        select(GoogleOAuthToken).where(GoogleOAuthToken.user_id == user_id)
+    ).scalar_one_or_none()
+    if not token_row:
+        raise ValueError("Missing OAuth token row for user")
+    creds = build_credentials(db, token_row, settings, crypto).credentials
+    return CalendarClient(credentials=creds)
+
+
+def _event_zone(
+    db: Session,
+    user_id: int,
+    calendar_id: str,
+    event: dict,
+    time_zone: str | None,
+) -> tzinfo:
+    start = event.get("start") or {}
+    if start.get("dateTime"):
+        return UTC  # timed events carry their own offset
+    name = start.get("timeZone") or time_zone
+    if not name:
+        name = db.execute(
+            select(CalendarSyncState.time_zone).where(
+                CalendarSyncState.user_id == user_id,
+                CalendarSyncState.calendar_id == calendar_id,
+            )
+        ).scalar_one_or_none()
+    try:
+        return ZoneInfo(name) if name else UTC
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown calendar time zone", extra={"time_zone": name})
+        return UTC
+
+
+def _event_time(value: dict | None, zone: tzinfo = UTC) -> datetime | None:
+    if not value:
+        return None
+    if value.get("dateTime"):
+        parsed = datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+        return _ensure_aware(parsed)
+    if value.get("date"):
+        # All-day events span midnight to midnight in the calendar's zone.
+        local = datetime.combine(date.fromisoformat(value["date"]), time(0), zone)
+        return local.astimezone(UTC)
+    return None
+
+
+def _blocks_time(event: dict) -> bool:
+    if event.get("transparency") == "transparent":
+        return False
+    for attendee in event.get("attendees") or []:
+        if attendee.get("self") and attendee.get("responseStatus") == "declined":
+            return False
+    return True
+
+
+def _status_code(exc: HttpError) -> int | None:
+    try:
+        return int(getattr(exc.resp, "status", None))
+    except (TypeError, ValueError):
+        return None
+
+
+def _ensure_aware(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
@@ -0,0 +1,348 @@
+"""Incrementally maintained digest state.
+
+Each user has at most one open digest: a ``Digest`` row whose ``digest_date``
+is still NULL. Ingest and triage events add or move a single entry in its
+sections; publishing the digest (``generate_daily_digest``) stamps the date and
+header, and the next event opens a fresh digest starting where it left off.
+
+Sections are stored column-wise as parallel ``ids``/``ts`` lists, oldest first
+so new mail appends, and untriaged ids are listed under ``pending``. ``index``
+maps each id to its section and timestamp, so moving an entry finds it without
+scanning the sections. Subjects,
+snippets and triage text are not stored; ``hydrate_digest`` loads them for the
+page being read.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.models import Digest, Email, EmailTriage
+
+
+@dataclass(frozen=True)
+class DigestSection:
+    name: str
+    title: str
+
+
+SECTIONS = [
+    DigestSection(name="needs_reply", title="Needs reply"),
+    DigestSection(name="important_fyi", title="Important FYI"),
+    DigestSection(name="newsletters", title="Newsletters"),
+    DigestSection(name="everything_else", title="Everything else"),
+]
+SECTION_NAMES = [section.name for section in SECTIONS]
+
+# Rows are plain column tuples, so triaging an email mid-loop (which commits
+# and expires ORM instances) never triggers a per-row reload.
+DIGEST_EMAIL_COLUMNS = (
+    Email.id,
+    Email.subject,
+    Email.from_email,
+    Email.snippet,
+    Email.internal_date_ts,
+)
+DIGEST_TRIAGE_COLUMNS = (
+    EmailTriage.id.label("triage_id"),
+    EmailTriage.importance_label,
+    EmailTriage.needs_response,
+    EmailTriage.reasoning,
+)
+
+
+def open_digest(
+    db: Session,
+    user_id: int,
+    now: datetime | None = None,
+    since_ts: datetime | None = None,
+) -> Digest:
+    """Return the user's open digest, creating it if needed.
+
+    A new digest starts where the last published one ended (or at ``since_ts``)
+    and is seeded once from the emails already stored in that window.
+    """
+    digest = _select_open(db, user_id)
+    if digest is not None:
+        return digest
+
+    now = now or datetime.now(UTC)
+    if since_ts is None:
+        since_ts = default_since_ts(_latest_published(db, user_id))
+    since_ts = _aware(since_ts)
+    values = {
+        "user_id": user_id,
+        "digest_date": None,
+        "content_json": _empty_content(since_ts),
+        "created_at": now,
+        "updated_at": now,
+    }
+    if db.get_bind().dialect.name == "sqlite":
+        insert_stmt = sqlite_insert(Digest).values(**values)
+    else:
+        insert_stmt = pg_insert(Digest).values(**values)
+    created = db.execute(
+        insert_stmt.on_conflict_do_nothing(
+            index_elements=["user_id"], index_where=Digest.digest_date.is_(None)
+        )
+    ).rowcount
+    digest = _select_open(db, user_id)
+    if created:
+        content = digest.content_json
+        for row in _window_rows(db, user_id, since_ts):
+            _place(content, row.id, _timestamp(row.internal_date_ts), row)
+        flag_modified(digest, "content_json")
+    return digest
+
+
+def upsert_digest_entry(
+    db: Session,
+    email: Email,
+    triage: Any = None,
+    now: datetime | None = None,
+) -> None:
+    """Add ``email`` to the open digest, or move it to the section for ``triage``.
+
+    Without ``triage`` an email already in the digest is left where it is, so a
+    re-sync does not write the digest at all. The caller commits, and should do
+    so promptly: the open digest row stays locked until then.
+    """
+    if email.internal_date_ts is None:
+        return
+    digest = open_digest(db, email.user_id, now)
+    content = digest.content_json
+    if _aware(email.internal_date_ts) < datetime.fromisoformat(content["since_ts"]):
+        return
+    if triage is None and _section_of(content, email.id) is not None:
+        return
+    _place(content, email.id, _timestamp(email.internal_date_ts), triage)
+    flag_modified(digest, "content_json")
+
+
+def apply_triage(digest: Digest, email_id: int, triage: Any) -> None:
+    """Move an entry already in ``digest`` to the section for ``triage``."""
+    content = digest.content_json
+    entry = _entry_index(content).get(str(email_id))
+    if entry is None:
+        return
+    _place(content, email_id, entry[1], triage)
+    flag_modified(digest, "content_json")
+
+
+def pending_entry_ids(content: dict[str, Any]) -> list[int]:
+    """Ids of entries that have not been triaged yet, newest first."""
+    pending = set(content["pending"])
+    ids = content["sections"]["everything_else"]["ids"]
+    return [email_id for email_id in reversed(ids) if email_id in pending]
+
+
+def hydrate_digest(
+    db: Session,
+    digest: Digest,
+    section: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+) -> dict[str, Any]:
+    """Return ``content_json`` with display entries for one page per section.
+
+    Sections list entries newest first; ``limit``/``offset`` page within each
+    section (or only within ``section`` when given). ``counts`` keeps the
+    section totals.
+    """
+    content = digest.content_json or {}
+    stored = content.get("sections", {})
+    names = [section] if section else SECTION_NAMES
+    page_ids = {}
+    for name in names:
+        ids = list(reversed(stored.get(name, {}).get("ids", [])))
+        end = None if limit is None else offset + limit
+        page_ids[name] = ids[offset:end]
+
+    wanted = [email_id for ids in page_ids.values() for email_id in ids]
+    rows = {}
+    if wanted:
+        rows = {
+            row.id: row
+            for row in db.execute(
+                select(*DIGEST_EMAIL_COLUMNS, *DIGEST_TRIAGE_COLUMNS)
+                .outerjoin(EmailTriage, EmailTriage.email_id == Email.id)
+                .where(Email.user_id == digest.user_id, Email.id.in_(wanted))
+            )
+        }
+    sections = {
+        name: [digest_entry(rows[email_id]) for email_id in ids if email_id in rows]
+        for name, ids in page_ids.items()
+    }
+    hydrated = {
+        key: value for key, value in content.items() if key not in {"pending", "index"}
+    }
+    hydrated["sections"] = sections
+    return hydrated
+
+
+def section_for(needs_response: bool | None, importance_label: str | None) -> str:
+    if needs_response:
+        return "needs_reply"
+    if importance_label in {"HIGH", "MEDIUM"}:
+        return "important_fyi"
+    if importance_label == "LOW":
+        return "newsletters"
+    return "everything_else"
+
+
+def digest_entry(row: Any) -> dict[str, Any]:
+    """Display fields for a row of the digest email and triage columns."""
+    why_important = None
+    summary_bullets = []
+    if row.triage_id is not None and row.reasoning:
+        why_important = row.reasoning.get("why_important")
+        summary_bullets = row.reasoning.get("summary_bullets", [])
+    return {
+        "id": row.id,
+        "subject": row.subject,
+        "from_email": row.from_email,
+        "snippet": row.snippet,
+        "internal_date_ts": _timestamp(row.internal_date_ts),
+        "importance_label": row.importance_label,
+        "needs_response": row.needs_response,
+        "why_important": why_important,
+        "summary_bullets": summary_bullets,
+    }
+
+
+def default_since_ts(latest_digest: Digest | None) -> datetime:
+    if latest_digest and (latest_digest.content_json or {}).get("generated_at"):
+        return datetime.fromisoformat(latest_digest.content_json["generated_at"])
+    if latest_digest and latest_digest.created_at:
+        return _aware(latest_digest.created_at)
+    return datetime.now(UTC) - timedelta(days=1)
+
+
+def _place(content: dict[str, Any], email_id: int, timestamp: str, triage) -> None:
+    """Put ``email_id`` in the section for ``triage``, removing it elsewhere."""
+    sections = content["sections"]
+    index = _entry_index(content)
+    current = index.pop(str(email_id), None)
+    if current is not None:
+        name, stamp = current
+        _remove(sections[name], email_id, stamp)
+        # Only untriaged entries are pending, and those sit in everything_else.
+        if name == "everything_else" and email_id in content["pending"]:
+            content["pending"].remove(email_id)
+
+    triaged = _is_triaged(triage)
+    if triaged:
+        name = section_for(triage.needs_response, triage.importance_label)
+    else:
+        name = "everything_else"
+        content["pending"].append(email_id)
+    section = sections[name]
+    ids, stamps = section["ids"], section["ts"]
+    # Timestamps are normalized to UTC isoformat, so they order as strings.
+    position = bisect_right(
+        range(len(ids)), (timestamp, email_id), key=lambda i: (stamps[i], ids[i])
+    )
+    ids.insert(position, email_id)
+    stamps.insert(position, timestamp)
+    index[str(email_id)] = [name, timestamp]
+    content["counts"] = {key: len(sections[key]["ids"]) for key in SECTION_NAMES}
+
+
+def _is_triaged(triage: Any) -> bool:
+    if not triage:
+        return False
+    # Seeding passes joined rows, where a missing triage shows as NULL columns.
+    return getattr(triage, "triage_id", True) is not None
+
+
+def _remove(section: dict[str, list], email_id: int, timestamp: str | None) -> None:
+    ids, stamps = section["ids"], section["ts"]
+    position = None
+    if timestamp is not None:
+        position = bisect_left(
+            range(len(ids)), (timestamp, email_id), key=lambda i: (stamps[i], ids[i])
+        )
+    if position is None or position >= len(ids) or ids[position] != email_id:
+        position = ids.index(email_id)
+    del ids[position]
+    del stamps[position]
+
+
+def _section_of(content: dict[str, Any], email_id: int) -> str | None:
+    entry = _entry_index(content).get(str(email_id))
+    return entry[0] if entry else None
+
+
+def _entry_index(content: dict[str, Any]) -> dict[str, list]:
+    """``content["index"]``, rebuilt for digests stored before it existed."""
+    index = content.get("index")
+    if index is None:
+        index = {
+            str(email_id): [name, stamp]
+            for name in SECTION_NAMES
+            for email_id, stamp in zip(
+                content["sections"][name]["ids"],
+                content["sections"][name]["ts"],
+                strict=True,
+            )
+        }
+        content["index"] = index
+    return index
+
+
+def _timestamp(value: datetime | None) -> str | None:
+    return _aware(value).isoformat() if value else None
+
+
+def _empty_content(since_ts: datetime) -> dict[str, Any]:
+    return {
+        "since_ts": since_ts.isoformat(),
+        "counts": {name: 0 for name in SECTION_NAMES},
+        "sections": {name: {"ids": [], "ts": []} for name in SECTION_NAMES},
+        "pending": [],
+        "index": {},
+    }
+
+
+def _window_rows(db: Session, user_id: int, since_ts: datetime) -> list:
+    return db.execute(
+        select(*DIGEST_EMAIL_COLUMNS, *DIGEST_TRIAGE_COLUMNS)
+        .outerjoin(EmailTriage, EmailTriage.email_id == Email.id)
+        .where(Email.user_id == user_id, Email.internal_date_ts >= since_ts)
+    ).all()
+
+
+def _select_open(db: Session, user_id: int) -> Digest | None:
+    return db.execute(
+        select(Digest)
+        .where(Digest.user_id == user_id, Digest.digest_date.is_(None))
+        .with_for_update()
+    ).scalar_one_or_none()
+
+
+def _latest_published(db: Session, user_id: int) -> Digest | None:
+    return (
+        db.execute(
+            select(Digest)
+            .where(Digest.user_id == user_id, Digest.digest_date.is_not(None))
+            .order_by(Digest.created_at.desc())
+            .limit(1)
+        )
+        .scalars()
+        .first()
+    )
+
+
+def _aware(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
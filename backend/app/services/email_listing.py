@@ -0,0 +1,163 @@
+"""Keyset-paginated email listing."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, joinedload, load_only
+
+from app.models import Email, EmailTriage
+
+LIST_COLUMNS = (
+    Email.id,
+    Email.user_id,
+    Email.gmail_message_id,
+    Email.gmail_thread_id,
+    Email.internal_date_ts,
+    Email.subject,
+    Email.snippet,
+    Email.from_email,
+    Email.label_ids,
+    Email.created_at,
+    Email.updated_at,
+)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+@dataclass(frozen=True)
+class EmailCursor:
+    """Position after the last row of a page: its sort key."""
+
+    internal_date_ts: datetime | None
+    email_id: int
+
+
+@dataclass(frozen=True)
+class EmailPage:
+    items: list[dict]
+    next_cursor: str | None
+
+
+def encode_cursor(cursor: EmailCursor) -> str:
+    timestamp = cursor.internal_date_ts.isoformat() if cursor.internal_date_ts else ""
+    raw = f"{timestamp}|{cursor.email_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str) -> EmailCursor:
+    try:
+        padding = "=" * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(value + padding).decode("utf-8")
+        timestamp, email_id = raw.split("|")
+        return EmailCursor(
+            internal_date_ts=datetime.fromisoformat(timestamp) if timestamp else None,
+            email_id=int(email_id),
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+
+
+def list_email_page(
+    db: Session,
+    user_id: int,
+    filter: str,
+    limit: int,
+    cursor: EmailCursor | None = None,
+) -> EmailPage:
+    """Return one page ordered by internal date (newest first, undated last).
+
+    Dated and undated emails are paged as two keyset ranges so that each query
+    is a plain backward scan of the (user_id, internal_date_ts, id) index; the
+    undated range is only queried once the dated one runs out.
+    """
+    base = _base_query(user_id, filter)
+    emails: list[Email] = []
+    if cursor is None or cursor.internal_date_ts is not None:
+        dated = base.where(Email.internal_date_ts.is_not(None))
+        if cursor is not None:
+            dated = dated.where(
+                tuple_(Email.internal_date_ts, Email.id)
+                < tuple_(cursor.internal_date_ts, cursor.email_id)
+            )
+        emails = _fetch(
+            db,
+            dated.order_by(Email.internal_date_ts.desc(), Email.id.desc()),
+            limit + 1,
+        )
+    if len(emails) <= limit:
+        undated = base.where(Email.internal_date_ts.is_(None))
+        if cursor is not None and cursor.internal_date_ts is None:
+            undated = undated.where(Email.id < cursor.email_id)
+        emails += _fetch(db, undated.order_by(Email.id.desc()), limit + 1 - len(emails))
+
+    has_more = len(emails) > limit
+    emails = emails[:limit]
+    next_cursor = None
+    if has_more:
+        last = emails[-1]
+        next_cursor = encode_cursor(
+            EmailCursor(internal_date_ts=last.internal_date_ts, email_id=last.id)
+        )
+    return EmailPage(
+        items=[_serialize(email) for email in emails], next_cursor=next_cursor
+    )
+
+
+def load_email_rows(db: Session, user_id: int, email_ids: list[int]) -> dict[int, dict]:
+    """Serialize the given emails as listing rows, keyed by id."""
+    if not email_ids:
+        return {}
+    query = _base_query(user_id, "all").where(Email.id.in_(email_ids))
+    return {
+        email.id: _serialize(email) for email in db.execute(query).scalars().unique()
+    }
+
+
+def _base_query(user_id: int, filter: str):
+    query = (
+        select(Email)
+        .options(
+            load_only(*LIST_COLUMNS),
+            joinedload(Email.triage).load_only(
+                EmailTriage.importance_label,
+                EmailTriage.needs_response,
+                EmailTriage.reasoning,
+            ),
+        )
+        .where(Email.user_id == user_id)
+    )
+    if filter == "inbox":
+        query = query.where(Email.in_inbox)
+    return query
+
+
+def _fetch(db: Session, query, limit: int) -> list[Email]:
+    return list(db.execute(query.limit(limit)).scalars().unique())
+
+
+def _serialize(email: Email) -> dict:
+    triage = email.triage
+    reasoning = triage.reasoning if triage else None
+    return {
+        "id": email.id,
+        "user_id": email.user_id,
+        "gmail_message_id": email.gmail_message_id,
+        "gmail_thread_id": email.gmail_thread_id,
+        "internal_date_ts": email.internal_date_ts,
+        "subject": email.subject,
+        "snippet": email.snippet,
+        "from_email": email.from_email,
+        "label_ids": email.label_ids,
+        "importance_label": triage.importance_label if triage else None,
+        "needs_response": triage.needs_response if triage else None,
+        "why_important": reasoning.get("why_important") if reasoning else None,
+        "created_at": email.created_at,
+        "updated_at": email.updated_at,
+    }
@@ -3,11 +3,155 @@
 from __future__ import annotations
 
 import base64
+import re
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from email.utils import getaddresses, parsedate_to_datetime
+from html import unescape
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import Comment, Declaration, Doctype, ProcessingInstruction
+
+SKIPPED_TAGS = frozenset({"script", "style", "head", "title", "template"})
+# Elements whose content is raw text rather than markup; all of them are skipped.
+RAW_TEXT_TAGS = frozenset({"script", "style", "title"})
+RAW_TEXT_END_RE = {tag: re.compile(rf"</{tag}\s*>", re.I) for tag in RAW_TEXT_TAGS}
+BLOCK_TAGS = frozenset(
+    {
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "br",
+        "center",
+        "dd",
+        "div",
+        "dl",
+        "dt",
+        "fieldset",
+        "figcaption",
+        "figure",
+        "footer",
+        "form",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "header",
+        "hr",
+        "li",
+        "main",
+        "nav",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "table",
+        "td",
+        "th",
+        "tr",
+        "ul",
+    }
+)
+VOID_TAGS = frozenset(
+    {
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "source",
+        "track",
+        "wbr",
+    }
+)
+HIDDEN_STYLE_RE = re.compile(
+    r"display\s*:\s*none|visibility\s*:\s*hidden|mso-hide\s*:\s*all", re.I
+)
+HIDDEN_HINT_RE = re.compile(r"hidden|none|mso-hide", re.I)
+WHITESPACE_RE = re.compile(r"\s+")
+# A quote only opens a value right after ``=``, and quoted values may not span
+# markup; any other "<name" that does not close cleanly is matched as ``broken``
+# so the caller can hand the document to BeautifulSoup.
+TOKEN_RE = re.compile(
+    r"<(?:!--.*?-->|!\[CDATA\[(?P<cdata>.*?)\]\]>|![^>]*>|\?[^>]*>"
+    r"|(?P<close>/)?(?P<tag>[a-zA-Z][a-zA-Z0-9:-]*)"
+    r"(?P<attrs>(?:[^>\"'=]++|=\s*+(?:\"[^\"<]*+\"|'[^'<]*+')?)*+)>"
+    r"|(?P<broken>/?[a-zA-Z]))",
+    re.S,
+)
+# Longer tags are treated as a runaway attribute value rather than trusted.
+MAX_TAG_CHARS = 8192
+ATTR_RE = re.compile(
+    r"([^\s=/>\"']+)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>\"']+)))?"
+)
+
+
+# A sign-off only starts the signature when at most this many lines follow it.
+SIGNATURE_MAX_LINES = 4
+_REPLY_OPENERS = r"On|Am|Le|El|Il(?: giorno)?|Op|Em|På|Den|W dniu"
+_REPLY_VERBS = (
+    r"wrote|schrieb|a écrit|escribió|ha scritto|schreef|escreveu|skrev"
+    r"|napisał(?:a|\(a\))?"
+)
+_HEADER_FROM = r"From|Von|De|Da|Van|Från|Fra|Od"
+_HEADER_SENT = (
+    r"Sent|Date|Gesendet|Datum|Envoyé|Enviado|Fecha|Inviato|Data|Verzonden"
+    r"|Skickat|Sendt|Wysłano"
+)
+_ORIGINAL_MESSAGE = (
+    r"Original Message|Ursprüngliche Nachricht|Message d'origine|Mensaje original"
+    r"|Messaggio originale|Oorspronkelijk bericht|Mensagem original"
+    r"|Originalmeddelande|Wiadomość oryginalna"
+)
+_SIGNOFFS = (
+    r"thanks|thank you|best|regards|sincerely|cheers|sent from my|get outlook for"
+    r"|grüße|gruß|viele grüße|mit freundlichen grüßen|danke|cordialement"
+    r"|bien à vous|merci|saludos|un saludo|atentamente|gracias|cordiali saluti"
+    r"|saluti|grazie|met vriendelijke groet|groeten|atenciosamente|abraços"
+    r"|obrigad[oa]|med vänliga hälsningar|hälsningar|mvh|pozdrawiam|dziękuję"
+)
+_REPLY_HEADER = "|".join(
+    [
+        # Gmail / Apple Mail, optionally wrapped before the verb.
+        rf"[ \t]*(?:{_REPLY_OPENERS})\b[^\n]*?\b(?:{_REPLY_VERBS})\b[^\n:]{{0,80}}:",
+        rf"[ \t]*(?:{_REPLY_OPENERS})\b[^\n]*\n[^\n]*?\b(?:{_REPLY_VERBS})\b"
+        r"[^\n:]{0,80}:[ \t]*$",
+        # Outlook header block, optionally preceded by its underscore rule.
+        rf"(?:_{{10,}}[ \t]*\r?\n)?[ \t]*\*?(?:{_HEADER_FROM})[ \t]*:\*?[^\n]*\n"
+        rf"(?:[^\n]*\n){{0,2}}?[ \t]*\*?(?:{_HEADER_SENT})[ \t]*:",
+        rf"[ \t]*-{{2,}}[ \t]*(?:{_ORIGINAL_MESSAGE})[ \t]*-{{2,}}",
+    ]
+)
+# Cheap first-character check so most lines fail before any alternative is
+# tried; it must cover the first letter of every opener and header word above.
+_REPLY_GATE = r"(?=[ \t]*[>_*\-oaleipdwfv])"
+_REPLY_LINE = (
+    _REPLY_GATE + r"(?:(?P<quote>[ \t]*>[^\n]*(?:\n|\Z))"
+    rf"|(?P<header>{_REPLY_HEADER})"
+    r"|(?P<delimiter>--[ \t]?\r?$))"
+)
+# REPLY_RE tests a single line start; REPLY_SCAN_RE finds the following ones by
+# anchoring on the newline literal, which lets the regex engine skip ahead
+# instead of attempting a match at every character.
+REPLY_RE = re.compile(rf"(?:{_REPLY_LINE})", re.IGNORECASE | re.MULTILINE)
+REPLY_SCAN_RE = re.compile(rf"\n(?:{_REPLY_LINE})", re.IGNORECASE | re.MULTILINE)
+SIGNOFF_RE = re.compile(rf"[ \t]*(?:{_SIGNOFFS})\b", re.IGNORECASE)
 
-from bs4 import BeautifulSoup
+
+@dataclass(frozen=True)
+class ReplyLayout:
+    body_end: int
+    quote_start: int | None
+    signature_start: int | None
+    quoted_lines: tuple[tuple[int, int], ...]
 
 
 @dataclass(frozen=True)
@@ -53,12 +197,9 @@ def parse_message(message: dict) -> ParsedEmail:
     sent_at = _parse_date(date_value)
     received_at = _parse_internal_date(message.get("internalDate"))
 
-    parts = list(_walk_parts(payload))
-    body_text = _extract_body_text(parts)
+    body_text, attachments = _scan_parts(payload)
     clean_body_text = _clean_text(body_text)
 
-    attachments = _extract_attachments(parts)
-
     return ParsedEmail(
         clean_body_text=clean_body_text,
         subject=subject,
@@ -73,51 +214,55 @@ def parse_message(message: dict) -> ParsedEmail:
     )
 
 
-def _walk_parts(payload: dict):
-    yield payload
-    for part in payload.get("parts", []) or []:
-        yield from _walk_parts(part)
-
-
-def _extract_body_text(parts: list[dict]) -> str:
-    plain_chunks = []
-    html_chunks = []
-    for part in parts:
-        mime_type = part.get("mimeType", "")
-        body = part.get("body", {}) or {}
-        data = body.get("data")
-        if not data:
-            continue
-        decoded = _decode_base64url(data)
-        if mime_type == "text/plain":
-            plain_chunks.append(decoded)
-        elif mime_type == "text/html":
-            html_chunks.append(decoded)
+def walk_parts(payload: dict):
+    """Yield MIME parts depth-first, in document order, without recursion."""
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        yield part
+        children = part.get("parts")
+        if children:
+            stack.extend(reversed(children))
 
-    if plain_chunks:
-        return "\n".join(plain_chunks)
-    if html_chunks:
-        return _html_to_text(html_chunks[0])
-    return ""
 
+def _scan_parts(payload: dict) -> tuple[str, list[AttachmentMeta]]:
+    """Pick the body parts and list attachments in one walk.
 
-def _extract_attachments(parts: list[dict]) -> list[AttachmentMeta]:
+    Only references to the encoded body data are kept while walking; the
+    text/plain parts are decoded at the end, and the first text/html part only
+    when there is no plain text. Other inline data (images, calendar parts)
+    is never decoded.
+    """
+    plain_data: list[str] = []
+    html_data: str | None = None
     attachments = []
-    for part in parts:
+    for part in walk_parts(payload):
+        body = part.get("body") or {}
         filename = part.get("filename")
-        body = part.get("body", {}) or {}
         attachment_id = body.get("attachmentId")
-        if not filename and not attachment_id:
-            continue
-        attachments.append(
-            AttachmentMeta(
-                filename=filename,
-                mime_type=part.get("mimeType"),
-                size_estimate=body.get("size"),
-                attachment_id=attachment_id,
+        if filename or attachment_id:
+            attachments.append(
+                AttachmentMeta(
+                    filename=filename,
+                    mime_type=part.get("mimeType"),
+                    size_estimate=body.get("size"),
+                    attachment_id=attachment_id,
+                )
             )
-        )
-    return attachments
+        data = body.get("data")
+        if not data:
+            continue
+        mime_type = part.get("mimeType", "")
+        if mime_type == "text/plain":
+            plain_data.append(data)
+        elif mime_type == "text/html" and html_data is None:
+            html_data = data
+
+    if plain_data:
+        return "\n".join(_decode_base64url(data) for data in plain_data), attachments
+    if html_data is not None:
+        return _html_to_text(_decode_base64url(html_data)), attachments
+    return "", attachments
 
 
 def _decode_base64url(data: str) -> str:
@@ -127,10 +272,147 @@ def _decode_base64url(data: str) -> str:
 
 
 def _html_to_text(html: str) -> str:
+    """Convert HTML to text with one line per block, skipping hidden content.
+
+    Tokenizes the markup in a single regex pass instead of building a tree and
+    only parses attributes on tags that could hide content. Falls back to
+    BeautifulSoup, which repairs nesting, when the stream cannot be resolved
+    (e.g. a hidden element that is never closed, or a tag whose attribute
+    quoting does not balance).
+    """
+    text = _stream_html_text(html)
+    if text is None:
+        return _html_to_text_soup(html)
+    return text
+
+
+def _stream_html_text(html: str) -> str | None:
+    sink = _TextSink()
+    # Name and nesting depth of the element currently being skipped.
+    skip_tag: str | None = None
+    skip_depth = 0
+    pos = 0
+    length = len(html)
+    while pos < length:
+        match = TOKEN_RE.search(html, pos)
+        if match is None:
+            if skip_tag is None:
+                sink.data(unescape(html[pos:]))
+            break
+        if skip_tag is None and match.start() > pos:
+            sink.data(unescape(html[pos : match.start()]))
+        pos = match.end()
+        tag = match.group("tag")
+        if tag is None:
+            if match.group("broken"):
+                return None
+            cdata = match.group("cdata")
+            if cdata and skip_tag is None:
+                sink.data(cdata)
+            continue  # comment, doctype or processing instruction
+        if pos - match.start() > MAX_TAG_CHARS:
+            return None
+        tag = tag.lower()
+        if match.group("close"):
+            if skip_tag is not None:
+                if tag == skip_tag:
+                    skip_depth -= 1
+                    if not skip_depth:
+                        skip_tag = None
+            elif tag not in VOID_TAGS:
+                sink.end(tag)
+            continue
+
+        if tag in RAW_TEXT_TAGS:
+            # Script-like content is not markup; jump past its end tag.
+            end_match = RAW_TEXT_END_RE[tag].search(html, pos)
+            pos = end_match.end() if end_match else length
+            continue
+        attr_text = match.group("attrs")
+        self_closing = attr_text.endswith("/")
+        if skip_tag is not None:
+            if tag == skip_tag and not self_closing:
+                skip_depth += 1
+            continue
+        if tag in SKIPPED_TAGS or (
+            HIDDEN_HINT_RE.search(attr_text) and _is_hidden(_parse_attrs(attr_text))
+        ):
+            if tag not in VOID_TAGS and not self_closing:
+                skip_tag = tag
+                skip_depth = 1
+            continue
+        sink.start(tag)
+        if tag in VOID_TAGS or self_closing:
+            sink.end(tag)
+    if skip_tag is not None:
+        return None
+    return sink.text()
+
+
+def _html_to_text_soup(html: str) -> str:
     soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style"]):
-        tag.decompose()
-    return soup.get_text("\n")
+    sink = _TextSink()
+    stack: list[Tag | NavigableString | str] = [soup]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str) and not isinstance(node, NavigableString):
+            sink.end(node)
+        elif isinstance(node, Tag):
+            if node is not soup:
+                if node.name in SKIPPED_TAGS or _is_hidden(node.attrs):
+                    continue
+                sink.start(node.name)
+                stack.append(node.name)
+            stack.extend(reversed(node.contents))
+        elif not isinstance(
+            node, Comment | Declaration | Doctype | ProcessingInstruction
+        ):
+            sink.data(str(node))
+    return sink.text()
+
+
+class _TextSink:
+    """Accumulates text runs, collapsing whitespace outside ``<pre>``."""
+
+    def __init__(self) -> None:
+        self._chunks: list[str] = []
+        self._pre_depth = 0
+
+    def start(self, tag: str) -> None:
+        if tag in BLOCK_TAGS:
+            self._chunks.append("\n")
+        if tag == "pre":
+            self._pre_depth += 1
+
+    def end(self, tag: str) -> None:
+        if tag == "pre" and self._pre_depth:
+            self._pre_depth -= 1
+        if tag in BLOCK_TAGS:
+            self._chunks.append("\n")
+
+    def data(self, text: str) -> None:
+        if not self._pre_depth:
+            text = WHITESPACE_RE.sub(" ", text)
+        self._chunks.append(text)
+
+    def text(self) -> str:
+        lines = (line.strip() for line in "".join(self._chunks).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def _parse_attrs(attr_text: str) -> dict[str, str]:
+    attrs = {}
+    for match in ATTR_RE.finditer(attr_text):
+        value = next((group for group in match.groups()[1:] if group is not None), "")
+        attrs.setdefault(match.group(1).lower(), unescape(value))
+    return attrs
+
+
+def _is_hidden(attrs: dict) -> bool:
+    if "hidden" in attrs:
+        return True
+    style = attrs.get("style")
+    return bool(style and HIDDEN_STYLE_RE.search(style))
 
 
 def _parse_from(raw_value: str | None) -> tuple[str | None, str | None]:
@@ -173,40 +455,83 @@ def _parse_internal_date(internal_date_ms: str | None) -> datetime | None:
     return datetime.fromtimestamp(millis / 1000.0, tz=UTC)
 
 
-def _clean_text(text: str) -> str:
-    stripped = _strip_reply_blocks(text)
-    stripped = _strip_signature(stripped)
-    return "\n".join(line.rstrip() for line in stripped.splitlines()).strip()
+def detect_reply_layout(text: str) -> ReplyLayout:
+    """Locate quoted history and the signature in a plain-text body.
+
+    One scan classifies inline ``>`` quotes, reply headers (Gmail/Apple
+    "On ... wrote:" and localized variants, Outlook "From:/Sent:" blocks and
+    "Original Message" separators) and ``-- `` delimiters; sign-offs are then
+    only looked for in the last few lines of what remains. Offsets index into
+    ``text``; nothing is copied.
+    """
+    quoted_lines: list[tuple[int, int]] = []
+    delimiter: int | None = None
+    quote_start: int | None = None
+    for start, kind in _reply_line_matches(text):
+        if kind == "header":
+            quote_start = start
+            break
+        if kind == "delimiter":
+            if delimiter is None:
+                delimiter = start
+        else:
+            quoted_lines.append((start, _line_end(text, start)))
+
+    body_end = len(text) if quote_start is None else quote_start
+    signature_start = _find_signoff(text, body_end, quoted_lines)
+    if delimiter is not None and (
+        signature_start is None or delimiter < signature_start
+    ):
+        signature_start = delimiter
+    if signature_start is not None:
+        body_end = signature_start
+    return ReplyLayout(
+        body_end=body_end,
+        quote_start=quote_start,
+        signature_start=signature_start,
+        quoted_lines=tuple(span for span in quoted_lines if span[0] < body_end),
+    )
 
 
-def _strip_reply_blocks(text: str) -> str:
-    lines = text.splitlines()
-    output = []
-    for line in lines:
-        lower = line.strip().lower()
-        if lower.startswith("on ") and " wrote:" in lower:
-            break
-        if lower.startswith(">"):
-            continue
-        if "-----original message-----" in lower:
-            break
-        output.append(line)
-    return "\n".join(output)
-
-
-def _strip_signature(text: str) -> str:
-    signoffs = [
-        "thanks",
-        "thank you",
-        "best",
-        "regards",
-        "sincerely",
-        "cheers",
-    ]
-    lines = text.splitlines()
-    for idx, line in enumerate(lines):
-        lower = line.strip().lower()
-        if any(lower.startswith(signoff) for signoff in signoffs):
-            if len(lines) - idx <= 4:
-                return "\n".join(lines[:idx]).strip()
-    return text
+def _reply_line_matches(text: str):
+    first = REPLY_RE.match(text)
+    if first is not None:
+        yield 0, first.lastgroup
+    for match in REPLY_SCAN_RE.finditer(text):
+        yield match.start() + 1, match.lastgroup
+
+
+def _line_end(text: str, start: int) -> int:
+    end = text.find("\n", start)
+    return len(text) if end < 0 else end + 1
+
+
+def _find_signoff(
+    text: str, body_end: int, quoted_lines: list[tuple[int, int]]
+) -> int | None:
+    # Walk back over the last SIGNATURE_MAX_LINES unquoted lines; the topmost
+    # sign-off among them starts the signature.
+    quoted_starts = {start for start, _ in quoted_lines}
+    found = None
+    kept = 0
+    pos = body_end
+    while pos > 0 and kept < SIGNATURE_MAX_LINES:
+        start = text.rfind("\n", 0, pos - 1) + 1
+        if start not in quoted_starts:
+            kept += 1
+            if SIGNOFF_RE.match(text, start):
+                found = start
+        pos = start
+    return found
+
+
+def _clean_text(text: str) -> str:
+    layout = detect_reply_layout(text)
+    chunks = []
+    pos = 0
+    for start, end in layout.quoted_lines:
+        chunks.append(text[pos:start])
+        pos = end
+    chunks.append(text[pos : layout.body_end])
+    body = "".join(chunks)
+    return "\n".join(line.rstrip() for line in body.splitlines()).strip()
@@ -0,0 +1,284 @@
+"""Process pool that runs attachment text extraction under resource limits."""
+
+from __future__ import annotations
+
+import faulthandler
+import multiprocessing
+import resource
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from app.config import Settings
+from app.services.metrics import metrics
+
+# Extra wall-clock time beyond the in-worker alarm before a worker is treated as
+# wedged (e.g. stuck inside native code): its watchdog exits the process and the
+# parent moves new jobs to a fresh pool.
+TIMEOUT_GRACE_SECONDS = 5.0
+
+
+class ExtractionLimitError(RuntimeError):
+    """Raised when an extraction exceeds its time or memory limits."""
+
+
+@dataclass(frozen=True)
+class ExtractionLimits:
+    timeout_s: float
+    max_rss_mb: int
+    max_pdf_pages: int
+
+
+@dataclass(frozen=True)
+class ExtractionOutcome:
+    text: str | None
+    error: str | None
+    elapsed_s: float
+
+
+class InlineExtractor:
+    """Run extractions in the calling thread (tests and pool-less deployments)."""
+
+    def __init__(self, limits: ExtractionLimits) -> None:
+        self._limits = limits
+
+    def extract_many(
+        self, jobs: dict[str, tuple[str | None, bytes | str]]
+    ) -> dict[str, ExtractionOutcome]:
+        outcomes = {}
+        for key, (mime_type, content) in jobs.items():
+            started = time.perf_counter()
+            try:
+                text = _extract(mime_type, content, self._limits.max_pdf_pages)
+                outcome = ExtractionOutcome(
+                    text=text, error=None, elapsed_s=time.perf_counter() - started
+                )
+            except Exception as exc:
+                outcome = ExtractionOutcome(
+                    text=None, error=str(exc), elapsed_s=time.perf_counter() - started
+                )
+            _record(mime_type, outcome)
+            outcomes[key] = outcome
+        return outcomes
+
+
+class ExtractionPool:
+    """Fan extractions out to worker processes with per-task limits.
+
+    Jobs may pass a file path instead of bytes so large content is not pickled.
+    At most ``max_workers`` jobs are submitted at once, across all callers, so
+    every submitted job starts right away and its deadline can be counted from
+    submission.
+    """
+
+    def __init__(
+        self, max_workers: int, limits: ExtractionLimits, tasks_per_child: int
+    ) -> None:
+        self._max_workers = max_workers
+        self._limits = limits
+        self._tasks_per_child = tasks_per_child
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._executor: ProcessPoolExecutor | None = None
+
+    def extract_many(
+        self, jobs: dict[str, tuple[str | None, bytes | str]]
+    ) -> dict[str, ExtractionOutcome]:
+        submitted = {
+            key: self._submit(mime_type, content)
+            for key, (mime_type, content) in jobs.items()
+        }
+        outcomes = {}
+        for key, (mime_type, content) in jobs.items():
+            outcome = self._wait(*submitted[key])
+            if outcome is None:
+                # The pool broke under a healthy job (another worker was
+                # killed); run it once more on a fresh pool.
+                outcome = self._wait(*self._submit(mime_type, content))
+            if outcome is None:
+                outcome = ExtractionOutcome(
+                    text=None, error="Extraction worker crashed", elapsed_s=0.0
+                )
+            _record(mime_type, outcome)
+            outcomes[key] = outcome
+        return outcomes
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def _submit(
+        self, mime_type: str | None, content: bytes | str
+    ) -> tuple[ProcessPoolExecutor, Future, float]:
+        self._slots.acquire()
+        executor = self._get_executor()
+        started = time.monotonic()
+        try:
+            future = executor.submit(
+                _run_extraction,
+                mime_type,
+                content,
+                self._limits.timeout_s,
+                self._limits.max_pdf_pages,
+            )
+        except BrokenProcessPool:
+            self._slots.release()
+            self._recycle(executor)
+            return self._submit(mime_type, content)
+        future.add_done_callback(lambda _: self._slots.release())
+        return executor, future, started
+
+    def _wait(
+        self, executor: ProcessPoolExecutor, future: Future, started: float
+    ) -> ExtractionOutcome | None:
+        """Outcome of one job, or None if it was lost to a broken pool."""
+        deadline = started + self._limits.timeout_s + TIMEOUT_GRACE_SECONDS
+        timed_out = ExtractionOutcome(
+            text=None, error="Extraction timed out", elapsed_s=self._limits.timeout_s
+        )
+        try:
+            text, elapsed_s = future.result(
+                timeout=max(0.0, deadline - time.monotonic())
+            )
+            return ExtractionOutcome(text=text, error=None, elapsed_s=elapsed_s)
+        except FutureTimeoutError:
+            self._recycle(executor)
+            return timed_out
+        except BrokenProcessPool:
+            self._recycle(executor)
+            if time.monotonic() - started >= self._limits.timeout_s:
+                # Most likely this job's own worker, stopped by its watchdog.
+                return timed_out
+            return None
+        except Exception as exc:
+            return ExtractionOutcome(text=None, error=str(exc), elapsed_s=0.0)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self._limits.max_rss_mb,),
+                    max_tasks_per_child=self._tasks_per_child,
+                )
+            return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Route new jobs to a fresh pool and let ``executor`` wind down.
+
+        Jobs still running on the old pool finish normally. A wedged worker
+        is stopped by the watchdog in ``_run_extraction``, after which the old
+        pool's processes exit.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False)
+
+
+_pool: ExtractionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_extractor(settings: Settings) -> ExtractionPool | InlineExtractor:
+    """Return the shared extraction pool, or an inline extractor if disabled."""
+    global _pool
+    limits = ExtractionLimits(
+        timeout_s=settings.attachment_extraction_timeout_s,
+        max_rss_mb=settings.attachment_extraction_max_rss_mb,
+        max_pdf_pages=settings.attachment_extraction_max_pdf_pages,
+    )
+    if settings.attachment_extraction_workers <= 0:
+        return InlineExtractor(limits)
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool(
+                max_workers=settings.attachment_extraction_workers,
+                limits=limits,
+                tasks_per_child=settings.attachment_extraction_tasks_per_child,
+            )
+        return _pool
+
+
+def _init_worker(max_rss_mb: int) -> None:
+    # Load the extractors up front so per-task alarms time extraction only and
+    # the address-space baseline below already includes the parsing libraries.
+    import app.services.attachments  # noqa: F401
+
+    # RLIMIT_RSS is not enforced on Linux, so cap the address space instead,
+    # allowing max_rss_mb of headroom above what the fresh worker already maps.
+    if max_rss_mb <= 0:
+        return
+    limit = _current_address_space_bytes() + max_rss_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _run_extraction(
+    mime_type: str | None,
+    content: bytes | str,
+    timeout_s: float,
+    max_pdf_pages: int,
+) -> tuple[str, float]:
+    def _on_alarm(signum, frame):
+        raise ExtractionLimitError(f"Extraction exceeded {timeout_s}s")
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout_s)
+    # The alarm handler only runs between bytecodes; faulthandler's watchdog
+    # thread exits the worker even while it is stuck inside native code.
+    faulthandler.dump_traceback_later(timeout_s + TIMEOUT_GRACE_SECONDS, exit=True)
+    started = time.perf_counter()
+    try:
+        text = _extract(mime_type, content, max_pdf_pages)
+    except MemoryError as exc:
+        raise ExtractionLimitError("Extraction exceeded memory limit") from exc
+    finally:
+        faulthandler.cancel_dump_traceback_later()
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+    return text, time.perf_counter() - started
+
+
+def _extract(mime_type: str | None, source: bytes | str, max_pdf_pages: int) -> str:
+    from app.services import attachments
+
+    if isinstance(source, str):
+        return attachments.extract_text_from_file(
+            mime_type, source, max_pdf_pages=max_pdf_pages
+        )
+    return attachments.extract_text_from_bytes(
+        mime_type, source, max_pdf_pages=max_pdf_pages
+    )
+
+
+def _current_address_space_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as handle:
+            pages = int(handle.read().split()[0])
+        return pages * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _record(mime_type: str | None, outcome: ExtractionOutcome) -> None:
+    mime_label = mime_type or "unknown"
+    metrics.observe(
+        "attachment_extraction_seconds", outcome.elapsed_s, mime_type=mime_label
+    )
+    metrics.inc(
+        "attachment_extraction_total",
+        mime_type=mime_label,
+        outcome="ok" if outcome.error is None else "error",
+    )
@@ -0,0 +1,111 @@
+"""Short-lived in-process cache of Calendar free/busy answers.
+
+Entries are keyed by user and calendar id (what a user can see of another
+calendar depends on their credentials) and hold the merged busy intervals for
+the window that was fetched. Any later request for a sub-window is answered
+from the entry until it expires. The cache is per process, so the TTL bounds
+how stale another instance can be after this app creates an event; this
+process drops a user's entries as soon as it writes to their calendar.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.services.intervals import merge_intervals
+from app.services.metrics import metrics
+
+BusyIntervals = list[tuple[datetime, datetime]]
+DEFAULT_MAX_ENTRIES = 5000
+
+
+@dataclass(frozen=True)
+class _Entry:
+    time_min: datetime
+    time_max: datetime
+    # None records that the calendar is not visible to the user.
+    busy: BusyIntervals | None
+    expires_at: float
+
+
+class FreeBusyCache:
+    """LRU map of ``(user_id, calendar_id)`` to a fetched window."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[int, str], _Entry] = OrderedDict()
+
+    def get(
+        self,
+        user_id: int,
+        calendar_id: str,
+        time_min: datetime,
+        time_max: datetime,
+    ) -> tuple[bool, BusyIntervals | None]:
+        """Return ``(hit, busy)`` for a window inside a cached, unexpired one."""
+        key = (user_id, calendar_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None or time_min < entry.time_min or time_max > entry.time_max:
+                metrics.inc("freebusy_cache_total", outcome="miss")
+                return False, None
+            self._entries.move_to_end(key)
+        metrics.inc("freebusy_cache_total", outcome="hit")
+        if entry.busy is None:
+            return True, None
+        return True, [
+            (start, end)
+            for start, end in entry.busy
+            if end > time_min and start < time_max
+        ]
+
+    def put(
+        self,
+        user_id: int,
+        calendar_id: str,
+        time_min: datetime,
+        time_max: datetime,
+        busy: BusyIntervals | None,
+        ttl_s: float,
+    ) -> None:
+        if ttl_s <= 0:
+            return
+        entry = _Entry(
+            time_min=time_min,
+            time_max=time_max,
+            busy=None if busy is None else merge_intervals(busy),
+            expires_at=self._clock() + ttl_s,
+        )
+        key = (user_id, calendar_id)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop every cached calendar for ``user_id``."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+freebusy_cache = FreeBusyCache()
@@ -61,6 +61,24 @@ class GmailClient:
             .execute()
         )
 
+    def batch_modify_labels(
+        self, message_ids, add_label_ids=None, remove_label_ids=None
+    ):
+        """Apply one label change to up to 1000 messages in a single request."""
+        return (
+            self._service.users()
+            .messages()
+            .batchModify(
+                userId="me",
+                body={
+                    "ids": list(message_ids),
+                    "addLabelIds": add_label_ids or [],
+                    "removeLabelIds": remove_label_ids or [],
+                },
+            )
+            .execute()
+        )
+
     def trash_message(self, message_id):
         return (
             self._service.users().messages().trash(userId="me", id=message_id).execute()
@@ -20,12 +20,17 @@ from app.models import (
     Email,
     GmailSyncState,
     GoogleOAuthToken,
+    is_inbox,
 )
+from app.services.attachment_queue import initial_extraction_status
+from app.services.attachments import delete_attachments
 from app.services.calendar_extract import generate_calendar_candidates
+from app.services.digest_store import upsert_digest_entry
 from app.services.drafts import propose_draft
 from app.services.email_parser import parse_message
 from app.services.gmail_client import GmailClient
 from app.services.google_credentials import build_credentials
+from app.services.search import index_email
 from app.services.triage import triage_email
 from app.services.vip_alerts import create_vip_alert_if_needed
 
@@ -60,14 +65,29 @@ def _upsert_attachment(db: Session, values: dict) -> None:
                 "filename": insert_stmt.excluded.filename,
                 "mime_type": insert_stmt.excluded.mime_type,
                 "size_bytes": insert_stmt.excluded.size_bytes,
-                "extraction_status": insert_stmt.excluded.extraction_status,
                 "updated_at": datetime.now(UTC),
             },
         )
     )
 
 
+def _prune_attachments(db: Session, email: Email, current: list) -> None:
+    """Delete attachment rows the re-fetched message no longer lists."""
+    keep = {item.attachment_id for item in current if item.attachment_id}
+    db.flush()
+    db.refresh(email, ["attachments"])
+    delete_attachments(
+        db,
+        [
+            attachment
+            for attachment in email.attachments
+            if attachment.gmail_attachment_id not in keep
+        ],
+    )
+
+
 def _upsert_email(db: Session, values: dict, error: bool = False) -> None:
+    values = {**values, "in_inbox": is_inbox(values.get("label_ids"))}
     dialect = db.bind.dialect.name if db.bind else "postgresql"
     if dialect == "sqlite":
         insert_stmt = sqlite_insert(Email).values(**values)
@@ -89,6 +109,7 @@ def _upsert_email(db: Session, values: dict, error: bool = False) -> None:
             "to_emails": insert_stmt.excluded.to_emails,
             "cc_emails": insert_stmt.excluded.cc_emails,
             "label_ids": insert_stmt.excluded.label_ids,
+            "in_inbox": insert_stmt.excluded.in_inbox,
             "ingest_status": insert_stmt.excluded.ingest_status,
             "ingest_error": insert_stmt.excluded.ingest_error,
             "updated_at": datetime.now(UTC),
@@ -183,6 +204,7 @@ def full_sync_inbox(
                 )
             ).scalar_one_or_none()
             if email_row:
+                index_email(db, email_row)
                 for attachment in parsed.attachments:
                     if not attachment.attachment_id:
                         continue
@@ -195,9 +217,14 @@ def full_sync_inbox(
                             "filename": attachment.filename,
                             "mime_type": attachment.mime_type,
                             "size_bytes": attachment.size_estimate,
-                            "extraction_status": "NOT_PROCESSED",
+                            "extraction_status": initial_extraction_status(
+                                attachment.mime_type,
+                                attachment.size_estimate,
+                                settings,
+                            ),
                         },
                     )
+                _prune_attachments(db, email_row, parsed.attachments)
                 if is_new:
                     try:
                         create_vip_alert_if_needed(db, user_id, email_row)
@@ -206,6 +233,11 @@ def full_sync_inbox(
                     _auto_propose_draft(db, settings, crypto, user_id, email_row.id)
                     _auto_propose_calendar(db, settings, crypto, user_id, email_row.id)
             db.commit()
+            if email_row:
+                # A short transaction of its own, so the open digest row is not
+                # locked while the rest of the message is processed.
+                upsert_digest_entry(db, email_row)
+                db.commit()
         except Exception as exc:
             db.rollback()
             errors += 1
@@ -334,6 +366,7 @@ def incremental_sync(
                 )
             ).scalar_one_or_none()
             if email_row:
+                index_email(db, email_row)
                 for attachment in parsed.attachments:
                     if not attachment.attachment_id:
                         continue
@@ -346,9 +379,14 @@ def incremental_sync(
                             "filename": attachment.filename,
                             "mime_type": attachment.mime_type,
                             "size_bytes": attachment.size_estimate,
-                            "extraction_status": "NOT_PROCESSED",
+                            "extraction_status": initial_extraction_status(
+                                attachment.mime_type,
+                                attachment.size_estimate,
+                                settings,
+                            ),
                         },
                     )
+                _prune_attachments(db, email_row, parsed.attachments)
                 if is_new:
                     try:
                         alert = create_vip_alert_if_needed(db, user_id, email_row)
@@ -359,6 +397,11 @@ def incremental_sync(
                     _auto_propose_draft(db, settings, crypto, user_id, email_row.id)
                     _auto_propose_calendar(db, settings, crypto, user_id, email_row.id)
             db.commit()
+            if email_row:
+                # A short transaction of its own, so the open digest row is not
+                # locked while the rest of the message is processed.
+                upsert_digest_entry(db, email_row)
+                db.commit()
         except Exception as exc:
             db.rollback()
             errors += 1
@@ -0,0 +1,107 @@
+"""Integer interval helpers for free/busy computations.
+
+Intervals are half-open ``(start, end)`` pairs of whole minutes measured from a
+common origin, so merging and subtraction are plain integer comparisons.
+"""
+
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime
+from typing import TypeVar
+
+Interval = tuple[int, int]
+T = TypeVar("T", int, datetime)
+
+
+def minute_floor(value: datetime, origin_ts: float) -> int:
+    """Minutes from the POSIX timestamp ``origin_ts`` to ``value``, rounded down."""
+    return int((value.timestamp() - origin_ts) // 60)
+
+
+def minute_ceil(value: datetime, origin_ts: float) -> int:
+    return -int((origin_ts - value.timestamp()) // 60)
+
+
+def merge_intervals(intervals: Iterable[tuple[T, T]]) -> list[tuple[T, T]]:
+    """Sort and merge overlapping or touching intervals."""
+    merged: list[tuple[T, T]] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class BusyIndex:
+    """Merged busy intervals with a bisectable list of end offsets."""
+
+    def __init__(self, intervals: Iterable[Interval]) -> None:
+        self.intervals = merge_intervals(intervals)
+        self._ends = [end for _, end in self.intervals]
+
+    def free_gaps(self, start: int, end: int) -> Iterator[Interval]:
+        """Yield the free gaps inside ``[start, end)``."""
+        cursor = start
+        index = bisect_right(self._ends, start)
+        while index < len(self.intervals) and cursor < end:
+            busy_start, busy_end = self.intervals[index]
+            if busy_start >= end:
+                break
+            if busy_start > cursor:
+                yield cursor, busy_start
+            cursor = max(cursor, busy_end)
+            index += 1
+        if cursor < end:
+            yield cursor, end
+
+
+class BusyProfile:
+    """Which of several calendars are busy over time.
+
+    Each calendar's merged intervals become a sorted stream of boundaries, and
+    a k-way ``heapq.merge`` of the streams yields segments tagged with a bitmask
+    of the calendars busy during them.
+    """
+
+    def __init__(self, calendars: Sequence[Iterable[Interval]]) -> None:
+        streams = [
+            [
+                (point, 1 << index)
+                for interval in merge_intervals(intervals)
+                for point in interval
+            ]
+            for index, intervals in enumerate(calendars)
+        ]
+        self._starts: list[int] = []
+        self._masks: list[int] = []
+        mask = 0
+        for point, bit in heapq.merge(*streams):
+            # Merged intervals alternate start/end, so each boundary toggles.
+            mask ^= bit
+            if self._starts and self._starts[-1] == point:
+                self._masks[-1] = mask
+            else:
+                self._starts.append(point)
+                self._masks.append(mask)
+
+    def busy_count(self, start: int, end: int) -> int:
+        """Number of calendars busy at any point in ``[start, end)``."""
+        index = max(0, bisect_right(self._starts, start) - 1)
+        mask = 0
+        while index < len(self._starts) and self._starts[index] < end:
+            mask |= self._masks[index]
+            index += 1
+        return mask.bit_count()
+
+
+def slot_starts(gaps: Iterable[Interval], duration: int, step: int) -> Iterator[int]:
+    """Yield slot start offsets, ``step`` apart from the start of each gap."""
+    for gap_start, gap_end in gaps:
+        yield from range(gap_start, gap_end - duration + 1, step)
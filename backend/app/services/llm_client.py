@@ -8,7 +8,6 @@ import logging
 from typing import Any
 
 import jsonschema
-from openai import OpenAI
 
 from app.config import Settings
 
@@ -25,6 +24,10 @@ class LLMClient:
     def __init__(self, settings: Settings) -> None:
         if not settings.openai_api_key:
             raise LLMError("OPENAI_API_KEY is not configured")
+        # The openai SDK is the slowest import in the API process, so it is
+        # loaded when the first client is built rather than at boot.
+        from openai import OpenAI
+
         self._client = OpenAI(api_key=settings.openai_api_key)
         self._default_model = settings.openai_model
 
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterable
+import heapq
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from datetime import UTC, date, datetime, time, timedelta
 
@@ -11,14 +12,32 @@ from sqlalchemy.orm import Session
 
 from app.config import Settings
 from app.crypto import CryptoProvider
-from app.models import CalendarCandidate, Email, GoogleOAuthToken, UserPreferences
+from app.models import (
+    CalendarCandidate,
+    Email,
+    GoogleOAuthToken,
+    User,
+    UserPreferences,
+)
 from app.services.calendar_client import CalendarClient
+from app.services.calendar_sync import mirror_ready, mirrored_busy
+from app.services.freebusy_cache import freebusy_cache
 from app.services.google_credentials import build_credentials
+from app.services.intervals import (
+    BusyIndex,
+    BusyProfile,
+    minute_ceil,
+    minute_floor,
+    slot_starts,
+)
 from app.services.preferences import default_preferences
 
 BUFFER_MINUTES = 10
 SLOT_INCREMENT_MINUTES = 15
 DEFAULT_WINDOW_DAYS = 7
+MAX_SUGGESTIONS = 5
+# Calendar API limit on calendars per freebusy query.
+FREEBUSY_MAX_CALENDARS = 50
 DAY_TO_INDEX = {
     "mon": 0,
     "tue": 1,
@@ -82,38 +101,74 @@ def suggest_times(
         payload_type, proposed_start, proposed_end, now, working_hours
     )
 
-    if client is None:
-        token_row = db.execute(
-            select(GoogleOAuthToken).where(GoogleOAuthToken.user_id == user_id)
-        ).scalar_one_or_none()
-        if not token_row:
-            raise ValueError("Missing OAuth token row for user")
-        creds = build_credentials(db, token_row, settings, crypto).credentials
-        client = CalendarClient(credentials=creds)
-
-    freebusy = client.freebusy_query(
-        time_min=window_start.isoformat(),
-        time_max=window_end.isoformat(),
-        calendar_ids=["primary"],
+    user = db.get(User, user_id)
+    attendees = _other_attendees(payload.get("attendees"), user.email if user else None)
+    calendars: dict[str, list[tuple[datetime, datetime]]] = {}
+    calendar_ids = ["primary", *attendees]
+    if mirror_ready(db, user_id):
+        calendars["primary"] = mirrored_busy(db, user_id, window_start, window_end)
+        calendar_ids = attendees
+
+    if calendar_ids:
+        if client is None:
+            token_row = db.execute(
+                select(GoogleOAuthToken).where(GoogleOAuthToken.user_id == user_id)
+            ).scalar_one_or_none()
+            if not token_row:
+                raise ValueError("Missing OAuth token row for user")
+            creds = build_credentials(db, token_row, settings, crypto).credentials
+            client = CalendarClient(credentials=creds)
+        calendars.update(
+            _query_busy(
+                client,
+                user_id,
+                window_start,
+                window_end,
+                calendar_ids,
+                settings.freebusy_cache_ttl_s,
+            )
+        )
+    busy_intervals = calendars.pop("primary", []) + _pending_recurring_busy(
+        db, user_id, candidate.id, window_start, window_end
     )
-    busy_intervals = _parse_busy_intervals(freebusy)
-
-    suggestions = _generate_suggestions(
-        window_start,
-        window_end,
-        busy_intervals,
-        working_hours,
-        duration_min,
+    attendee_busy = list(calendars.values())
+
+    suggestions = _top_ranked(
+        _generate_suggestions(
+            window_start,
+            window_end,
+            busy_intervals,
+            working_hours,
+            duration_min,
+            attendee_busy,
+        ),
+        MAX_SUGGESTIONS,
     )
 
-    if proposed_slot and _slot_is_available(
-        proposed_slot, busy_intervals, working_hours
+    if proposed_slot and all(
+        _slot_is_available(slot, busy_intervals, working_hours)
+        for slot in [
+            proposed_slot,
+            *(
+                slot
+                for slot in _recurring_slots(payload.get("recurrence"))
+                # Busy data only covers the window.
+                if slot.start >= window_start and slot.end <= window_end
+            ),
+        ]
     ):
+        proposed_slot = _with_score(proposed_slot, attendee_busy)
         suggestions = _prepend_unique(proposed_slot, suggestions)
+        if proposed_slot.score is not None and proposed_slot.score < 1.0:
+            suggestions = _top_ranked(iter(suggestions), MAX_SUGGESTIONS)
 
-    suggestions = suggestions[:5]
+    suggestions = suggestions[:MAX_SUGGESTIONS]
     payload["suggested_times"] = [
-        {"start": slot.start.isoformat(), "end": slot.end.isoformat()}
+        {
+            "start": slot.start.isoformat(),
+            "end": slot.end.isoformat(),
+            "score": slot.score,
+        }
         for slot in suggestions
     ]
     payload["suggested_duration_min"] = duration_min
@@ -172,8 +227,73 @@ def _resolve_window(
     return window_start, window_end, None
 
 
-def _parse_busy_intervals(freebusy: dict) -> list[tuple[datetime, datetime]]:
-    busy = freebusy.get("calendars", {}).get("primary", {}).get("busy", []) or []
+def _other_attendees(attendees: list | None, user_email: str | None) -> list[str]:
+    own = (user_email or "").strip().lower()
+    addresses = {
+        item.strip().lower()
+        for item in attendees or []
+        if isinstance(item, str) and item.strip()
+    }
+    return sorted(addresses - {own})
+
+
+def _query_busy(
+    client: CalendarClient,
+    user_id: int,
+    window_start: datetime,
+    window_end: datetime,
+    calendar_ids: list[str],
+    cache_ttl_s: float = 0.0,
+) -> dict[str, list[tuple[datetime, datetime]]]:
+    """Busy intervals per calendar the user can see, querying in API-sized chunks.
+
+    Calendars the API reports errors for (not shared, unknown address) are left
+    out rather than treated as free. Answers are cached for ``cache_ttl_s``
+    over a window padded to whole hours and days, so requests a few seconds
+    apart fall inside it.
+    """
+    busy: dict[str, list[tuple[datetime, datetime]]] = {}
+    missing = []
+    for calendar_id in calendar_ids:
+        hit, intervals = freebusy_cache.get(
+            user_id, calendar_id, window_start, window_end
+        )
+        if not hit:
+            missing.append(calendar_id)
+        elif intervals is not None:
+            busy[calendar_id] = intervals
+
+    fetch_min = window_start.replace(minute=0, second=0, microsecond=0)
+    fetch_max = datetime.combine(
+        window_end.date() + timedelta(days=1), time(0), tzinfo=window_end.tzinfo
+    )
+    for offset in range(0, len(missing), FREEBUSY_MAX_CALENDARS):
+        chunk = missing[offset : offset + FREEBUSY_MAX_CALENDARS]
+        freebusy = client.freebusy_query(
+            time_min=fetch_min.isoformat(),
+            time_max=fetch_max.isoformat(),
+            calendar_ids=chunk,
+        )
+        calendars = freebusy.get("calendars", {})
+        for calendar_id in chunk:
+            calendar = calendars.get(calendar_id)
+            intervals = None
+            if calendar is not None and not calendar.get("errors"):
+                intervals = _parse_busy_intervals(calendar)
+                busy[calendar_id] = intervals
+            freebusy_cache.put(
+                user_id,
+                calendar_id,
+                fetch_min,
+                fetch_max,
+                intervals,
+                cache_ttl_s,
+            )
+    return busy
+
+
+def _parse_busy_intervals(calendar: dict) -> list[tuple[datetime, datetime]]:
+    busy = calendar.get("busy", []) or []
     intervals = []
     for item in busy:
         start = _parse_rfc3339(item.get("start"))
@@ -190,45 +310,129 @@ def _generate_suggestions(
     busy_intervals: list[tuple[datetime, datetime]],
     working_hours: dict,
     duration_min: int,
-) -> list[MeetingTimeSuggestion]:
-    suggestions: list[MeetingTimeSuggestion] = []
+    attendee_busy: list[list[tuple[datetime, datetime]]] | None = None,
+) -> Iterator[MeetingTimeSuggestion]:
+    """Yield slots where the user is free, in chronological order.
+
+    Busy intervals (with buffers) and lunch breaks are merged once for the whole
+    window as minute offsets; each working day then bisects into them, and
+    slots are produced only as the caller consumes them. With
+    ``attendee_busy``, each slot is scored by the fraction of participants
+    (the user included) free for all of it.
+    """
     tzinfo = window_start.tzinfo or UTC
+    origin = window_start.replace(second=0, microsecond=0)
+    origin_ts = origin.timestamp()
     working_days = _working_day_indices(working_hours.get("days", []))
     start_time = _parse_time(working_hours.get("start_time", "09:00"))
     end_time = _parse_time(working_hours.get("end_time", "17:00"))
     lunch_enabled = bool(working_hours.get("lunch_enabled", False))
     lunch_start = _parse_time(working_hours.get("lunch_start", "12:00"))
     lunch_end = _parse_time(working_hours.get("lunch_end", "13:00"))
-    buffer_delta = timedelta(minutes=BUFFER_MINUTES)
-    slot_delta = timedelta(minutes=duration_min)
-    step_delta = timedelta(minutes=SLOT_INCREMENT_MINUTES)
 
-    for day in _date_range(window_start.date(), window_end.date()):
-        if day.weekday() not in working_days:
-            continue
-        day_start = _combine_date_time(day, start_time, tzinfo)
-        day_end = _combine_date_time(day, end_time, tzinfo)
-        day_start, day_end = _clip_range(day_start, day_end, window_start, window_end)
+    window = (
+        minute_ceil(window_start, origin_ts),
+        minute_floor(window_end, origin_ts),
+    )
+    days = [
+        day
+        for day in _date_range(window_start.date(), window_end.date())
+        if day.weekday() in working_days
+    ]
+    blocked = [
+        (
+            minute_floor(start, origin_ts) - BUFFER_MINUTES,
+            minute_ceil(end, origin_ts) + BUFFER_MINUTES,
+        )
+        for start, end in busy_intervals
+    ]
+    if lunch_enabled and lunch_start < lunch_end:
+        blocked.extend(
+            (
+                minute_floor(_combine_date_time(day, lunch_start, tzinfo), origin_ts)
+                - BUFFER_MINUTES,
+                minute_ceil(_combine_date_time(day, lunch_end, tzinfo), origin_ts)
+                + BUFFER_MINUTES,
+            )
+            for day in days
+        )
+    busy = BusyIndex(blocked)
+    profile = None
+    participants = 1 + len(attendee_busy or [])
+    if attendee_busy:
+        profile = BusyProfile(
+            [
+                [
+                    (minute_floor(start, origin_ts), minute_ceil(end, origin_ts))
+                    for start, end in intervals
+                ]
+                for intervals in attendee_busy
+            ]
+        )
+
+    for day in days:
+        day_start = max(
+            minute_ceil(_combine_date_time(day, start_time, tzinfo), origin_ts),
+            window[0],
+        )
+        day_end = min(
+            minute_floor(_combine_date_time(day, end_time, tzinfo), origin_ts),
+            window[1],
+        )
         if day_end <= day_start:
             continue
-
-        day_busy = _busy_for_day(day_start, day_end, busy_intervals, buffer_delta)
-        if lunch_enabled and lunch_start < lunch_end:
-            lunch_interval = (
-                _combine_date_time(day, lunch_start, tzinfo),
-                _combine_date_time(day, lunch_end, tzinfo),
+        gaps = busy.free_gaps(day_start, day_end)
+        for offset in slot_starts(gaps, duration_min, SLOT_INCREMENT_MINUTES):
+            start = origin + timedelta(minutes=offset)
+            score = None
+            if profile is not None:
+                busy_count = profile.busy_count(offset, offset + duration_min)
+                score = (participants - busy_count) / participants
+            yield MeetingTimeSuggestion(
+                start=start, end=start + timedelta(minutes=duration_min), score=score
             )
-            day_busy.extend(_expand_interval(lunch_interval, buffer_delta))
-        day_busy = _merge_intervals(day_busy)
-
-        for free_start, free_end in _free_intervals(day_start, day_end, day_busy):
-            slot_start = free_start
-            while slot_start + slot_delta <= free_end:
-                suggestions.append(
-                    MeetingTimeSuggestion(start=slot_start, end=slot_start + slot_delta)
-                )
-                slot_start += step_delta
-    return suggestions
+
+
+def _top_ranked(
+    suggestions: Iterator[MeetingTimeSuggestion], limit: int
+) -> list[MeetingTimeSuggestion]:
+    """Best ``limit`` slots by score, earliest first among equal scores.
+
+    Stops reading as soon as ``limit`` slots with everyone free are found, since
+    nothing later can outrank them.
+    """
+    everyone_free: list[MeetingTimeSuggestion] = []
+    partial: list[MeetingTimeSuggestion] = []
+    for slot in suggestions:
+        if slot.score is None or slot.score >= 1.0:
+            everyone_free.append(slot)
+            if len(everyone_free) == limit:
+                break
+        else:
+            partial.append(slot)
+    return everyone_free + heapq.nsmallest(
+        limit - len(everyone_free),
+        partial,
+        key=lambda slot: (-slot.score, slot.start),
+    )
+
+
+def _with_score(
+    slot: MeetingTimeSuggestion,
+    attendee_busy: list[list[tuple[datetime, datetime]]],
+) -> MeetingTimeSuggestion:
+    if not attendee_busy:
+        return slot
+    busy_count = sum(
+        any(_overlaps(slot.start, slot.end, start, end) for start, end in intervals)
+        for intervals in attendee_busy
+    )
+    participants = 1 + len(attendee_busy)
+    return MeetingTimeSuggestion(
+        start=slot.start,
+        end=slot.end,
+        score=(participants - busy_count) / participants,
+    )
 
 
 def _slot_is_available(
@@ -262,69 +466,43 @@ def _slot_is_available(
     return True
 
 
-def _busy_for_day(
-    day_start: datetime,
-    day_end: datetime,
-    busy_intervals: list[tuple[datetime, datetime]],
-    buffer_delta: timedelta,
-) -> list[tuple[datetime, datetime]]:
-    day_busy = []
-    for busy_start, busy_end in busy_intervals:
-        expanded = _expand_interval((busy_start, busy_end), buffer_delta)
-        for start, end in expanded:
-            if end <= day_start or start >= day_end:
-                continue
-            day_busy.append(
-                (
-                    max(start, day_start),
-                    min(end, day_end),
-                )
-            )
-    return day_busy
-
-
-def _expand_interval(
-    interval: tuple[datetime, datetime], buffer_delta: timedelta
+def _pending_recurring_busy(
+    db: Session,
+    user_id: int,
+    candidate_id: int,
+    window_start: datetime,
+    window_end: datetime,
 ) -> list[tuple[datetime, datetime]]:
-    start, end = interval
-    return [(start - buffer_delta, end + buffer_delta)]
-
+    """Occurrences of the user's other recurring invites not yet accepted.
 
-def _merge_intervals(
-    intervals: Iterable[tuple[datetime, datetime]]
-) -> list[tuple[datetime, datetime]]:
-    sorted_intervals = sorted(intervals, key=lambda item: item[0])
-    merged: list[tuple[datetime, datetime]] = []
-    for start, end in sorted_intervals:
-        if not merged:
-            merged.append((start, end))
-            continue
-        last_start, last_end = merged[-1]
-        if start <= last_end:
-            merged[-1] = (last_start, max(last_end, end))
-        else:
-            merged.append((start, end))
-    return merged
+    Accepted invites are already on the calendar; pending ones would otherwise
+    leave their slots looking free.
+    """
+    payloads = db.execute(
+        select(CalendarCandidate.payload).where(
+            CalendarCandidate.user_id == user_id,
+            CalendarCandidate.id != candidate_id,
+            CalendarCandidate.status == "PROPOSED",
+        )
+    ).scalars()
+    return [
+        (slot.start, slot.end)
+        for payload in payloads
+        if (payload or {}).get("type") == "INVITE"
+        for slot in _recurring_slots(payload.get("recurrence"))
+        if _overlaps(slot.start, slot.end, window_start, window_end)
+    ]
 
 
-def _free_intervals(
-    day_start: datetime,
-    day_end: datetime,
-    busy_intervals: list[tuple[datetime, datetime]],
-) -> list[tuple[datetime, datetime]]:
-    free: list[tuple[datetime, datetime]] = []
-    cursor = day_start
-    for busy_start, busy_end in busy_intervals:
-        if busy_end <= cursor:
-            continue
-        if busy_start > cursor:
-            free.append((cursor, min(busy_start, day_end)))
-        cursor = max(cursor, busy_end)
-        if cursor >= day_end:
-            break
-    if cursor < day_end:
-        free.append((cursor, day_end))
-    return free
+def _recurring_slots(recurrence: dict | None) -> list[MeetingTimeSuggestion]:
+    """Expanded occurrences stored on a recurring invite's payload."""
+    slots = []
+    for start_raw, end_raw in (recurrence or {}).get("occurrences", []):
+        start = _parse_rfc3339(start_raw)
+        end = _parse_rfc3339(end_raw)
+        if start and end:
+            slots.append(MeetingTimeSuggestion(start=start, end=end))
+    return slots
 
 
 def _prepend_unique(
@@ -376,12 +554,3 @@ def _ensure_aware(value: datetime) -> datetime:
 
 def _combine_date_time(day: date, value: time, tzinfo) -> datetime:
     return datetime.combine(day, value, tzinfo=tzinfo)
-
-
-def _clip_range(
-    day_start: datetime,
-    day_end: datetime,
-    window_start: datetime,
-    window_end: datetime,
-) -> tuple[datetime, datetime]:
-    return max(day_start, window_start), min(day_end, window_end)
@@ -1,4 +1,4 @@
-"""Queueing abstraction for background Gmail sync jobs."""
+"""Queueing abstraction for background Gmail and Calendar sync jobs."""
 
 from __future__ import annotations
 
@@ -6,9 +6,11 @@ import base64
 import json
 import logging
 from dataclasses import dataclass
+from datetime import datetime
 
 from app.config import Settings
 from app.crypto import CryptoProvider
+from app.services.calendar_sync import sync_calendar
 from app.services.gmail_sync import incremental_sync
 
 logger = logging.getLogger(__name__)
@@ -33,6 +35,10 @@ class LocalQueue:
         incremental_sync(self._db, user_id, self._settings, self._crypto, history_id)
         return EnqueueResult(status="ok", detail="incremental sync executed")
 
+    def enqueue_calendar_sync(self, user_id: int) -> EnqueueResult:
+        sync_calendar(self._db, self._settings, self._crypto, user_id)
+        return EnqueueResult(status="ok", detail="calendar sync executed")
+
 
 class CloudTasksQueue:
     """Cloud Tasks stub that builds a request payload for a worker endpoint."""
@@ -41,17 +47,24 @@ class CloudTasksQueue:
         self._settings = settings
 
     def enqueue_incremental_sync(self, user_id: int, history_id: str) -> EnqueueResult:
+        return self._post_job(
+            "incremental_sync", {"user_id": user_id, "history_id": history_id}
+        )
+
+    def enqueue_calendar_sync(self, user_id: int) -> EnqueueResult:
+        return self._post_job("calendar_sync", {"user_id": user_id})
+
+    def _post_job(self, job: str, payload: dict) -> EnqueueResult:
         queue_path = _queue_path(self._settings)
         target_url = self._settings.cloud_tasks_target_url.rstrip("/")
         if not queue_path or not target_url:
             raise ValueError("Cloud Tasks config is incomplete")
 
-        payload = {"user_id": user_id, "history_id": history_id}
         body = json.dumps(payload).encode("utf-8")
         task = {
             "http_request": {
                 "http_method": "POST",
-                "url": f"{target_url}/internal/jobs/incremental_sync",
+                "url": f"{target_url}/internal/jobs/{job}",
                 "headers": {"Content-Type": "application/json"},
                 "body": base64.b64encode(body).decode("utf-8"),
             }
@@ -72,6 +85,46 @@ class CloudTasksQueue:
         )
 
 
+def enqueue_snooze_sweep(settings: Settings, run_at: datetime) -> EnqueueResult:
+    """Schedule a snooze sweep for ``run_at`` (Cloud Tasks mode only).
+
+    Tasks are named after their run time, so repeated requests for the same
+    wakeup are de-duplicated by Cloud Tasks. Like the other Cloud Tasks jobs
+    this only builds the task, so the ``snooze_sweep`` cron still does the
+    polling; local mode relies on it alone.
+    """
+    mode = (settings.queue_mode or "local").lower()
+    if mode != "cloud_tasks":
+        return EnqueueResult(status="skipped", detail="local mode uses the cron")
+
+    queue_path = _queue_path(settings)
+    target_url = settings.cloud_tasks_target_url.rstrip("/")
+    if not queue_path or not target_url:
+        raise ValueError("Cloud Tasks config is incomplete")
+    run_at_s = int(run_at.timestamp())
+    task = {
+        "name": f"{queue_path}/tasks/snooze-sweep-{run_at_s}",
+        "schedule_time": {"seconds": run_at_s},
+        "http_request": {
+            "http_method": "POST",
+            "url": f"{target_url}/internal/jobs/snooze_sweep",
+        },
+    }
+    if settings.cloud_tasks_service_account:
+        task["http_request"]["oidc_token"] = {
+            "service_account_email": settings.cloud_tasks_service_account
+        }
+    logger.warning(
+        "Cloud Tasks enqueue stub invoked",
+        extra={"queue": queue_path, "target_url": target_url},
+    )
+    return EnqueueResult(
+        status="stub",
+        detail="Cloud Tasks enqueue payload constructed (stub)",
+        task={"queue_path": queue_path, "task": task},
+    )
+
+
 def enqueue_incremental_sync(
     db,
     settings: Settings,
@@ -87,6 +140,18 @@ def enqueue_incremental_sync(
     )
 
 
+def enqueue_calendar_sync(
+    db,
+    settings: Settings,
+    crypto: CryptoProvider,
+    user_id: int,
+) -> EnqueueResult:
+    mode = (settings.queue_mode or "local").lower()
+    if mode == "cloud_tasks":
+        return CloudTasksQueue(settings).enqueue_calendar_sync(user_id)
+    return LocalQueue(db, settings, crypto).enqueue_calendar_sync(user_id)
+
+
 def _queue_path(settings: Settings) -> str:
     if (
         not settings.cloud_tasks_project
@@ -0,0 +1,312 @@
+"""Bounded expansion of recurring iCalendar events.
+
+RRULE, RDATE and EXDATE are evaluated with ``dateutil`` in the event's wall
+clock time, only over a finite window and never past ``max_occurrences``.
+Adversarial rules are kept cheap in three ways:
+
+- Rules without COUNT that step by a fixed period (SECONDLY to WEEKLY) are
+  rebased to start just before the window. Minutely series from years ago
+  then cost nothing to skip. COUNT is reduced to match when there are no BY
+  parts.
+- Any other iteration before the window is limited to ``MAX_RULE_STEPS``.
+- dateutil searches until year 9999 for a rule whose filters never match
+  (``FREQ=MINUTELY;BYMONTH=2;BYMONTHDAY=30`` takes seconds). Each rule is
+  first probed from the equivalent year of the last 400-year Gregorian cycle,
+  which has the same weekdays and leap years, so that search is short. Weekly
+  and finer rules with day filters get a yearly probe over those filters
+  before that, since stepping them through 400 years is itself slow.
+
+Results are cached per UID and content fingerprint, so re-extracting the same
+invite does not expand it again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime, time, timedelta, tzinfo
+from typing import Any
+
+from dateutil.rrule import rruleset, rrulestr
+
+from app.services.metrics import metrics
+
+MAX_RULE_STEPS = 10_000
+DEFAULT_MAX_ENTRIES = 1024
+# Step of each frequency in wall-clock seconds; coarser ones vary in length.
+FIXED_PERIOD_S = {
+    "SECONDLY": 1,
+    "MINUTELY": 60,
+    "HOURLY": 3600,
+    "DAILY": 86400,
+    "WEEKLY": 7 * 86400,
+}
+BY_PARTS = (
+    "BYSECOND",
+    "BYMINUTE",
+    "BYHOUR",
+    "BYDAY",
+    "BYMONTHDAY",
+    "BYYEARDAY",
+    "BYWEEKNO",
+    "BYMONTH",
+    "BYSETPOS",
+)
+# Parts that select days; a YEARLY rule with just these matches the same days.
+DATE_PARTS = ("BYMONTH", "BYWEEKNO", "BYYEARDAY", "BYMONTHDAY", "BYDAY")
+# 400 Gregorian years are exactly 20871 weeks.
+PROBE_BASE_YEAR = 9600
+
+Interval = tuple[datetime, datetime]
+
+
+@dataclass(frozen=True)
+class Occurrences:
+    """Occurrences of an event inside a window, in UTC and start order."""
+
+    intervals: tuple[Interval, ...]
+    # More occurrences exist than were returned (cap or step budget reached).
+    truncated: bool = False
+
+
+def is_recurring(component: Any) -> bool:
+    return bool(component.get("rrule") or component.get("rdate"))
+
+
+def expand_event(
+    component: Any,
+    window_start: datetime,
+    window_end: datetime,
+    default_duration: timedelta,
+    max_occurrences: int,
+    exclude: frozenset[str] = frozenset(),
+) -> Occurrences:
+    """Occurrences of a VEVENT overlapping ``[window_start, window_end)``.
+
+    ``exclude`` holds UTC isoformat start times of instances overridden by
+    separate RECURRENCE-ID components.
+    """
+    key = (
+        str(component.get("uid") or ""),
+        hashlib.sha256(component.to_ical()).hexdigest(),
+        window_start,
+        window_end,
+        max_occurrences,
+        exclude,
+    )
+    cached = recurrence_cache.get(key)
+    if cached is not None:
+        return cached
+    occurrences = _expand(
+        component, window_start, window_end, default_duration, max_occurrences
+    )
+    if exclude:
+        occurrences = Occurrences(
+            intervals=tuple(
+                interval
+                for interval in occurrences.intervals
+                if interval[0].isoformat() not in exclude
+            ),
+            truncated=occurrences.truncated,
+        )
+    recurrence_cache.put(key, occurrences)
+    return occurrences
+
+
+class RecurrenceCache:
+    """Small LRU of expansions keyed by UID, content hash and window."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, Occurrences] = OrderedDict()
+
+    def get(self, key: tuple) -> Occurrences | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        metrics.inc(
+            "recurrence_cache_total", outcome="miss" if value is None else "hit"
+        )
+        return value
+
+    def put(self, key: tuple, value: Occurrences) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+recurrence_cache = RecurrenceCache()
+
+
+def _expand(
+    component: Any,
+    window_start: datetime,
+    window_end: datetime,
+    default_duration: timedelta,
+    max_occurrences: int,
+) -> Occurrences:
+    dtstart = component.get("dtstart").dt
+    zone = _zone(dtstart)
+    start = _wall(dtstart, zone)
+    duration = _duration(component, dtstart, default_duration)
+    lower = _wall(window_start, zone)
+    upper = _wall(window_end, zone)
+
+    rules = rruleset()
+    # DTSTART is always the first instance, whether or not the rule matches it.
+    rules.rdate(start)
+    durations: dict[datetime, timedelta] = {}
+    for recur in _as_list(component.get("rrule")):
+        # Start early enough to catch an occurrence already running at lower.
+        rule = _bounded_rule(recur, start, lower - duration, zone)
+        if rule is not None:
+            rules.rrule(rule)
+    for value in _dates(component.get("rdate")):
+        if isinstance(value, tuple):
+            # RDATE periods carry their own end or duration.
+            period_start = _wall(value[0], zone)
+            end = value[1]
+            durations[period_start] = (
+                end if isinstance(end, timedelta) else _wall(end, zone) - period_start
+            )
+            rules.rdate(period_start)
+        else:
+            rules.rdate(_wall(value, zone))
+    for value in _dates(component.get("exdate")):
+        rules.exdate(_wall(value, zone))
+
+    intervals: list[Interval] = []
+    truncated = False
+    for steps, occurrence in enumerate(rules):
+        if occurrence >= upper:
+            break
+        if steps >= MAX_RULE_STEPS or len(intervals) >= max_occurrences:
+            truncated = True
+            break
+        length = durations.get(occurrence, duration)
+        if occurrence + length <= lower:
+            continue
+        intervals.append((_aware(occurrence, zone), _aware(occurrence + length, zone)))
+    return Occurrences(intervals=tuple(intervals), truncated=truncated)
+
+
+def _bounded_rule(recur: Any, start: datetime, lower: datetime, zone: tzinfo):
+    """A dateutil rule for ``recur``, rebased to just before ``lower`` if possible.
+
+    Returns None for rules that are invalid or can never match.
+    """
+    parts = {name.upper(): values for name, values in recur.items()}
+    freq = str(parts["FREQ"][0]).upper()
+    count = int(parts["COUNT"][0]) if parts.get("COUNT") else None
+    until = _wall(parts["UNTIL"][0], zone) if parts.get("UNTIL") else None
+    if until is not None and not isinstance(parts["UNTIL"][0], datetime):
+        until = datetime.combine(until.date(), time.max)
+    # COUNT and UNTIL are applied after the probe, which must not be cut short.
+    text = type(recur)(
+        {
+            name: values
+            for name, values in parts.items()
+            if name not in {"COUNT", "UNTIL"}
+        }
+    ).to_ical()
+    try:
+        rule = rrulestr(text.decode(), dtstart=start)
+        if freq in FIXED_PERIOD_S and any(parts.get(name) for name in DATE_PARTS):
+            # Weekly and finer rules step through every period, so rule out
+            # days that can never match with a much cheaper yearly probe first.
+            days = type(recur)({"FREQ": ["YEARLY"]})
+            for name in DATE_PARTS:
+                if parts.get(name):
+                    days[name] = parts[name]
+            if parts.get("BYDAY"):
+                days["BYDAY"] = _weekdays(parts["BYDAY"])
+            if not _can_match(rrulestr(days.to_ical().decode(), dtstart=start), start):
+                return None
+        if not _can_match(rule, start):
+            return None
+    except (ValueError, OverflowError):
+        return None
+
+    period_s = FIXED_PERIOD_S.get(freq, 0) * int(parts.get("INTERVAL", [1])[0])
+    has_by_parts = any(parts.get(name) for name in BY_PARTS)
+    if period_s and lower > start and (count is None or not has_by_parts):
+        # Whole periods keep the rule's phase; without BY parts each period is
+        # exactly one occurrence, so COUNT can be reduced to match.
+        skipped = int((lower - start).total_seconds() // period_s)
+        if count is not None:
+            if skipped >= count:
+                return None
+            count -= skipped
+        start += timedelta(seconds=skipped * period_s)
+    return rule.replace(dtstart=start, count=count, until=until)
+
+
+def _can_match(rule, start: datetime) -> bool:
+    """Whether ``rule`` has any occurrence within 400 years of ``start``."""
+    probe_year = PROBE_BASE_YEAR + start.year % 400
+    try:
+        probe = rule.replace(dtstart=start.replace(year=probe_year))
+    except ValueError:
+        return False
+    return next(iter(probe), None) is not None
+
+
+def _weekdays(values: list) -> list:
+    # Ordinals such as "2MO" only mean something for MONTHLY and YEARLY rules.
+    return [str(value).lstrip("+-0123456789") for value in values]
+
+
+def _as_list(value: Any) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _dates(value: Any) -> list:
+    return [item.dt for entry in _as_list(value) for item in entry.dts]
+
+
+def _duration(component: Any, dtstart: Any, default: timedelta) -> timedelta:
+    dtend = component.get("dtend")
+    if dtend is not None:
+        return _wall(dtend.dt, _zone(dtstart)) - _wall(dtstart, _zone(dtstart))
+    duration = component.get("duration")
+    if duration is not None:
+        return duration.dt
+    if not isinstance(dtstart, datetime):
+        return timedelta(days=1)
+    return default
+
+
+def _zone(value: Any) -> tzinfo:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.tzinfo
+    return UTC
+
+
+def _wall(value: Any, zone: tzinfo) -> datetime:
+    """``value`` as naive wall-clock time in ``zone``."""
+    if not isinstance(value, datetime):
+        return datetime.combine(value, time(0))
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(zone).replace(tzinfo=None)
+
+
+def _aware(value: datetime, zone: tzinfo) -> datetime:
+    """Attach ``zone`` to a wall-clock time and convert it to UTC."""
+    localize = getattr(zone, "localize", None)
+    if localize is not None:
+        # pytz zones need localize() to pick the offset in effect that day.
+        return localize(value).astimezone(UTC)
+    return value.replace(tzinfo=zone).astimezone(UTC)
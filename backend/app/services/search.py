@@ -0,0 +1,291 @@
+"""Full-text search over emails, triage summaries and attachment text."""
+
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import (
+    func,
+    literal_column,
+    select,
+    text,
+    union_all,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from app.models import Attachment, Email, EmailTriage
+from app.services.email_listing import load_email_rows
+
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+# to_tsvector rejects documents whose vector exceeds 1 MB; index a prefix.
+MAX_INDEXED_CHARS = 200_000
+MAX_OFFSET = 1000
+
+# SQLite FTS5 rows are keyed by rowid = source * ROWID_STRIDE + source row id.
+ROWID_STRIDE = 1 << 40
+SOURCE_EMAIL = 1
+SOURCE_SUMMARY = 2
+SOURCE_ATTACHMENT = 3
+SOURCE_NAMES = {
+    SOURCE_EMAIL: "email",
+    SOURCE_SUMMARY: "summary",
+    SOURCE_ATTACHMENT: "attachment",
+}
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def index_email(db: Session, email: Email) -> None:
+    """Refresh the search entry for an email's subject and body."""
+    if _is_sqlite(db):
+        _fts_replace(
+            db,
+            SOURCE_EMAIL,
+            email.id,
+            email.user_id,
+            email.id,
+            subject=email.subject,
+            body=email.clean_body_text,
+        )
+        return
+    db.execute(
+        update(Email)
+        .where(Email.id == email.id)
+        .values(search_tsv=email_vector(Email.subject, Email.clean_body_text))
+    )
+
+
+def index_triage(db: Session, triage: EmailTriage) -> None:
+    """Refresh the search entry for a triage summary."""
+    db.flush()
+    if _is_sqlite(db):
+        _fts_replace(
+            db,
+            SOURCE_SUMMARY,
+            triage.id,
+            triage.user_id,
+            triage.email_id,
+            body=triage.summary,
+        )
+        return
+    db.execute(
+        update(EmailTriage)
+        .where(EmailTriage.id == triage.id)
+        .values(summary_tsv=text_vector(EmailTriage.summary, "B"))
+    )
+
+
+def index_attachment(db: Session, attachment: Attachment) -> None:
+    """Refresh the search entry for an attachment's extracted text."""
+    db.flush()
+    if _is_sqlite(db):
+        _fts_replace(
+            db,
+            SOURCE_ATTACHMENT,
+            attachment.id,
+            attachment.user_id,
+            attachment.email_id,
+            body=attachment.extracted_text,
+        )
+        return
+    db.execute(
+        update(Attachment)
+        .where(Attachment.id == attachment.id)
+        .values(text_tsv=text_vector(Attachment.extracted_text, "C"))
+    )
+
+
+def rebuild_search_index(db: Session) -> None:
+    """Recompute every search entry (backfills and local SQLite databases)."""
+    if _is_sqlite(db):
+        db.execute(text("DELETE FROM search_fts"))
+        db.execute(
+            text(
+                "INSERT INTO search_fts(rowid, subject, body, user_id, email_id) "
+                "SELECT :email * :stride + id, subject, clean_body_text, user_id, id "
+                "FROM emails"
+            ),
+            {"email": SOURCE_EMAIL, "stride": ROWID_STRIDE},
+        )
+        db.execute(
+            text(
+                "INSERT INTO search_fts(rowid, body, user_id, email_id) "
+                "SELECT :summary * :stride + id, summary, user_id, email_id "
+                "FROM email_triage WHERE summary IS NOT NULL"
+            ),
+            {"summary": SOURCE_SUMMARY, "stride": ROWID_STRIDE},
+        )
+        db.execute(
+            text(
+                "INSERT INTO search_fts(rowid, body, user_id, email_id) "
+                "SELECT :attachment * :stride + id, extracted_text, user_id, email_id "
+                "FROM attachments WHERE extracted_text IS NOT NULL"
+            ),
+            {"attachment": SOURCE_ATTACHMENT, "stride": ROWID_STRIDE},
+        )
+    else:
+        # Keep updated_at as is: a reindex is not a content change.
+        db.execute(
+            update(Email).values(
+                search_tsv=email_vector(Email.subject, Email.clean_body_text),
+                updated_at=Email.updated_at,
+            )
+        )
+        db.execute(
+            update(EmailTriage).values(
+                summary_tsv=text_vector(EmailTriage.summary, "B"),
+                updated_at=EmailTriage.updated_at,
+            )
+        )
+        db.execute(
+            update(Attachment).values(
+                text_tsv=text_vector(Attachment.extracted_text, "C"),
+                updated_at=Attachment.updated_at,
+            )
+        )
+    db.commit()
+
+
+def search_emails(
+    db: Session, user_id: int, query: str, limit: int, offset: int = 0
+) -> list[dict]:
+    """Return the user's emails matching ``query``, best match first.
+
+    Each hit carries the listing fields plus ``rank`` (higher is better) and
+    ``matched_in`` naming the sources that matched: email, summary, attachment.
+    """
+    if _is_sqlite(db):
+        hits = _search_sqlite(db, user_id, query, limit, offset)
+    else:
+        hits = _search_postgres(db, user_id, query, limit, offset)
+    rows = load_email_rows(db, user_id, [email_id for email_id, _, _ in hits])
+    results = []
+    for email_id, rank, sources in hits:
+        row = rows.get(email_id)
+        if row is None:
+            continue
+        results.append(
+            {**row, "rank": rank, "matched_in": sorted(set(sources), key=_source_order)}
+        )
+    return results
+
+
+def email_vector(subject, body):
+    return text_vector(subject, "A").op("||")(text_vector(body, "B"))
+
+
+def text_vector(column, weight: str):
+    return func.setweight(
+        func.to_tsvector(
+            SEARCH_CONFIG, func.left(func.coalesce(column, ""), MAX_INDEXED_CHARS)
+        ),
+        literal_column(f"'{weight}'"),
+    )
+
+
+def _search_postgres(
+    db: Session, user_id: int, query: str, limit: int, offset: int
+) -> list[tuple[int, float, list[str]]]:
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    sources = [
+        (Email.id, Email.search_tsv, Email.user_id, "email"),
+        (EmailTriage.email_id, EmailTriage.summary_tsv, EmailTriage.user_id, "summary"),
+        (Attachment.email_id, Attachment.text_tsv, Attachment.user_id, "attachment"),
+    ]
+    matches = union_all(
+        *[
+            select(
+                email_id.label("email_id"),
+                func.ts_rank_cd(vector, tsquery).label("rank"),
+                literal_column(f"'{name}'").label("source"),
+            ).where(owner == user_id, vector.op("@@")(tsquery))
+            for email_id, vector, owner, name in sources
+        ]
+    ).subquery()
+    rank = func.max(matches.c.rank)
+    rows = db.execute(
+        select(
+            matches.c.email_id,
+            rank,
+            func.array_agg(matches.c.source.distinct()),
+        )
+        .group_by(matches.c.email_id)
+        .order_by(rank.desc(), matches.c.email_id.desc())
+        .limit(limit)
+        .offset(min(offset, MAX_OFFSET))
+    ).all()
+    return [(email_id, float(score), list(names)) for email_id, score, names in rows]
+
+
+def _search_sqlite(
+    db: Session, user_id: int, query: str, limit: int, offset: int
+) -> list[tuple[int, float, list[str]]]:
+    match = fts_query(query)
+    if not match:
+        return []
+    # bm25() is not allowed inside an aggregate, but the rank column it backs is.
+    rows = db.execute(
+        text(
+            "SELECT email_id, -min(rank) AS score, group_concat(rowid / :stride) "
+            "FROM search_fts WHERE search_fts MATCH :match "
+            "AND rank MATCH 'bm25(2.0, 1.0)' AND user_id = :user_id "
+            "GROUP BY email_id ORDER BY score DESC, email_id DESC "
+            "LIMIT :limit OFFSET :offset"
+        ),
+        {
+            "stride": ROWID_STRIDE,
+            "match": match,
+            "user_id": user_id,
+            "limit": limit,
+            "offset": min(offset, MAX_OFFSET),
+        },
+    ).all()
+    return [
+        (
+            int(email_id),
+            float(score),
+            [SOURCE_NAMES[int(source)] for source in str(codes).split(",")],
+        )
+        for email_id, score, codes in rows
+    ]
+
+
+def fts_query(query: str) -> str:
+    """Quote each word so user input cannot inject FTS5 query syntax."""
+    return " ".join(f'"{token}"' for token in TOKEN_RE.findall(query))
+
+
+def _fts_replace(
+    db: Session,
+    source: int,
+    source_id: int,
+    user_id: int,
+    email_id: int,
+    subject: str | None = None,
+    body: str | None = None,
+) -> None:
+    rowid = source * ROWID_STRIDE + source_id
+    db.execute(text("DELETE FROM search_fts WHERE rowid = :rowid"), {"rowid": rowid})
+    if not subject and not body:
+        return
+    db.execute(
+        text(
+            "INSERT INTO search_fts(rowid, subject, body, user_id, email_id) "
+            "VALUES (:rowid, :subject, :body, :user_id, :email_id)"
+        ),
+        {
+            "rowid": rowid,
+            "subject": subject,
+            "body": (body or "")[:MAX_INDEXED_CHARS],
+            "user_id": user_id,
+            "email_id": email_id,
+        },
+    )
+
+
+def _source_order(name: str) -> int:
+    return list(SOURCE_NAMES.values()).index(name)
+
+
+def _is_sqlite(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
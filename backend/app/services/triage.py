@@ -9,11 +9,13 @@ from sqlalchemy.orm import Session
 
 from app.config import Settings
 from app.models import Email, EmailTriage, UserPreferences
+from app.services.digest_store import upsert_digest_entry
 from app.services.llm_client import LLMClient
 from app.services.llm_schemas import (
     EMAIL_TRIAGE_RESULT_SCHEMA,
     EMAIL_TRIAGE_SCHEMA_VERSION,
 )
+from app.services.search import index_triage
 
 PROMPT_VERSION = "v1"
 
@@ -136,5 +138,7 @@ def _store_triage(
     triage.model_id = model_id
     triage.prompt_version = PROMPT_VERSION
     triage.schema_version = EMAIL_TRIAGE_SCHEMA_VERSION
+    index_triage(db, triage)
+    upsert_digest_entry(db, email, triage)
     db.commit()
     return triage
@@ -0,0 +1,70 @@
+"""Start-up warm-up for dependencies that initialise lazily.
+
+dateparser loads locale data and compiles its regex tables on the first call,
+which would otherwise land on whichever request or sync job parses a date
+first. Warming runs that call once per process, restricted to the configured
+languages so only their locale data is loaded. It runs on a background thread
+so the import stays off the boot path and the process serves immediately.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import UTC, datetime
+
+from app.config import Settings
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEXT = "Can we meet on March 5 at 3pm, or tomorrow at 10:30?"
+
+
+def warm_up_dateparser(settings: Settings) -> float:
+    """Import dateparser, run one search and one parse; return elapsed seconds."""
+    started = time.perf_counter()
+    import dateparser
+    from dateparser.search import search_dates
+
+    languages = settings.dateparser_languages
+    search_dates(
+        WARMUP_TEXT,
+        languages=languages,
+        settings={
+            "PREFER_DATES_FROM": "future",
+            "RETURN_AS_TIMEZONE_AWARE": True,
+            "TIMEZONE": "UTC",
+            "TO_TIMEZONE": "UTC",
+            "RELATIVE_BASE": datetime(2025, 1, 1, tzinfo=UTC),
+        },
+    )
+    dateparser.parse("2025-03-05T15:00:00+00:00", languages=languages)
+    elapsed = time.perf_counter() - started
+    metrics.set_gauge("startup_warmup_seconds", elapsed, component="dateparser")
+    logger.info(
+        "dateparser warmed",
+        extra={"languages": languages, "elapsed_s": round(elapsed, 3)},
+    )
+    return elapsed
+
+
+def warm_up(settings: Settings) -> dict[str, float]:
+    """Warm every lazily initialised dependency; return seconds per component."""
+    return {"dateparser": warm_up_dateparser(settings)}
+
+
+def start_warm_up(settings: Settings) -> threading.Thread:
+    """Run ``warm_up`` on a daemon thread and return the thread."""
+
+    def run() -> None:
+        try:
+            warm_up(settings)
+        except Exception:
+            # A failed warm-up only means the first real call pays the cost.
+            logger.exception("Warm-up failed")
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,92 @@
+"""Benchmark date search in calendar text extraction.
+
+Run from ``backend/``::
+
+    python -m benchmarks.calendar_extract --messages 200
+
+Times ``calendar_extract._search_dates`` (regex pre-scan, then dateparser on
+small English windows) against ``search_dates`` over the whole text with
+language autodetection, as the extractor previously did, on synthetic emails
+where a fraction mention a meeting time.
+Parity counts messages whose date matches are identical.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import UTC, datetime
+
+from dateparser.search import search_dates
+
+from app.services import calendar_extract
+from benchmarks.reply_detection import synthetic_message
+
+PHRASES = [
+    "Can we meet on March 5 at 3pm?",
+    "Are you free tomorrow to chat?",
+    "Let's sync next week about the roadmap.",
+    "How about Tuesday at 10:30 for the review?",
+    "The deadline is 2025-04-15, please confirm.",
+]
+
+
+def corpus(rng: random.Random, messages: int, dated_ratio: float) -> list[str]:
+    texts = []
+    for _ in range(messages):
+        body = synthetic_message(rng)
+        if rng.random() < dated_ratio:
+            lines = body.splitlines()
+            lines.insert(rng.randrange(len(lines) + 1), rng.choice(PHRASES))
+            body = "\n".join(lines)
+        texts.append(body)
+    return texts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--dated-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = corpus(rng, args.messages, args.dated_ratio)
+    total_kb = sum(len(text) for text in texts) / 1024
+    settings_map = {
+        "PREFER_DATES_FROM": "future",
+        "RETURN_AS_TIMEZONE_AWARE": True,
+        "TIMEZONE": "UTC",
+        "TO_TIMEZONE": "UTC",
+        "RELATIVE_BASE": datetime(2025, 1, 1, tzinfo=UTC),
+    }
+    # Warm dateparser's language data so neither side pays for loading it.
+    search_dates("Meet on March 5 at 3pm", settings=settings_map)
+
+    results = {}
+    for label, func in [
+        (
+            "prefiltered",
+            lambda text: calendar_extract._search_dates(text, settings_map, ["en"]),
+        ),
+        ("whole text", lambda text: search_dates(text, settings=settings_map) or []),
+    ]:
+        started = time.perf_counter()
+        results[label] = [func(text) for text in texts]
+        elapsed = time.perf_counter() - started
+        print(
+            f"{label:>12}: {elapsed * 1000:8.1f} ms  "
+            f"{elapsed * 1000 / total_kb:6.2f} ms/KB"
+        )
+    skipped = sum(not calendar_extract.find_date_windows(text) for text in texts)
+    matches = sum(
+        a == b
+        for a, b in zip(results["prefiltered"], results["whole text"], strict=True)
+    )
+    print(f"messages: {len(texts)} ({total_kb:.0f} KB), skipped by pre-scan: {skipped}")
+    print(f"parity vs whole text: {matches}/{len(texts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Compare stored and transferred digest bytes for full and columnar content.
+
+Run from ``backend/``::
+
+    python -m benchmarks.digest_size --emails 2000
+
+The script seeds one user's day of triaged mail into a temporary SQLite file,
+builds the open digest, and reports the stored ``content_json`` size next to
+the previous layout (full entries in every section). It also reports the
+size and gzip size of one hydrated ``/api/digests/latest`` page, and how
+long hydration takes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import random
+import tempfile
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Email, EmailTriage, User
+from app.services.digest_store import hydrate_digest, open_digest
+from benchmarks.email_listing import _percentiles, _time
+
+LABELS = ("HIGH", "MEDIUM", "LOW", "LOW", "IGNORE")
+
+
+def seed(session, emails: int, rng: random.Random) -> tuple[int, datetime]:
+    user = User(email="bench@example.com", google_sub="bench-sub")
+    session.add(user)
+    session.flush()
+    start = datetime(2099, 1, 1, tzinfo=UTC)
+    rows = [
+        {
+            "user_id": user.id,
+            "gmail_message_id": f"msg-{index}",
+            "internal_date_ts": start + timedelta(seconds=index * 40),
+            "subject": f"Re: quarterly planning thread {index}",
+            "snippet": "Following up on the notes from yesterday's sync " * 3,
+            "from_email": f"sender{index % 50}@example.com",
+            "label_ids": ["INBOX"],
+            "in_inbox": True,
+        }
+        for index in range(emails)
+    ]
+    ids = session.execute(insert(Email).returning(Email.id), rows).scalars().all()
+    session.execute(
+        insert(EmailTriage),
+        [
+            {
+                "user_id": user.id,
+                "email_id": email_id,
+                "importance_label": rng.choice(LABELS),
+                "needs_response": rng.random() < 0.1,
+                "reasoning": {
+                    "why_important": "Mentions a deadline for the launch review.",
+                    "summary_bullets": [
+                        "Asks for updated numbers before Friday.",
+                        "Links the draft plan and the budget sheet.",
+                    ],
+                },
+            }
+            for email_id in ids
+        ],
+    )
+    session.commit()
+    return user.id, start
+
+
+def _kib(value: int) -> str:
+    return f"{value / 1024:8.1f} KiB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix=".sqlite3")
+    os.close(handle)
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    try:
+        with Session() as session:
+            user_id, start = seed(session, args.emails, random.Random(7))
+            digest = open_digest(session, user_id, since_ts=start)
+            session.commit()
+
+            columnar = json.dumps(digest.content_json).encode()
+            full = json.dumps(hydrate_digest(session, digest)).encode()
+            page = json.dumps(hydrate_digest(session, digest, limit=args.limit))
+            page = page.encode()
+            print(f"{args.emails} emails")
+            print(f"stored, full entries:   {_kib(len(full))}")
+            print(f"stored, columnar:       {_kib(len(columnar))}")
+            print(
+                f"response, all entries:  {_kib(len(full))} "
+                f"(gzip {_kib(len(gzip.compress(full)))})"
+            )
+            print(
+                f"response, {args.limit}/section: {_kib(len(page))} "
+                f"(gzip {_kib(len(gzip.compress(page)))})"
+            )
+
+            def run():
+                hydrate_digest(session, digest, limit=args.limit)
+
+            print(f"hydrate one page: {_percentiles(_time(run, args.repeat))}")
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Compare keyset and OFFSET pagination latency for GET /api/emails.
+
+Run from ``backend/``::
+
+    python -m benchmarks.email_listing --emails 20000 --url postgresql+psycopg://...
+
+Without ``--url`` a temporary SQLite file is used. The script seeds one user,
+then reports p50/p95 latency for page 1 and page 50 using the keyset listing
+service and the previous OFFSET query (which also lazy-loaded triage per row).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Email, EmailTriage, User
+from app.services.email_listing import decode_cursor, list_email_page
+
+
+def seed(session, emails: int) -> int:
+    user = User(email="bench@example.com", google_sub="bench-sub")
+    session.add(user)
+    session.flush()
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    batch = 5000
+    for offset in range(0, emails, batch):
+        rows = [
+            {
+                "user_id": user.id,
+                "gmail_message_id": f"msg-{index}",
+                "internal_date_ts": start + timedelta(minutes=index),
+                "subject": f"Subject {index}",
+                "snippet": "Lorem ipsum " * 8,
+                "from_email": "sender@example.com",
+                "label_ids": ["INBOX"] if index % 3 else ["CATEGORY_UPDATES"],
+                "in_inbox": bool(index % 3),
+                "clean_body_text": "Body text " * 200,
+            }
+            for index in range(offset, min(offset + batch, emails))
+        ]
+        ids = session.execute(insert(Email).returning(Email.id), rows).scalars().all()
+        session.execute(
+            insert(EmailTriage),
+            [
+                {
+                    "user_id": user.id,
+                    "email_id": email_id,
+                    "importance_label": "MEDIUM",
+                    "needs_response": False,
+                    "reasoning": {"why_important": "Because"},
+                }
+                for email_id in ids
+            ],
+        )
+    session.commit()
+    return user.id
+
+
+def legacy_page(session, user_id: int, limit: int, offset: int) -> list:
+    query = (
+        select(Email)
+        .where(Email.user_id == user_id)
+        .order_by(Email.internal_date_ts.desc().nullslast())
+        .limit(limit)
+        .offset(offset)
+    )
+    rows = []
+    for email in session.execute(query).scalars().all():
+        triage = email.triage
+        rows.append((email.id, triage.importance_label if triage else None))
+    return rows
+
+
+def _percentiles(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return f"p50 {statistics.median(ordered) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms"
+
+
+def _time(func, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--emails", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--filter", default="all")
+    args = parser.parse_args()
+
+    path = None
+    url = args.url
+    if url is None:
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        url = f"sqlite+pysqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    try:
+        with Session() as session:
+            user_id = seed(session, args.emails)
+
+        with Session() as session:
+            cursor = None
+            for _ in range(args.page - 1):
+                page = list_email_page(
+                    session, user_id, args.filter, args.limit, cursor
+                )
+                cursor = decode_cursor(page.next_cursor)
+            deep_offset = (args.page - 1) * args.limit
+
+            def run(func):
+                def call():
+                    func()
+                    session.expunge_all()
+
+                return _time(call, args.repeat)
+
+            results = {
+                "keyset page 1": run(
+                    lambda: list_email_page(session, user_id, args.filter, args.limit)
+                ),
+                f"keyset page {args.page}": run(
+                    lambda: list_email_page(
+                        session, user_id, args.filter, args.limit, cursor
+                    )
+                ),
+                "offset page 1": run(
+                    lambda: legacy_page(session, user_id, args.limit, 0)
+                ),
+                f"offset page {args.page}": run(
+                    lambda: legacy_page(session, user_id, args.limit, deep_offset)
+                ),
+            }
+        print(f"{engine.dialect.name}: {args.emails} emails, limit {args.limit}")
+        for label, samples in results.items():
+            print(f"{label:>18}: {_percentiles(samples)}")
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if path:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark the streaming HTML-to-text path against BeautifulSoup.
+
+Run from ``backend/``::
+
+    python -m benchmarks.html_to_text --messages 200 --repeat 5
+
+The corpus is synthetic marketing mail (layout tables, inline styles, hidden
+preheaders, style and script blocks), a few malformed documents (stray quotes
+in unquoted attributes, markup inside quoted values, CDATA) and the HTML parser
+test fixtures. Parity
+is checked against the BeautifulSoup fallback for every document, and against
+the previous ``get_text("\\n")`` conversion for the fixtures' cleaned bodies.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import random
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.services import email_parser
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+WORDS = (
+    "sale offer members exclusive today only free shipping limited new arrivals "
+    "summer collection discover more update preferences unsubscribe view online"
+).split()
+
+# Markup the streaming tokenizer must hand to BeautifulSoup or resolve the same
+# way it does.
+MALFORMED_HTML = [
+    "<p class=x'y>A</p><p>B</p><p>it's</p>",
+    "<table><tr><td width=100'>Price list</td></tr></table><p>Don't miss it</p>",
+    "<td width='100>Price list</td><p>Don't miss it</p>",
+    "<p title='a<b'>T</p><p>Tail</p>",
+    "<p>a<![CDATA[x &amp; <b>y]]>z</p>",
+    "<p>Intro</p><p class=x",
+]
+
+
+def marketing_html(rng: random.Random, rows: int) -> str:
+    def sentence(count: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+    cells = []
+    for _ in range(rows):
+        cells.append(
+            "<tr>"
+            '<td style="padding:12px;font-family:Arial,sans-serif;color:#333">'
+            f'<a href="https://example.com/{rng.randint(1, 10**6)}"'
+            f' style="color:#0a66c2"><b>{sentence(4)}</b></a></td>'
+            '<td class="content" align="left">'
+            f"<p style='margin:0'>{sentence(18)}&nbsp;&amp;&nbsp;{sentence(6)}</p>"
+            '<img src="https://example.com/pixel.gif" width="1" height="1" alt="">'
+            "</td></tr>"
+        )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        "<title>Newsletter</title>"
+        "<style>.content{font-size:14px}@media(max-width:600px){td{display:block}}"
+        "</style></head><body>"
+        '<div style="display:none;max-height:0;overflow:hidden;mso-hide:all">'
+        f"{sentence(12)}{'&zwnj;&nbsp;' * 40}</div>"
+        '<table role="presentation" width="100%" cellpadding="0" cellspacing="0">'
+        + "".join(cells)
+        + "</table>"
+        f"<p>{sentence(10)}<br>{sentence(8)}</p>"
+        "<script>window.dataLayer=window.dataLayer||[];</script>"
+        "</body></html>"
+    )
+
+
+def legacy_html_to_text(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    return soup.get_text("\n")
+
+
+def fixture_html() -> list[str]:
+    documents = []
+    for path in sorted(FIXTURES_DIR.glob("*.json")):
+        message = json.loads(path.read_text())
+        for part in email_parser.walk_parts(message.get("payload", {})):
+            data = (part.get("body") or {}).get("data")
+            if part.get("mimeType") == "text/html" and data:
+                padding = "=" * (-len(data) % 4)
+                documents.append(
+                    base64.urlsafe_b64decode(data + padding).decode("utf-8")
+                )
+    return documents
+
+
+def _time(func, corpus: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for html in corpus:
+            func(html)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fixtures = fixture_html()
+    corpus = fixtures + MALFORMED_HTML
+    corpus += [marketing_html(rng, args.rows) for _ in range(args.messages)]
+
+    mismatches = sum(
+        email_parser._html_to_text(html) != email_parser._html_to_text_soup(html)
+        for html in corpus
+    )
+    fixture_mismatches = sum(
+        email_parser._clean_text(email_parser._html_to_text(html))
+        != email_parser._clean_text(legacy_html_to_text(html))
+        for html in fixtures
+    )
+
+    total_mb = sum(len(html.encode("utf-8")) for html in corpus) / 1_000_000
+    streaming = _time(email_parser._html_to_text, corpus, args.repeat)
+    soup = _time(email_parser._html_to_text_soup, corpus, args.repeat)
+    legacy = _time(legacy_html_to_text, corpus, args.repeat)
+
+    print(f"documents: {len(corpus)} ({total_mb:.2f} MB)")
+    for label, elapsed in [
+        ("streaming", streaming),
+        ("soup fallback", soup),
+        ("legacy get_text", legacy),
+    ]:
+        print(
+            f"{label:>16}: {elapsed * 1000:8.1f} ms  {total_mb / elapsed:6.2f} MB/s"
+            f"  ({legacy / elapsed:4.1f}x vs legacy)"
+        )
+    print(f"parity vs soup fallback: {len(corpus) - mismatches}/{len(corpus)}")
+    print(
+        f"parity vs legacy on fixtures: {len(fixtures) - fixture_mismatches}"
+        f"/{len(fixtures)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Show the query plan and latency of the inbox listing query.
+
+Run from ``backend/`` against Postgres for representative plans::
+
+    python -m benchmarks.inbox_filter --url postgresql+psycopg://... --emails 100000
+
+The script seeds one user with ``--emails`` messages (two thirds in the inbox),
+prints the plan for the first inbox page using the maintained ``in_inbox``
+flag and, on Postgres, for the previous ``label_ids @> '["INBOX"]'`` filter,
+then times both. Without ``--url`` a temporary SQLite file is used and only
+the new query is shown (SQLite has no JSONB containment operator).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Email
+from app.services.email_listing import _base_query
+from benchmarks.email_listing import _percentiles, _time, seed
+
+
+def _page_query(user_id: int, limit: int, legacy: bool):
+    query = _base_query(user_id, "all" if legacy else "inbox")
+    if legacy:
+        query = query.where(Email.label_ids.contains(["INBOX"]))
+    return (
+        query.where(Email.internal_date_ts.is_not(None))
+        .order_by(Email.internal_date_ts.desc(), Email.id.desc())
+        .limit(limit)
+    )
+
+
+def _explain(session, query) -> str:
+    dialect = session.bind.dialect
+    compiled = query.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN" if dialect.name == "sqlite" else "EXPLAIN ANALYZE"
+    rows = session.execute(text(f"{prefix} {compiled}")).all()
+    return "\n".join("  " + " ".join(str(value) for value in row) for row in rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--emails", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    path = None
+    url = args.url
+    if url is None:
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        url = f"sqlite+pysqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    try:
+        with Session() as session:
+            user_id = seed(session, args.emails)
+            if engine.dialect.name == "postgresql":
+                session.execute(text("ANALYZE emails"))
+                session.commit()
+
+        variants = {"in_inbox": False}
+        if engine.dialect.name == "postgresql":
+            variants["label_ids @>"] = True
+        with Session() as session:
+            for label, legacy in variants.items():
+                query = _page_query(user_id, args.limit, legacy)
+                print(f"--- {label} plan ---")
+                print(_explain(session, query))
+
+                def run(query=query):
+                    session.execute(query).scalars().unique().all()
+                    session.expunge_all()
+
+                print(f"{label}: {_percentiles(_time(run, args.repeat))}")
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if path:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
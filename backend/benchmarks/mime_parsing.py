@@ -0,0 +1,175 @@
+"""Measure per-message allocation and time of parse_message on multipart mail.
+
+Run from ``backend/``::
+
+    python -m benchmarks.mime_parsing --messages 200
+
+The corpus is the JSON message fixtures plus synthetic multipart/mixed messages
+(a multipart/alternative text+HTML body, an inline image carried as inline
+data, and a referenced PDF attachment). Peak traced memory per message is
+compared with the previous implementation, which listed every part and decoded
+all inline data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.services import email_parser
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def _encode(content: bytes) -> str:
+    return base64.urlsafe_b64encode(content).decode("ascii").rstrip("=")
+
+
+def synthetic_message(rng: random.Random, index: int) -> dict:
+    paragraphs = [
+        f"Paragraph {n} of the update for message {index}." for n in range(40)
+    ]
+    plain = "\n\n".join(paragraphs)
+    html = "<html><body>" + "".join(
+        f'<table><tr><td style="padding:8px"><p>{text}</p></td></tr></table>'
+        for text in paragraphs * 20
+    )
+    return {
+        "id": f"msg-{index}",
+        "internalDate": "1704067200000",
+        "payload": {
+            "mimeType": "multipart/mixed",
+            "headers": [
+                {"name": "From", "value": "Alice <alice@example.com>"},
+                {"name": "To", "value": "Bob <bob@example.com>"},
+                {"name": "Subject", "value": f"Update {index}"},
+            ],
+            "parts": [
+                {
+                    "mimeType": "multipart/related",
+                    "parts": [
+                        {
+                            "mimeType": "multipart/alternative",
+                            "parts": [
+                                {
+                                    "mimeType": "text/plain",
+                                    "body": {"data": _encode(plain.encode())},
+                                },
+                                {
+                                    "mimeType": "text/html",
+                                    "body": {"data": _encode(html.encode())},
+                                },
+                            ],
+                        },
+                        {
+                            "mimeType": "image/png",
+                            "filename": "",
+                            "body": {
+                                "data": _encode(
+                                    os.urandom(rng.randint(50_000, 200_000))
+                                )
+                            },
+                        },
+                    ],
+                },
+                {
+                    "mimeType": "application/pdf",
+                    "filename": "report.pdf",
+                    "body": {"attachmentId": f"att-{index}", "size": 48_000},
+                },
+            ],
+        },
+    }
+
+
+def legacy_body_and_attachments(message: dict) -> tuple[str, list]:
+    """The previous body/attachment extraction: list every part, decode all."""
+    parts = list(_legacy_walk(message.get("payload", {}) or {}))
+    plain_chunks = []
+    html_chunks = []
+    for part in parts:
+        data = (part.get("body", {}) or {}).get("data")
+        if not data:
+            continue
+        decoded = email_parser._decode_base64url(data)
+        if part.get("mimeType", "") == "text/plain":
+            plain_chunks.append(decoded)
+        elif part.get("mimeType", "") == "text/html":
+            html_chunks.append(decoded)
+    if plain_chunks:
+        body = "\n".join(plain_chunks)
+    elif html_chunks:
+        body = email_parser._html_to_text(html_chunks[0])
+    else:
+        body = ""
+    attachments = [
+        part
+        for part in parts
+        if part.get("filename") or (part.get("body") or {}).get("attachmentId")
+    ]
+    return email_parser._clean_text(body), attachments
+
+
+def _legacy_walk(payload: dict):
+    yield payload
+    for part in payload.get("parts", []) or []:
+        yield from _legacy_walk(part)
+
+
+def _measure(func, corpus: list[dict]) -> tuple[list[int], float]:
+    peaks = []
+    tracemalloc.start()
+    try:
+        for message in corpus:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            func(message)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+    started = time.perf_counter()
+    for message in corpus:
+        func(message)
+    return peaks, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [json.loads(path.read_text()) for path in FIXTURES_DIR.glob("*.json")]
+    corpus += [synthetic_message(rng, index) for index in range(args.messages)]
+
+    mismatches = sum(
+        email_parser.parse_message(message).clean_body_text
+        != legacy_body_and_attachments(message)[0]
+        for message in corpus
+    )
+    results = {
+        "parse_message": _measure(email_parser.parse_message, corpus),
+        "legacy body+attachments": _measure(legacy_body_and_attachments, corpus),
+    }
+
+    print(f"messages: {len(corpus)}")
+    for label, (peaks, elapsed) in results.items():
+        print(
+            f"{label:>24}: peak/msg mean {statistics.mean(peaks) / 1024:8.1f} KiB"
+            f"  max {max(peaks) / 1024:8.1f} KiB"
+            f"  time {elapsed * 1000 / len(corpus):6.2f} ms/msg"
+        )
+    print(f"body parity vs legacy: {len(corpus) - mismatches}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    main()
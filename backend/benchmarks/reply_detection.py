@@ -0,0 +1,124 @@
+"""Benchmark reply/signature detection throughput on a synthetic corpus.
+
+Run from ``backend/``::
+
+    python -m benchmarks.reply_detection --messages 5000 --repeat 3
+
+Compares ``email_parser._clean_text`` with the previous line-by-line
+implementation (reproduced below) and reports MB/s plus output parity on the
+English conventions the previous implementation understood.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from app.services import email_parser
+
+WORDS = (
+    "please review the attached proposal before our meeting next week and let "
+    "me know if the budget numbers look right to you we can also move the call"
+).split()
+SIGNOFFS = ["Thanks,", "Best regards,", "Cheers,", "Regards,", "Sincerely,"]
+HEADERS = [
+    "On Tue, Jan 2, 2024 at 10:00 AM Alex Doe <alex@example.com> wrote:",
+    "On 2 Jan 2024, at 10:00, Alex Doe <alex@example.com> wrote:",
+    "-----Original Message-----",
+]
+
+
+def synthetic_message(rng: random.Random) -> str:
+    def paragraph() -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+
+    lines = [f"Hi {rng.choice(['Sam', 'Jo', 'team'])},", ""]
+    for _ in range(rng.randint(2, 12)):
+        lines.append(paragraph())
+        if rng.random() < 0.2:
+            lines.append(f"> {paragraph()}")
+        lines.append("")
+    if rng.random() < 0.8:
+        lines += [rng.choice(SIGNOFFS), "Alex"]
+    if rng.random() < 0.7:
+        lines += ["", rng.choice(HEADERS)]
+        lines += [f"> {paragraph()}" for _ in range(rng.randint(3, 40))]
+    return "\n".join(lines)
+
+
+def legacy_clean_text(text: str) -> str:
+    stripped = _legacy_strip_reply_blocks(text)
+    stripped = _legacy_strip_signature(stripped)
+    return "\n".join(line.rstrip() for line in stripped.splitlines()).strip()
+
+
+def _legacy_strip_reply_blocks(text: str) -> str:
+    lines = text.splitlines()
+    output = []
+    for line in lines:
+        lower = line.strip().lower()
+        if lower.startswith("on ") and " wrote:" in lower:
+            break
+        if lower.startswith(">"):
+            continue
+        if "-----original message-----" in lower:
+            break
+        output.append(line)
+    return "\n".join(output)
+
+
+def _legacy_strip_signature(text: str) -> str:
+    signoffs = ["thanks", "thank you", "best", "regards", "sincerely", "cheers"]
+    lines = text.splitlines()
+    for idx, line in enumerate(lines):
+        lower = line.strip().lower()
+        if any(lower.startswith(signoff) for signoff in signoffs):
+            if len(lines) - idx <= 4:
+                return "\n".join(lines[:idx]).strip()
+    return text
+
+
+def _time(func, corpus: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [synthetic_message(rng) for _ in range(args.messages)]
+    total_mb = sum(len(text.encode("utf-8")) for text in corpus) / 1_000_000
+
+    matches = sum(
+        email_parser._clean_text(text) == legacy_clean_text(text) for text in corpus
+    )
+    compiled = _time(email_parser._clean_text, corpus, args.repeat)
+    layout_only = _time(email_parser.detect_reply_layout, corpus, args.repeat)
+    legacy = _time(legacy_clean_text, corpus, args.repeat)
+
+    print(f"messages: {len(corpus)} ({total_mb:.2f} MB)")
+    for label, elapsed in [
+        ("detect_reply_layout", layout_only),
+        ("_clean_text", compiled),
+        ("legacy", legacy),
+    ]:
+        print(
+            f"{label:>20}: {elapsed * 1000:8.1f} ms  {total_mb / elapsed:7.2f} MB/s"
+            f"  ({legacy / elapsed:4.1f}x vs legacy)"
+        )
+    print(f"parity vs legacy: {matches}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    main()
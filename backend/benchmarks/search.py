@@ -0,0 +1,138 @@
+"""Measure full-text search latency for GET /api/search.
+
+Run from ``backend/`` against Postgres for representative numbers::
+
+    python -m benchmarks.search --url postgresql+psycopg://... --emails 250000
+
+The script seeds one user with ``--emails`` messages (with triage summaries and
+a text attachment on every tenth email), builds the search index with
+``rebuild_search_index`` and reports p50/p95 latency for a few queries of
+different selectivity. Without ``--url`` a temporary SQLite file is used and
+the FTS5 fallback is measured instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Attachment, Email, EmailTriage, User
+from app.services.search import rebuild_search_index, search_emails
+from benchmarks.email_listing import _percentiles, _time
+
+WORDS = (
+    "budget invoice meeting schedule contract renewal quarterly report launch "
+    "review travel itinerary offsite hiring roadmap customer escalation outage "
+    "payment receipt shipping delivery proposal agenda minutes feedback"
+).split()
+QUERIES = ("budget", "quarterly report", "contract renewal invoice", "zeppelin")
+
+
+def seed(session, emails: int, rng: random.Random) -> int:
+    user = User(email="bench@example.com", google_sub="bench-sub")
+    session.add(user)
+    session.flush()
+    batch = 5000
+    for offset in range(0, emails, batch):
+        rows = [
+            {
+                "user_id": user.id,
+                "gmail_message_id": f"msg-{index}",
+                "subject": " ".join(rng.choices(WORDS, k=4)),
+                "clean_body_text": " ".join(rng.choices(WORDS, k=150)),
+                "label_ids": ["INBOX"],
+                "in_inbox": True,
+            }
+            for index in range(offset, min(offset + batch, emails))
+        ]
+        ids = session.execute(insert(Email).returning(Email.id), rows).scalars().all()
+        session.execute(
+            insert(EmailTriage),
+            [
+                {
+                    "user_id": user.id,
+                    "email_id": email_id,
+                    "summary": " ".join(rng.choices(WORDS, k=20)),
+                }
+                for email_id in ids
+            ],
+        )
+        session.execute(
+            insert(Attachment),
+            [
+                {
+                    "user_id": user.id,
+                    "email_id": email_id,
+                    "filename": "notes.txt",
+                    "mime_type": "text/plain",
+                    "extraction_status": "OK",
+                    "extracted_text": " ".join(rng.choices(WORDS, k=400)),
+                }
+                for email_id in ids[::10]
+            ],
+        )
+    session.commit()
+    return user.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--emails", type=int, default=50_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    path = None
+    url = args.url
+    if url is None:
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        url = f"sqlite+pysqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    try:
+        with Session() as session:
+            seed(session, args.emails, random.Random(args.seed))
+            rebuild_search_index(session)
+            if engine.dialect.name == "postgresql":
+                session.execute(text("ANALYZE emails, email_triage, attachments"))
+                session.commit()
+            user_id = session.execute(select(User.id)).scalar_one()
+
+        with Session() as session:
+            print(f"{engine.dialect.name}, {args.emails} emails")
+            for query in QUERIES:
+                hits = search_emails(session, user_id, query, args.limit)
+
+                def run(query=query):
+                    search_emails(session, user_id, query, args.limit)
+                    session.expunge_all()
+
+                timings = _percentiles(_time(run, args.repeat))
+                print(f"{query!r} ({len(hits)} hits): {timings}")
+            deep = args.limit * 20
+
+            def run_deep():
+                search_emails(session, user_id, QUERIES[0], args.limit, deep)
+                session.expunge_all()
+
+            print(f"offset {deep}: {_percentiles(_time(run_deep, args.repeat))}")
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if path:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Measure import time and first-call latency of heavy dependencies.
+
+Run from ``backend/``::
+
+    python -m benchmarks.startup --repeat 3
+
+Each dependency is measured in a fresh interpreter, so module caches and
+lazily loaded data from one measurement never help another. ``first call`` is
+the first representative operation after import and ``second call`` the same
+operation again; their difference is what a start-up warm-up saves the first
+request. dateparser is measured both with every locale (its default) and
+restricted to ``--languages``, as ``warm_up_dateparser`` runs it.
+
+Finally ``app.main_api`` is imported in a fresh interpreter and checked against
+``API_IMPORT_BUDGET_S``; the run exits non-zero when it is over budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_SNIPPET = """
+import json, time
+started = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+def call():
+{call}
+call()
+first = time.perf_counter()
+call()
+second = time.perf_counter()
+print(json.dumps([imported - started, first - imported, second - first]))
+"""
+
+_API_SNIPPET = """
+import time
+started = time.perf_counter()
+import app.main_api
+print(time.perf_counter() - started)
+"""
+# Generous against the ~1-2 s measured locally, most of it FastAPI and
+# SQLAlchemy, so only a substantial regression trips it.
+API_IMPORT_BUDGET_S = 3.0
+
+_SEARCH_TEXT = "Can we meet on March 5 at 3pm, or tomorrow at 10:30?"
+
+DEPENDENCIES: dict[str, tuple[str, str]] = {
+    "dateparser (all locales)": (
+        "from dateparser.search import search_dates",
+        f"    search_dates({_SEARCH_TEXT!r})",
+    ),
+    "dateparser (configured)": (
+        "from dateparser.search import search_dates",
+        f"    search_dates({_SEARCH_TEXT!r}, languages={{languages}})",
+    ),
+    "fitz": (
+        "import fitz",
+        "    doc = fitz.open()\n"
+        "    doc.new_page().insert_text((72, 72), 'Quarterly report')\n"
+        "    data = doc.tobytes()\n"
+        "    fitz.open(stream=data, filetype='pdf')[0].get_text()",
+    ),
+    "docx": (
+        "from io import BytesIO\nfrom docx import Document",
+        "    buffer = BytesIO()\n"
+        "    doc = Document()\n"
+        "    doc.add_paragraph('Quarterly report')\n"
+        "    doc.save(buffer)\n"
+        "    Document(BytesIO(buffer.getvalue())).paragraphs[0].text",
+    ),
+    "bs4": (
+        "from bs4 import BeautifulSoup",
+        "    BeautifulSoup('<p>Hi <b>there</b></p>' * 50, 'html.parser').get_text()",
+    ),
+    "openai": (
+        "from openai import OpenAI",
+        "    OpenAI(api_key='sk-unused').chat",
+    ),
+    "googleapiclient": (
+        "from googleapiclient.discovery import build",
+        "    build('gmail', 'v1', developerKey='unused', static_discovery=True,"
+        " cache_discovery=False)",
+    ),
+}
+
+
+def measure(imports: str, call: str) -> list[float]:
+    code = _SNIPPET.format(imports=imports, call=call)
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_api_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", _API_SNIPPET], check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--languages", default="en", help="comma-separated")
+    args = parser.parse_args()
+    languages = [code.strip() for code in args.languages.split(",") if code.strip()]
+
+    print(f"{'dependency':>26}  {'import':>9}  {'first call':>10}  {'second call':>11}")
+    for name, (imports, call) in DEPENDENCIES.items():
+        call = call.replace("{languages}", repr(languages))
+        runs = [measure(imports, call) for _ in range(args.repeat)]
+        medians = [statistics.median(run[i] for run in runs) * 1000 for i in range(3)]
+        print(
+            f"{name:>26}  {medians[0]:7.1f}ms  {medians[1]:8.1f}ms  "
+            f"{medians[2]:9.1f}ms"
+        )
+
+    api_import = statistics.median(measure_api_import() for _ in range(args.repeat))
+    print(
+        f"\napp.main_api import: {api_import * 1000:.1f}ms"
+        f" (budget {API_IMPORT_BUDGET_S * 1000:.0f}ms)"
+    )
+    if api_import > API_IMPORT_BUDGET_S:
+        raise SystemExit("app.main_api import is over budget")
+
+
+if __name__ == "__main__":
+    main()
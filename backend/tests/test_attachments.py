@@ -0,0 +1,451 @@
+"""Tests for attachment processing."""
+
+import base64
+import hashlib
+import os
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import Settings
+from app.crypto import LocalDevCrypto
+from app.db import Base
+from app.models import Attachment, AttachmentExtraction, Email, EmailTriage, User
+from app.services import attachments as attachments_service
+from app.services.attachment_queue import (
+    drain_attachment_queue,
+    initial_extraction_status,
+)
+from app.services.attachments import (
+    collect_unreferenced_extractions,
+    delete_attachments,
+    extract_text_from_pdf,
+    process_attachments_for_email,
+    process_selected_attachments,
+    release_attachment_extraction,
+    spool_base64url,
+)
+from app.services.extraction_pool import ExtractionLimits, ExtractionPool
+from app.services.metrics import metrics
+
+
+def _pdf_bytes(pages: list[str]) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    content = doc.write()
+    doc.close()
+    return content
+
+
+def test_process_attachments_reuses_extraction_by_hash(monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    settings = Settings(attachment_extraction_workers=0)
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    extract_calls = []
+
+    def fake_download(*args, **kwargs):
+        data = base64.urlsafe_b64encode(b"Shared quarterly report").decode("utf-8")
+        return spool_base64url(data.rstrip("="))
+
+    def fake_extract(mime_type, path, **kwargs):
+        extract_calls.append(mime_type)
+        with open(path, "rb") as handle:
+            return handle.read().decode("utf-8")
+
+    monkeypatch.setattr(
+        "app.services.attachments.download_attachment_to_file", fake_download
+    )
+    monkeypatch.setattr("app.services.attachments.extract_text_from_file", fake_extract)
+
+    with SessionLocal() as session:
+        user_a = User(email="a@example.com", google_sub="sub-a")
+        user_b = User(email="b@example.com", google_sub="sub-b")
+        session.add_all([user_a, user_b])
+        session.flush()
+        email_a = Email(user_id=user_a.id, gmail_message_id="msg-a")
+        email_b = Email(user_id=user_b.id, gmail_message_id="msg-b")
+        session.add_all([email_a, email_b])
+        session.flush()
+        for user, email in [(user_a, email_a), (user_b, email_b)]:
+            session.add(
+                Attachment(
+                    user_id=user.id,
+                    email_id=email.id,
+                    filename="report.txt",
+                    mime_type="text/plain",
+                    gmail_attachment_id=f"att-{email.id}",
+                    extraction_status="NOT_PROCESSED",
+                )
+            )
+        session.commit()
+
+        first = process_attachments_for_email(
+            session, user_a.id, email_a.id, settings, crypto
+        )
+        second = process_attachments_for_email(
+            session, user_b.id, email_b.id, settings, crypto
+        )
+
+        assert first == {"processed": 1, "reused": 0, "failed": 0, "skipped": 0}
+        assert second == {"processed": 1, "reused": 1, "failed": 0, "skipped": 0}
+        assert extract_calls == ["text/plain"]
+
+        attachments = session.execute(select(Attachment)).scalars().all()
+        assert {item.extracted_text for item in attachments} == {
+            "Shared quarterly report"
+        }
+        extraction = session.execute(select(AttachmentExtraction)).scalar_one()
+        assert extraction.ref_count == 2
+
+        for attachment in attachments:
+            release_attachment_extraction(session, attachment)
+        session.commit()
+        assert collect_unreferenced_extractions(session) == 1
+        assert session.execute(select(AttachmentExtraction)).first() is None
+
+
+def test_extraction_references_are_released_on_reprocess_and_delete(monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    settings = Settings(attachment_extraction_workers=0)
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    contents = {"msg-a": b"Shared report", "msg-b": b"Shared report"}
+
+    def fake_download(db, user_id, message_id, *args, **kwargs):
+        data = base64.urlsafe_b64encode(contents[message_id]).decode("utf-8")
+        return spool_base64url(data.rstrip("="))
+
+    def fake_extract(mime_type, path, **kwargs):
+        with open(path, "rb") as handle:
+            return handle.read().decode("utf-8")
+
+    monkeypatch.setattr(
+        "app.services.attachments.download_attachment_to_file", fake_download
+    )
+    monkeypatch.setattr("app.services.attachments.extract_text_from_file", fake_extract)
+
+    def ref_counts(session):
+        rows = session.execute(select(AttachmentExtraction)).scalars().all()
+        return {row.extracted_text: row.ref_count for row in rows}
+
+    with SessionLocal() as session:
+        user = User(email="a@example.com", google_sub="sub-a")
+        session.add(user)
+        session.flush()
+        emails = {}
+        for message_id in contents:
+            email = Email(user_id=user.id, gmail_message_id=message_id)
+            session.add(email)
+            session.flush()
+            session.add(
+                Attachment(
+                    user_id=user.id,
+                    email_id=email.id,
+                    mime_type="text/plain",
+                    gmail_attachment_id=f"att-{message_id}",
+                    extraction_status="NOT_PROCESSED",
+                )
+            )
+            emails[message_id] = email
+        session.commit()
+        for email in emails.values():
+            process_attachments_for_email(session, user.id, email.id, settings, crypto)
+        assert ref_counts(session) == {"Shared report": 2}
+
+        # Re-processing after the content changed moves the reference.
+        contents["msg-a"] = b"Revised report"
+        email_a = emails["msg-a"]
+        process_selected_attachments(
+            session, email_a, list(email_a.attachments), settings, crypto
+        )
+        assert ref_counts(session) == {"Shared report": 1, "Revised report": 1}
+
+        delete_attachments(session, list(emails["msg-b"].attachments))
+        session.commit()
+        assert ref_counts(session) == {"Shared report": 0, "Revised report": 1}
+
+        assert collect_unreferenced_extractions(session) == 1
+        assert ref_counts(session) == {"Revised report": 1}
+        assert email_a.attachments[0].extracted_text == "Revised report"
+
+
+def test_linking_survives_collection_and_skips_queue_claimed_rows(monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    settings = Settings(attachment_extraction_workers=0)
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    sha256 = hashlib.sha256(b"Old report").hexdigest()
+    original_find = attachments_service._find_extraction
+    downloads = []
+
+    def fake_download(db, user_id, message_id, attachment_id, *args, **kwargs):
+        downloads.append(attachment_id)
+        data = base64.urlsafe_b64encode(b"Old report").decode("utf-8")
+        return spool_base64url(data.rstrip("="))
+
+    collections = []
+
+    def find_then_collect(db, digest):
+        # The collector runs once, between the first lookup and its link.
+        extraction = original_find(db, digest)
+        if not collections:
+            collections.append(collect_unreferenced_extractions(db))
+        return extraction
+
+    monkeypatch.setattr(
+        "app.services.attachments.download_attachment_to_file", fake_download
+    )
+    monkeypatch.setattr("app.services.attachments._find_extraction", find_then_collect)
+
+    with SessionLocal() as session:
+        user = User(email="a@example.com", google_sub="sub-a")
+        session.add(user)
+        session.flush()
+        email = Email(user_id=user.id, gmail_message_id="msg-a")
+        session.add(email)
+        session.flush()
+        session.add_all(
+            [
+                AttachmentExtraction(
+                    sha256=sha256,
+                    mime_type="text/plain",
+                    extracted_text="Old report",
+                    ref_count=0,
+                ),
+                Attachment(
+                    user_id=user.id,
+                    email_id=email.id,
+                    mime_type="text/plain",
+                    gmail_attachment_id="att-free",
+                    extraction_status="QUEUED",
+                ),
+                Attachment(
+                    user_id=user.id,
+                    email_id=email.id,
+                    mime_type="text/plain",
+                    gmail_attachment_id="att-claimed",
+                    extraction_status="PROCESSING",
+                ),
+            ]
+        )
+        session.commit()
+
+        result = process_attachments_for_email(
+            session, user.id, email.id, settings, crypto
+        )
+
+        assert result == {"processed": 1, "reused": 1, "failed": 0, "skipped": 0}
+        assert downloads == ["att-free"]
+        assert collections == [1]
+        statuses = {
+            item.gmail_attachment_id: item.extraction_status
+            for item in email.attachments
+        }
+        assert statuses == {"att-free": "OK", "att-claimed": "PROCESSING"}
+        extraction = session.execute(select(AttachmentExtraction)).scalar_one()
+        assert (extraction.sha256, extraction.ref_count) == (sha256, 1)
+
+
+def test_extract_text_from_pdf_respects_page_cap():
+    content = _pdf_bytes(["First page", "Second page", "Third page"])
+
+    text = extract_text_from_pdf(content, max_pages=2)
+
+    assert "Second page" in text
+    assert "Third page" not in text
+
+
+def test_extraction_pool_runs_jobs_and_records_latency():
+    metrics.reset()
+    pool = ExtractionPool(
+        max_workers=2,
+        limits=ExtractionLimits(timeout_s=30.0, max_rss_mb=512, max_pdf_pages=1),
+        tasks_per_child=5,
+    )
+    try:
+        outcomes = pool.extract_many(
+            {
+                "pdf": ("application/pdf", _pdf_bytes(["Page one", "Page two"])),
+                "txt": ("text/plain", b"Plain notes"),
+                "bin": ("application/zip", b"PK"),
+            }
+        )
+    finally:
+        pool.shutdown()
+
+    assert "Page one" in outcomes["pdf"].text
+    assert "Page two" not in outcomes["pdf"].text
+    assert outcomes["txt"].text == "Plain notes"
+    assert outcomes["bin"].error
+    histograms = metrics.snapshot()["histograms"]
+    assert (
+        histograms['attachment_extraction_seconds{mime_type="application/pdf"}'][
+            "count"
+        ]
+        == 1
+    )
+
+
+def test_spool_base64url_decodes_in_chunks_and_hashes(monkeypatch):
+    monkeypatch.setattr("app.services.attachments.DECODE_CHUNK_CHARS", 8)
+    content = os.urandom(1001)
+    data = base64.urlsafe_b64encode(content).decode("utf-8").rstrip("=")
+
+    download = spool_base64url(data)
+    try:
+        with open(download.path, "rb") as handle:
+            assert handle.read() == content
+        assert download.size_bytes == len(content)
+        assert download.sha256 == hashlib.sha256(content).hexdigest()
+    finally:
+        download.cleanup()
+    assert not os.path.exists(download.path)
+
+
+def test_drain_attachment_queue_prioritizes_and_stops_at_budget(monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    settings = Settings(
+        attachment_extraction_workers=0,
+        attachment_queue_max_size_bytes=1000,
+        attachment_triage_text_budget=10,
+    )
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    order = []
+
+    def fake_download(db, user_id, message_id, attachment_id, *args, **kwargs):
+        payload = f"text for {attachment_id}".encode()
+        data = base64.urlsafe_b64encode(payload).decode("utf-8")
+        return spool_base64url(data.rstrip("="))
+
+    def fake_extract(mime_type, path, **kwargs):
+        with open(path, "rb") as handle:
+            text = handle.read().decode("utf-8")
+        order.append(text.removeprefix("text for "))
+        return text
+
+    monkeypatch.setattr(
+        "app.services.attachments.download_attachment_to_file", fake_download
+    )
+    monkeypatch.setattr("app.services.attachments.extract_text_from_file", fake_extract)
+
+    assert initial_extraction_status("image/png", 10, settings) == "UNSUPPORTED"
+    assert initial_extraction_status("text/plain", 5000, settings) == (
+        "SKIPPED_TOO_LARGE"
+    )
+
+    with SessionLocal() as session:
+        user = User(email="a@example.com", google_sub="sub-a")
+        session.add(user)
+        session.flush()
+        routine = Email(user_id=user.id, gmail_message_id="msg-routine")
+        urgent = Email(user_id=user.id, gmail_message_id="msg-urgent")
+        session.add_all([routine, urgent])
+        session.flush()
+        session.add(
+            EmailTriage(user_id=user.id, email_id=urgent.id, needs_response=True)
+        )
+        rows = [
+            (routine, "routine-txt", "text/plain", 10),
+            (urgent, "urgent-pdf", "application/pdf", 10),
+            (urgent, "urgent-txt-big", "text/plain", 500),
+            (urgent, "urgent-txt", "text/plain", 10),
+            (urgent, "urgent-huge", "text/plain", 5000),
+        ]
+        for email, attachment_id, mime_type, size in rows:
+            session.add(
+                Attachment(
+                    user_id=user.id,
+                    email_id=email.id,
+                    filename=attachment_id,
+                    mime_type=mime_type,
+                    size_bytes=size,
+                    gmail_attachment_id=attachment_id,
+                    extraction_status=initial_extraction_status(
+                        mime_type, size, settings
+                    ),
+                )
+            )
+        session.commit()
+
+        result = drain_attachment_queue(session, settings, crypto)
+
+        assert order == ["urgent-txt", "routine-txt"]
+        assert result.claimed == 4
+        assert result.processed == 2
+        assert result.deferred == 2
+        assert result.remaining == 0
+        statuses = {
+            item.gmail_attachment_id: item.extraction_status
+            for item in session.execute(select(Attachment)).scalars()
+        }
+        assert statuses == {
+            "routine-txt": "OK",
+            "urgent-txt": "OK",
+            "urgent-txt-big": "DEFERRED",
+            "urgent-pdf": "DEFERRED",
+            "urgent-huge": "SKIPPED_TOO_LARGE",
+        }
+
+
+def test_drain_attachment_queue_fails_batches_that_raise(monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(attachment_extraction_workers=1)
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+
+    def fake_process(db, email, attachments, settings, crypto):
+        if attachments[0].gmail_attachment_id == "broken":
+            raise RuntimeError("extractor crashed")
+        for attachment in attachments:
+            attachment.extraction_status = "OK"
+        db.commit()
+        return {"processed": len(attachments), "reused": 0, "failed": 0}
+
+    monkeypatch.setattr(
+        "app.services.attachment_queue.process_selected_attachments", fake_process
+    )
+
+    with SessionLocal() as session:
+        user = User(email="a@example.com", google_sub="sub-a")
+        session.add(user)
+        session.flush()
+        email = Email(user_id=user.id, gmail_message_id="msg-a")
+        session.add(email)
+        session.flush()
+        for attachment_id in ["broken", "fine"]:
+            session.add(
+                Attachment(
+                    user_id=user.id,
+                    email_id=email.id,
+                    mime_type="text/plain",
+                    size_bytes=10,
+                    gmail_attachment_id=attachment_id,
+                    extraction_status="QUEUED",
+                )
+            )
+        session.commit()
+
+        result = drain_attachment_queue(session, settings, crypto)
+
+        statuses = dict(
+            session.execute(
+                select(Attachment.gmail_attachment_id, Attachment.extraction_status)
+            ).all()
+        )
+        assert statuses == {"broken": "FAILED", "fine": "OK"}
+        assert (result.processed, result.failed) == (1, 1)
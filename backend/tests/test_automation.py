@@ -1,15 +1,36 @@
 """Tests for automation actions."""
 
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
 
+import pytest
+from pydantic import ValidationError
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import Settings
 from app.crypto import LocalDevCrypto
 from app.db import Base
-from app.models import Email, EmailTriage, User, UserGmailLabel, UserPreferences
-from app.services.automation import execute_actions, run_automation_for_email
+from app.models import (
+    AuditLog,
+    Email,
+    EmailTriage,
+    GoogleOAuthToken,
+    User,
+    UserGmailLabel,
+    UserPreferences,
+)
+from app.schemas import BulkAutomationRequest
+from app.services import automation
+from app.services.automation import (
+    BulkSelection,
+    LabelDeltaBatch,
+    execute_actions,
+    execute_actions_many,
+    run_automation_bulk,
+    run_automation_for_email,
+    snooze_sweep,
+)
 from app.services.preferences import default_preferences
 
 
@@ -22,6 +43,16 @@ class FakeGmailClient:
             ("modify", message_id, tuple(add_label_ids), tuple(remove_label_ids))
         )
 
+    def batch_modify_labels(self, message_ids, add_label_ids, remove_label_ids):
+        self.calls.append(
+            (
+                "batch",
+                tuple(message_ids),
+                tuple(add_label_ids),
+                tuple(remove_label_ids),
+            )
+        )
+
     def trash_message(self, message_id):
         self.calls.append(("trash", message_id))
 
@@ -111,6 +142,50 @@ def test_execute_actions_mark_read():
         assert client.calls[0] == ("modify", "msg-2", (), ("UNREAD",))
 
 
+def test_execute_actions_archive_clears_in_inbox():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    settings = Settings(
+        google_oauth_client_id="client",
+        google_oauth_client_secret="secret",
+        encryption_key="unused",
+    )
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        session.add(user)
+        session.flush()
+        email = Email(
+            user_id=user.id,
+            gmail_message_id="msg-3",
+            label_ids=["INBOX", "UNREAD"],
+        )
+        session.add(email)
+        session.commit()
+        assert email.in_inbox is True
+
+        client = FakeGmailClient()
+        result = execute_actions(
+            session,
+            settings,
+            crypto,
+            user.id,
+            email.id,
+            ["MARK_READ", "ARCHIVE"],
+            client=client,
+        )
+
+        updated = session.get(Email, email.id)
+        assert result.applied == ["MARK_READ", "ARCHIVE"]
+        assert updated.label_ids == []
+        assert updated.in_inbox is False
+        # Both label changes are merged into one request.
+        assert client.calls == [("modify", "msg-3", (), ("INBOX", "UNREAD"))]
+
+
 def test_run_automation_suggest_only():
     engine = create_engine("sqlite+pysqlite:///:memory:")
     SessionLocal = sessionmaker(bind=engine)
@@ -150,3 +225,489 @@ def test_run_automation_suggest_only():
         result = run_automation_for_email(session, settings, crypto, user.id, email.id)
         assert "ARCHIVE" in result.suggested
         assert result.applied == []
+
+
+def test_label_delta_batch_merges_and_chunks(monkeypatch):
+    monkeypatch.setattr("app.services.automation.BATCH_MODIFY_MAX_IDS", 2)
+    batch = LabelDeltaBatch()
+    for message_id in ("m1", "m2", "m3"):
+        batch.add(message_id, add=["Label_1"], remove=["UNREAD"])
+    batch.add("m4", add=["INBOX"])
+    batch.add("m4", remove=["INBOX"])
+    batch.add("m5", add=["Label_1"])
+    batch.add("m5", remove=["Label_1"])
+    batch.add("m5", add=["Label_1"])
+
+    client = FakeGmailClient()
+    assert batch.flush(client) == 4
+    assert client.calls == [
+        ("batch", ("m1", "m2"), ("Label_1",), ("UNREAD",)),
+        ("batch", ("m3",), ("Label_1",), ("UNREAD",)),
+        ("modify", "m4", (), ("INBOX",)),
+        ("modify", "m5", ("Label_1",), ()),
+    ]
+    assert len(batch) == 0
+
+
+def test_execute_actions_many_batches_label_changes():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(encryption_key="unused")
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        other = User(email="other@example.com", google_sub="sub-2")
+        session.add_all([user, other])
+        session.flush()
+        emails = [
+            Email(
+                user_id=user.id,
+                gmail_message_id=f"msg-{index}",
+                label_ids=["INBOX", "UNREAD"],
+            )
+            for index in range(3)
+        ]
+        foreign = Email(user_id=other.id, gmail_message_id="msg-other")
+        session.add_all([*emails, foreign])
+        session.commit()
+
+        client = FakeGmailClient()
+        results = execute_actions_many(
+            session,
+            settings,
+            crypto,
+            user.id,
+            [email.id for email in emails] + [foreign.id],
+            ["MARK_READ", "ARCHIVE", "ADD_LABEL:Missing"],
+            client=client,
+        )
+
+        assert sorted(results) == sorted(email.id for email in emails)
+        assert {tuple(result.skipped) for result in results.values()} == {
+            ("ADD_LABEL:Missing",)
+        }
+        assert client.calls == [
+            ("batch", ("msg-0", "msg-1", "msg-2"), (), ("INBOX", "UNREAD"))
+        ]
+        assert all(email.label_ids == [] for email in emails)
+
+
+class FailingBatchGmailClient(FakeGmailClient):
+    def batch_modify_labels(self, message_ids, add_label_ids, remove_label_ids):
+        raise RuntimeError("Gmail unavailable")
+
+
+def test_execute_actions_many_applies_after_flush_and_keeps_order():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(encryption_key="unused")
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        session.add(user)
+        session.flush()
+        emails = [
+            Email(user_id=user.id, gmail_message_id=f"msg-{index}", label_ids=["INBOX"])
+            for index in range(2)
+        ]
+        session.add_all(emails)
+        session.commit()
+        email_ids = [email.id for email in emails]
+
+        with pytest.raises(RuntimeError):
+            execute_actions_many(
+                session,
+                settings,
+                crypto,
+                user.id,
+                email_ids,
+                ["ARCHIVE", "TRASH"],
+                client=FailingBatchGmailClient(),
+            )
+        # Nothing is recorded locally for changes Gmail did not accept.
+        assert all(email.label_ids == ["INBOX"] for email in emails)
+        assert session.query(AuditLog).count() == 0
+        session.rollback()
+
+        client = FakeGmailClient()
+        results = execute_actions_many(
+            session,
+            settings,
+            crypto,
+            user.id,
+            email_ids,
+            ["ARCHIVE", "TRASH"],
+            client=client,
+        )
+        assert client.calls == [
+            ("batch", ("msg-0", "msg-1"), (), ("INBOX",)),
+            ("trash", "msg-0"),
+            ("trash", "msg-1"),
+        ]
+        assert all(
+            result.applied == ["ARCHIVE", "TRASH"] for result in results.values()
+        )
+
+
+def test_snooze_sweep_builds_one_client_per_user(monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(encryption_key="unused")
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    clients = []
+
+    def fake_client(credentials):
+        client = FakeGmailClient()
+        clients.append(client)
+        return client
+
+    monkeypatch.setattr(
+        "app.services.automation.build_credentials",
+        lambda *args: SimpleNamespace(credentials=object()),
+    )
+    monkeypatch.setattr("app.services.automation.GmailClient", fake_client)
+
+    with SessionLocal() as session:
+        users = [
+            User(email=f"user{index}@example.com", google_sub=f"sub-{index}")
+            for index in range(2)
+        ]
+        session.add_all(users)
+        session.flush()
+        due = datetime.now(UTC) - timedelta(minutes=5)
+        for user in users:
+            session.add(
+                GoogleOAuthToken(
+                    user_id=user.id,
+                    refresh_token_enc=b"token",
+                    scopes=[],
+                )
+            )
+            session.add(
+                UserGmailLabel(
+                    user_id=user.id,
+                    label_name="Copilot/Snoozed",
+                    label_id=f"Label_{user.id}",
+                )
+            )
+            session.add_all(
+                [
+                    Email(
+                        user_id=user.id,
+                        gmail_message_id=f"msg-{user.id}-{index}",
+                        label_ids=[f"Label_{user.id}"],
+                        is_snoozed=True,
+                        snooze_until_ts=due,
+                    )
+                    for index in range(3)
+                ]
+            )
+        session.commit()
+
+        assert snooze_sweep(session, settings, crypto)["processed"] == 6
+
+        assert len(clients) == 2
+        assert [client.calls for client in clients] == [
+            [
+                (
+                    "batch",
+                    (f"msg-{user.id}-0", f"msg-{user.id}-1", f"msg-{user.id}-2"),
+                    ("INBOX",),
+                    (f"Label_{user.id}",),
+                )
+            ]
+            for user in users
+        ]
+        emails = session.query(Email).all()
+        assert all(email.in_inbox and not email.is_snoozed for email in emails)
+
+
+def test_run_automation_bulk_streams_progress_and_batches(monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(encryption_key="unused")
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    label_map_calls = []
+    original_label_map = automation._label_map
+
+    def counting_label_map(db, user_id):
+        label_map_calls.append(user_id)
+        return original_label_map(db, user_id)
+
+    monkeypatch.setattr("app.services.automation._label_map", counting_label_map)
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        session.add(user)
+        session.flush()
+        prefs = default_preferences()
+        prefs["automation_level"] = "AUTO_ARCHIVE"
+        session.add(UserPreferences(user_id=user.id, preferences=prefs))
+        session.add(
+            UserGmailLabel(
+                user_id=user.id, label_name="Copilot/Newsletter", label_id="Label_N"
+            )
+        )
+        rows = [
+            ("news@example.com", "LOW"),
+            ("News@Example.com", "LOW"),
+            ("news@example.com", "LOW"),
+            ("news@example.com", "HIGH"),
+            ("boss@example.com", "LOW"),
+        ]
+        for index, (sender, label) in enumerate(rows):
+            email = Email(
+                user_id=user.id,
+                gmail_message_id=f"msg-{index}",
+                from_email=sender,
+                label_ids=["INBOX"],
+                internal_date_ts=datetime(2025, 1, 1 + index, tzinfo=UTC),
+            )
+            session.add(email)
+            session.flush()
+            session.add(
+                EmailTriage(
+                    user_id=user.id,
+                    email_id=email.id,
+                    importance_label=label,
+                    needs_response=False,
+                )
+            )
+        session.add(
+            Email(user_id=user.id, gmail_message_id="untriaged", label_ids=["INBOX"])
+        )
+        session.commit()
+        user_id = user.id
+
+        client = FakeGmailClient()
+        events = list(
+            run_automation_bulk(
+                session,
+                settings,
+                crypto,
+                user_id,
+                BulkSelection(
+                    importance_labels=["LOW"],
+                    from_email="news@example.com",
+                    until=datetime(2025, 1, 10, tzinfo=UTC),
+                ),
+                chunk_size=2,
+                client=client,
+            )
+        )
+
+        assert [event["event"] for event in events] == [
+            "start",
+            "progress",
+            "progress",
+            "done",
+        ]
+        assert events[0]["matched"] == 3
+        assert events[-1] == {
+            "event": "done",
+            "total": 3,
+            "processed": 3,
+            "applied": 6,
+            "skipped": 0,
+            "gmail_calls": 2,
+        }
+        assert client.calls == [
+            ("batch", ("msg-0", "msg-1"), ("Label_N",), ("INBOX",)),
+            ("modify", "msg-2", ("Label_N",), ("INBOX",)),
+        ]
+        assert label_map_calls == [user_id]
+        archived = session.query(Email).filter(Email.in_inbox.is_(False)).count()
+        assert archived == 3
+
+
+def test_snooze_sweep_claims_in_batches_and_schedules_next_wakeup(monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(
+        encryption_key="unused",
+        snooze_sweep_batch_size=2,
+        queue_mode="cloud_tasks",
+        cloud_tasks_project="project",
+        cloud_tasks_location="us-central1",
+        cloud_tasks_queue="jobs",
+        cloud_tasks_target_url="https://worker.example.com",
+    )
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    clients = []
+    scheduled = []
+
+    def fake_client(credentials):
+        client = FakeGmailClient()
+        clients.append(client)
+        return client
+
+    def fake_enqueue(settings, run_at):
+        scheduled.append(run_at)
+        return SimpleNamespace(status="stub")
+
+    monkeypatch.setattr(
+        "app.services.automation.build_credentials",
+        lambda *args: SimpleNamespace(credentials=object()),
+    )
+    monkeypatch.setattr("app.services.automation.GmailClient", fake_client)
+    monkeypatch.setattr("app.services.automation.enqueue_snooze_sweep", fake_enqueue)
+
+    now = datetime(2025, 3, 1, 12, tzinfo=UTC)
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        no_token = User(email="other@example.com", google_sub="sub-2")
+        session.add_all([user, no_token])
+        session.flush()
+        session.add(GoogleOAuthToken(user_id=user.id, refresh_token_enc=b"token"))
+        for index in range(3):
+            session.add(
+                Email(
+                    user_id=user.id,
+                    gmail_message_id=f"due-{index}",
+                    is_snoozed=True,
+                    snooze_until_ts=now - timedelta(minutes=index + 1),
+                )
+            )
+        session.add(
+            Email(
+                user_id=no_token.id,
+                gmail_message_id="orphan",
+                is_snoozed=True,
+                snooze_until_ts=now - timedelta(hours=1),
+            )
+        )
+        session.add(
+            Email(
+                user_id=user.id,
+                gmail_message_id="later",
+                is_snoozed=True,
+                snooze_until_ts=now + timedelta(hours=3),
+            )
+        )
+        session.commit()
+
+        result = snooze_sweep(session, settings, crypto, now=now)
+
+        assert result["processed"] == 3
+        assert result["skipped_users"] == 1
+        assert result["failures"] == [
+            {"user_id": no_token.id, "error": "Missing OAuth token"}
+        ]
+        assert result["batches"] == 2
+        assert result["scheduled"] == "stub"
+        assert scheduled == [now + timedelta(hours=3)]
+        assert sorted(
+            email.gmail_message_id
+            for email in session.query(Email).filter(Email.is_snoozed)
+        ) == ["later", "orphan"]
+
+
+def test_snooze_sweep_reschedules_immediately_when_batch_cap_leaves_due_rows(
+    monkeypatch,
+):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(
+        encryption_key="unused",
+        snooze_sweep_batch_size=2,
+        snooze_sweep_max_batches=2,
+        queue_mode="cloud_tasks",
+    )
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    monkeypatch.setattr(
+        "app.services.automation.build_credentials",
+        lambda *args: SimpleNamespace(credentials=object()),
+    )
+    monkeypatch.setattr(
+        "app.services.automation.GmailClient", lambda credentials: FakeGmailClient()
+    )
+
+    now = datetime(2025, 3, 1, 12, tzinfo=UTC)
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        session.add(user)
+        session.flush()
+        session.add(GoogleOAuthToken(user_id=user.id, refresh_token_enc=b"token"))
+        for index in range(5):
+            session.add(
+                Email(
+                    user_id=user.id,
+                    gmail_message_id=f"due-{index}",
+                    is_snoozed=True,
+                    snooze_until_ts=now - timedelta(minutes=index + 1),
+                )
+            )
+        session.commit()
+
+        # Cloud Tasks settings are incomplete, so scheduling fails; the swept
+        # emails stay un-snoozed and the cron remains the fallback.
+        result = snooze_sweep(session, settings, crypto, now=now)
+
+        assert (result["processed"], result["batches"]) == (4, 2)
+        assert result["next_due_at"] == now.isoformat()
+        assert result["scheduled"] is None
+        assert session.query(Email).filter(Email.is_snoozed).count() == 1
+
+
+def test_snooze_sweep_logs_and_reports_user_failures(monkeypatch, caplog):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(encryption_key="unused")
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+
+    def failing_unsnooze(*args):
+        raise RuntimeError("Gmail quota exceeded")
+
+    monkeypatch.setattr(
+        "app.services.automation._unsnooze_user_emails", failing_unsnooze
+    )
+    monkeypatch.setattr(
+        "app.services.automation.enqueue_snooze_sweep",
+        lambda settings, run_at: SimpleNamespace(status="stub"),
+    )
+
+    now = datetime(2025, 3, 1, 12, tzinfo=UTC)
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        session.add(user)
+        session.flush()
+        session.add(GoogleOAuthToken(user_id=user.id, refresh_token_enc=b"token"))
+        session.add(
+            Email(
+                user_id=user.id,
+                gmail_message_id="due",
+                is_snoozed=True,
+                snooze_until_ts=now - timedelta(minutes=1),
+            )
+        )
+        session.commit()
+
+        with caplog.at_level("ERROR", logger="app.services.automation"):
+            result = snooze_sweep(session, settings, crypto, now=now)
+
+        assert result["processed"] == 0
+        assert result["failures"] == [
+            {"user_id": user.id, "error": "Gmail quota exceeded"}
+        ]
+        [record] = caplog.records
+        assert record.user_id == user.id
+        assert record.exc_info is not None
+
+
+def test_bulk_request_requires_email_ids_or_a_filter():
+    with pytest.raises(ValidationError, match="email_ids or at least one filter"):
+        BulkAutomationRequest()
+    with pytest.raises(ValidationError):
+        BulkAutomationRequest(importance_labels=[], from_email="")
+
+    assert BulkAutomationRequest(email_ids=[]).email_ids == []
+    assert BulkAutomationRequest(importance_labels=["LOW"]).importance_labels == ["LOW"]
@@ -1,5 +1,6 @@
 """Tests for calendar candidate extraction."""
 
+import base64
 from datetime import UTC, datetime
 from pathlib import Path
 
@@ -10,7 +11,15 @@ from app.config import Settings
 from app.crypto import LocalDevCrypto
 from app.db import Base
 from app.models import Attachment, CalendarCandidate, Email, User
-from app.services.calendar_extract import detect_ics_invites, extract_in_text_candidates
+from app.services.calendar_extract import (
+    detect_ics_invites,
+    extract_in_text_candidates,
+    find_date_windows,
+    generate_calendar_candidates,
+)
+from app.services.metrics import metrics
+from app.services.recurrence import recurrence_cache
+from app.services.warmup import warm_up
 
 
 def test_detect_ics_invite_from_attachment(monkeypatch):
@@ -132,3 +141,239 @@ def test_extract_in_text_candidates_tomorrow_date_range():
         payload = candidates[0].payload or {}
         assert payload.get("type") == "DATE_RANGE"
         assert str(payload.get("start", "")).startswith("2025-01-02T09:00:00")
+
+
+def test_date_prescan_skips_text_without_date_hints(monkeypatch):
+    text = "Thanks for the notes. " * 20 + "Can we meet on March 5 at 3pm?"
+    windows = find_date_windows(text)
+    assert len(windows) == 1
+    assert "on March 5 at 3pm?" in text[slice(*windows[0])]
+    assert windows[0][1] - windows[0][0] < len(text) // 2
+
+    def fail_search(*args, **kwargs):
+        raise AssertionError("dateparser should not run without date hints")
+
+    monkeypatch.setattr("dateparser.search.search_dates", fail_search)
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings()
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-3")
+        session.add(user)
+        session.flush()
+        email = Email(
+            user_id=user.id,
+            gmail_message_id="msg-3",
+            subject="Notes",
+            clean_body_text="Thanks for sending the notes, they look good to me.",
+        )
+        session.add(email)
+        session.commit()
+
+        candidates = extract_in_text_candidates(session, settings, user.id, email.id)
+        assert candidates == []
+
+
+def test_warm_up_parses_with_configured_languages(monkeypatch):
+    seen = []
+
+    def fake_search(text, languages=None, settings=None):
+        seen.append(("search", languages))
+
+    def fake_parse(value, languages=None):
+        seen.append(("parse", languages))
+
+    monkeypatch.setattr("dateparser.search.search_dates", fake_search)
+    monkeypatch.setattr("dateparser.parse", fake_parse)
+
+    timings = warm_up(Settings(dateparser_languages=["en", "de"]))
+
+    assert seen == [("search", ["en", "de"]), ("parse", ["en", "de"])]
+    gauges = metrics.snapshot()["gauges"]
+    assert (
+        gauges['startup_warmup_seconds{component="dateparser"}']
+        == timings["dateparser"]
+    )
+
+
+class FakeInviteGmailClient:
+    def __init__(self, inline_ics: bytes, attached_ics: bytes):
+        self.inline_ics = inline_ics
+        self.attached_ics = attached_ics
+        self.calls = []
+
+    def get_message(self, message_id, format="full"):
+        self.calls.append(("get_message", message_id))
+        return {
+            "payload": {
+                "mimeType": "multipart/mixed",
+                "parts": [
+                    {"mimeType": "text/plain", "body": {"data": _b64(b"Invite")}},
+                    {
+                        "mimeType": "text/calendar",
+                        "body": {"data": _b64(self.inline_ics)},
+                    },
+                    {
+                        "mimeType": "application/ics",
+                        "filename": "invite.ics",
+                        "body": {"attachmentId": "att-1"},
+                    },
+                ],
+            }
+        }
+
+    def get_attachment(self, message_id, attachment_id):
+        self.calls.append(("get_attachment", attachment_id))
+        return {"data": _b64(self.attached_ics)}
+
+
+def _b64(content: bytes) -> str:
+    return base64.urlsafe_b64encode(content).decode("ascii").rstrip("=")
+
+
+def test_invites_parse_each_message_once_and_keep_latest_revision(monkeypatch):
+    original = (Path(__file__).parent / "fixtures" / "invite.ics").read_bytes()
+    # The attached copy is a later revision that moves the meeting.
+    revised = original.replace(b"UID:invite-123", b"UID:invite-123\r\nSEQUENCE:2")
+    revised = revised.replace(b"DTSTART:20250105T150000Z", b"DTSTART:20250105T160000Z")
+    revised = revised.replace(b"DTEND:20250105T153000Z", b"DTEND:20250105T163000Z")
+    client = FakeInviteGmailClient(inline_ics=original, attached_ics=revised)
+    monkeypatch.setattr(
+        "app.services.calendar_extract._gmail_client", lambda *args: client
+    )
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings()
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-4")
+        session.add(user)
+        session.flush()
+        email = Email(user_id=user.id, gmail_message_id="msg-4")
+        session.add(email)
+        session.commit()
+
+        first = detect_ics_invites(session, settings, crypto, user.id, email.id)
+        assert client.calls == [("get_message", "msg-4"), ("get_attachment", "att-1")]
+        assert len(first) == 1
+        assert first[0].payload["start"] == "2025-01-05T16:00:00+00:00"
+        assert first[0].payload["source"] == "ICS_ATTACHMENT"
+
+        first[0].status = "INVITE_ACCEPTED"
+        session.add(
+            CalendarCandidate(
+                user_id=user.id,
+                email_id=email.id,
+                payload={"type": "DATE_RANGE", "title": "stale"},
+                status="PROPOSED",
+            )
+        )
+        session.commit()
+        client.attached_ics = original
+        again = generate_calendar_candidates(
+            session, settings, crypto, user.id, email.id
+        )
+
+        rows = session.execute(select(CalendarCandidate)).scalars().all()
+        assert [row.id for row in rows] == [first[0].id]
+        assert again == rows
+        assert rows[0].status == "INVITE_ACCEPTED"
+        # The attachment now carries the original revision again.
+        assert rows[0].payload["start"] == "2025-01-05T15:00:00+00:00"
+
+
+RECURRING_ICS = b"""BEGIN:VCALENDAR\r
+VERSION:2.0\r
+PRODID:-//Example//EN\r
+BEGIN:VEVENT\r
+UID:standup-1\r
+SUMMARY:Standup\r
+DTSTART;TZID=America/New_York:20981005T090000\r
+DTEND;TZID=America/New_York:20981005T093000\r
+RRULE:FREQ=WEEKLY;BYDAY=MO\r
+EXDATE;TZID=America/New_York:20990112T090000\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:standup-1\r
+SUMMARY:Standup (moved)\r
+RECURRENCE-ID;TZID=America/New_York:20990119T090000\r
+DTSTART;TZID=America/New_York:20990119T110000\r
+DTEND;TZID=America/New_York:20990119T113000\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:flood-1\r
+SUMMARY:Every minute\r
+DTSTART:20000101T000000Z\r
+DTEND:20000101T000100Z\r
+RRULE:FREQ=MINUTELY\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:never-1\r
+SUMMARY:Never\r
+DTSTART:20000101T000000Z\r
+RRULE:FREQ=MINUTELY;BYMONTH=2;BYMONTHDAY=30\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+def test_recurring_invites_expand_within_horizon_and_stay_bounded(monkeypatch):
+    recurrence_cache.clear()
+    client = FakeInviteGmailClient(inline_ics=RECURRING_ICS, attached_ics=RECURRING_ICS)
+    monkeypatch.setattr(
+        "app.services.calendar_extract._gmail_client", lambda *args: client
+    )
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(
+        calendar_recurrence_horizon_days=28, calendar_recurrence_max_occurrences=50
+    )
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    now = datetime(2099, 1, 5, 12, 0, tzinfo=UTC)
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-5")
+        session.add(user)
+        session.flush()
+        email = Email(user_id=user.id, gmail_message_id="msg-5")
+        session.add(email)
+        session.commit()
+
+        rows = detect_ics_invites(session, settings, crypto, user.id, email.id, now=now)
+        payloads = {
+            (row.payload["ical_uid"], row.payload.get("recurrence_id")): row.payload
+            for row in rows
+        }
+
+        standup = payloads[("standup-1", None)]
+        # EST, so 09:00 New York is 14:00 UTC; the 12th is excluded and the
+        # 19th is replaced by its override.
+        assert standup["start"] == "2099-01-05T14:00:00+00:00"
+        assert standup["recurrence"] == {
+            "rules": ["FREQ=WEEKLY;BYDAY=MO"],
+            "occurrences": [
+                ["2099-01-05T14:00:00+00:00", "2099-01-05T14:30:00+00:00"],
+                ["2099-01-26T14:00:00+00:00", "2099-01-26T14:30:00+00:00"],
+            ],
+            "truncated": False,
+        }
+        moved = payloads[("standup-1", "2099-01-19T14:00:00+00:00")]
+        assert moved["start"] == "2099-01-19T16:00:00+00:00"
+        assert "recurrence" not in moved
+
+        flood = payloads[("flood-1", None)]["recurrence"]
+        assert flood["truncated"] is True
+        assert len(flood["occurrences"]) == 50
+        assert flood["occurrences"][0][0] == "2099-01-05T00:00:00+00:00"
+        assert payloads[("never-1", None)]["recurrence"]["occurrences"] == []
+
+        before = metrics.snapshot()["counters"]
+        detect_ics_invites(session, settings, crypto, user.id, email.id, now=now)
+        after = metrics.snapshot()["counters"]
+        hits = 'recurrence_cache_total{outcome="hit"}'
+        assert after.get(hits, 0) - before.get(hits, 0) == 3
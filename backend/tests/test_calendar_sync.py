@@ -0,0 +1,291 @@
+"""Tests for the local calendar mirror."""
+
+from datetime import UTC, datetime
+
+import httplib2
+from googleapiclient.errors import HttpError
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import Settings
+from app.crypto import LocalDevCrypto
+from app.db import Base
+from app.models import (
+    CalendarCandidate,
+    CalendarEventMirror,
+    CalendarSyncState,
+    Email,
+    User,
+)
+from app.services.calendar_events import accept_invite
+from app.services.calendar_sync import (
+    mirrored_busy,
+    sync_calendar,
+    user_for_channel,
+    watch_calendar,
+)
+from app.services.freebusy_cache import freebusy_cache
+from app.services.meeting_times import suggest_times
+
+CRYPTO = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+
+
+def _event(event_id, start, end, **extra):
+    return {
+        "id": event_id,
+        "status": "confirmed",
+        "start": {"dateTime": f"2099-01-05T{start}:00+00:00"},
+        "end": {"dateTime": f"2099-01-05T{end}:00+00:00"},
+        **extra,
+    }
+
+
+class FakeSyncClient:
+    def __init__(self):
+        # Keyed by the sync token a request carries (None for a full sync).
+        self.pages = {}
+        self.expired_tokens = set()
+        self.calls = []
+
+    def sync_events(
+        self, calendar_id, sync_token=None, page_token=None, time_min=None, **kwargs
+    ):
+        self.calls.append(("sync_events", sync_token, page_token))
+        if sync_token in self.expired_tokens:
+            raise HttpError(httplib2.Response({"status": 410}), b"Gone")
+        return self.pages[(sync_token, page_token)]
+
+    def watch_events(self, calendar_id, channel_id, address, token, ttl_s=None):
+        self.calls.append(("watch_events", channel_id, address))
+        return {"id": channel_id, "resourceId": "res-1", "expiration": "4070908800000"}
+
+    def stop_channel(self, channel_id, resource_id):
+        self.calls.append(("stop_channel", channel_id))
+
+    def freebusy_query(self, *args, **kwargs):
+        raise AssertionError("availability should come from the mirror")
+
+    def list_events(self, *args, **kwargs):
+        raise AssertionError("invite lookup should come from the mirror")
+
+    def patch_event(self, calendar_id, event_id, event_body, send_updates="all"):
+        self.calls.append(("patch_event", event_id))
+        return {
+            "id": event_id,
+            "iCalUID": "invite-123",
+            "status": "confirmed",
+            "start": {"dateTime": "2099-01-05T13:00:00+00:00"},
+            "end": {"dateTime": "2099-01-05T14:00:00+00:00"},
+            **event_body,
+        }
+
+
+def _session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_sync_calendar_applies_incremental_changes_and_resyncs_on_410():
+    session = _session()
+    settings = Settings()
+    user = User(email="user@example.com", google_sub="sub-1")
+    session.add(user)
+    session.commit()
+
+    client = FakeSyncClient()
+    client.pages[(None, None)] = {
+        "items": [_event("evt-1", "09:00", "10:00")],
+        "nextPageToken": "page-2",
+    }
+    client.pages[(None, "page-2")] = {
+        "items": [
+            _event("evt-2", "11:00", "12:00", transparency="transparent"),
+            _event(
+                "evt-3",
+                "14:00",
+                "15:00",
+                attendees=[{"email": "user@example.com", "self": True}],
+            ),
+        ],
+        "nextSyncToken": "token-1",
+    }
+    client.pages[("token-1", None)] = {
+        "items": [
+            {"id": "evt-1", "status": "cancelled"},
+            _event(
+                "evt-3",
+                "14:00",
+                "15:00",
+                attendees=[
+                    {
+                        "email": "user@example.com",
+                        "self": True,
+                        "responseStatus": "declined",
+                    }
+                ],
+            ),
+            _event("evt-4", "16:00", "16:30"),
+        ],
+        "nextSyncToken": "token-2",
+    }
+
+    window = (datetime(2099, 1, 5, tzinfo=UTC), datetime(2099, 1, 6, tzinfo=UTC))
+    first = sync_calendar(session, settings, CRYPTO, user.id, client=client)
+    assert (first.fetched, first.full_sync) == (3, True)
+    assert [start.hour for start, _ in mirrored_busy(session, user.id, *window)] == [
+        9,
+        14,
+    ]
+
+    # The first full sync also opens the push channel.
+    assert [call[0] for call in client.calls].count("watch_events") == 1
+    assert session.execute(select(CalendarSyncState)).scalar_one().channel_id
+
+    second = sync_calendar(session, settings, CRYPTO, user.id, client=client)
+    assert (second.upserted, second.deleted, second.full_sync) == (2, 1, False)
+    assert [start.hour for start, _ in mirrored_busy(session, user.id, *window)] == [16]
+
+    client.expired_tokens.add("token-2")
+    client.pages[(None, None)] = {
+        "items": [_event("evt-5", "08:00", "08:30")],
+        "nextSyncToken": "token-3",
+    }
+    third = sync_calendar(session, settings, CRYPTO, user.id, client=client)
+    assert third.full_sync is True
+    assert [call[0] for call in client.calls].count("watch_events") == 1
+    event_ids = session.execute(select(CalendarEventMirror.event_id)).scalars().all()
+    assert event_ids == ["evt-5"]
+    state = session.execute(select(CalendarSyncState)).scalar_one()
+    assert state.sync_token == "token-3"
+
+
+def test_all_day_events_block_the_calendar_zone_day():
+    session = _session()
+    user = User(email="user@example.com", google_sub="sub-1")
+    session.add(user)
+    session.commit()
+
+    client = FakeSyncClient()
+    client.pages[(None, None)] = {
+        "timeZone": "America/New_York",
+        "items": [
+            {
+                "id": "offsite",
+                "status": "confirmed",
+                "start": {"date": "2099-01-05"},
+                "end": {"date": "2099-01-06"},
+            },
+            {
+                "id": "tokyo-day",
+                "status": "confirmed",
+                "start": {"date": "2099-01-07", "timeZone": "Asia/Tokyo"},
+                "end": {"date": "2099-01-08", "timeZone": "Asia/Tokyo"},
+            },
+        ],
+        "nextSyncToken": "token-1",
+    }
+    sync_calendar(session, Settings(), CRYPTO, user.id, client=client)
+
+    window = (datetime(2099, 1, 1, tzinfo=UTC), datetime(2099, 1, 10, tzinfo=UTC))
+    assert mirrored_busy(session, user.id, *window) == [
+        (datetime(2099, 1, 5, 5, tzinfo=UTC), datetime(2099, 1, 6, 5, tzinfo=UTC)),
+        (datetime(2099, 1, 6, 15, tzinfo=UTC), datetime(2099, 1, 7, 15, tzinfo=UTC)),
+    ]
+    assert session.execute(select(CalendarSyncState)).scalar_one().time_zone == (
+        "America/New_York"
+    )
+
+
+def test_mirror_answers_availability_and_invite_lookup_without_api_reads():
+    session = _session()
+    settings = Settings()
+    freebusy_cache.clear()
+    user = User(email="user@example.com", google_sub="sub-1")
+    session.add(user)
+    session.flush()
+    email = Email(user_id=user.id, gmail_message_id="msg-1", subject="Invite")
+    session.add(email)
+    session.flush()
+    range_candidate = CalendarCandidate(
+        user_id=user.id,
+        email_id=email.id,
+        payload={
+            "type": "DATE_RANGE",
+            "start": "2099-01-05T09:00:00+00:00",
+            "end": "2099-01-05T10:30:00+00:00",
+        },
+        status="PROPOSED",
+    )
+    invite = CalendarCandidate(
+        user_id=user.id,
+        email_id=email.id,
+        payload={
+            "type": "INVITE",
+            "start": "2099-01-05T13:00:00+00:00",
+            "end": "2099-01-05T14:00:00+00:00",
+            "ical_uid": "invite-123",
+        },
+        status="PROPOSED",
+    )
+    session.add_all([range_candidate, invite])
+    session.commit()
+
+    client = FakeSyncClient()
+    client.pages[(None, None)] = {
+        "items": [
+            _event("evt-1", "09:00", "09:20"),
+            _event(
+                "evt-invite",
+                "13:00",
+                "14:00",
+                iCalUID="invite-123",
+                attendees=[{"email": "user@example.com", "self": True}],
+            ),
+        ],
+        "nextSyncToken": "token-1",
+    }
+    sync_calendar(session, settings, CRYPTO, user.id, client=client)
+
+    suggestions = suggest_times(
+        session,
+        settings,
+        CRYPTO,
+        user.id,
+        range_candidate.id,
+        duration_min=30,
+        client=client,
+    )
+    assert [slot.start.strftime("%H:%M") for slot in suggestions] == [
+        "09:30",
+        "09:45",
+        "10:00",
+    ]
+
+    record = accept_invite(session, settings, CRYPTO, user.id, invite.id, client=client)
+    assert record.event_id == "evt-invite"
+    assert ("patch_event", "evt-invite") in client.calls
+    mirrored = session.execute(
+        select(CalendarEventMirror).where(CalendarEventMirror.event_id == "evt-invite")
+    ).scalar_one()
+    assert mirrored.payload["attendees"][0]["responseStatus"] == "accepted"
+
+
+def test_watch_calendar_verifies_channel_tokens():
+    session = _session()
+    settings = Settings(api_base_url="https://api.example.com")
+    user = User(email="user@example.com", google_sub="sub-1")
+    session.add(user)
+    session.commit()
+    client = FakeSyncClient()
+
+    opened = watch_calendar(session, settings, CRYPTO, user.id, client=client)
+    again = watch_calendar(session, settings, CRYPTO, user.id, client=client)
+
+    state = session.execute(select(CalendarSyncState)).scalar_one()
+    assert again["status"] == "skipped"
+    assert client.calls[0][2] == "https://api.example.com/webhooks/calendar/push"
+    assert opened["channel_id"] == state.channel_id
+    assert user_for_channel(session, state.channel_id, state.channel_token) == user.id
+    assert user_for_channel(session, state.channel_id, "forged") is None
+    assert user_for_channel(session, "unknown", state.channel_token) is None
@@ -1,15 +1,20 @@
 """Tests for digest generation."""
 
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from types import SimpleNamespace
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, select
 from sqlalchemy.orm import sessionmaker
 
 from app.config import Settings
 from app.db import Base
-from app.models import Email, EmailTriage, User
+from app.models import Alert, Digest, Email, EmailTriage, User
 from app.services.digest import generate_daily_digest
+from app.services.digest_store import (
+    hydrate_digest,
+    open_digest,
+    upsert_digest_entry,
+)
 
 
 def test_generate_daily_digest_groups_sections():
@@ -74,11 +79,10 @@ def test_generate_daily_digest_groups_sections():
             now=datetime(2099, 1, 5, tzinfo=UTC),
         )
 
-        content = digest.content_json or {}
-        sections = content.get("sections", {})
-        assert len(sections.get("needs_reply", [])) == 1
-        assert len(sections.get("important_fyi", [])) == 1
-        assert len(sections.get("everything_else", [])) == 1
+        sections = digest.content_json["sections"]
+        assert sections["needs_reply"]["ids"] == [email_reply.id]
+        assert sections["important_fyi"]["ids"] == [email_fyi.id]
+        assert sections["everything_else"]["ids"] == [email_other.id]
 
 
 def test_generate_daily_digest_reports_cap_hit(monkeypatch):
@@ -127,3 +131,253 @@ def test_generate_daily_digest_reports_cap_hit(monkeypatch):
         content = digest.content_json or {}
         assert content.get("triage_cap") == 1
         assert content.get("triage_cap_hit") is True
+
+
+def test_generate_daily_digest_query_count_is_independent_of_email_count():
+    def count_queries(email_count: int) -> tuple[int, dict]:
+        engine = create_engine("sqlite+pysqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        SessionLocal = sessionmaker(bind=engine)
+        with SessionLocal() as session:
+            user = User(email="user@example.com", google_sub="sub-3")
+            session.add(user)
+            session.flush()
+            for index in range(email_count):
+                email = Email(
+                    user_id=user.id,
+                    gmail_message_id=f"msg-{index}",
+                    subject=f"Email {index}",
+                    from_email=f"vip{index % 2}@example.com",
+                    internal_date_ts=datetime(2099, 1, 2, tzinfo=UTC),
+                )
+                session.add(email)
+                session.flush()
+                session.add(
+                    EmailTriage(
+                        user_id=user.id,
+                        email_id=email.id,
+                        importance_label="HIGH",
+                        needs_response=index % 2 == 0,
+                        reasoning={"why_important": "VIP"},
+                    )
+                )
+                session.add(
+                    Alert(
+                        user_id=user.id,
+                        email_id=email.id,
+                        created_at=datetime(2099, 1, 2, tzinfo=UTC),
+                    )
+                )
+            session.commit()
+            user_id = user.id
+
+        statements = []
+        event.listen(
+            engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+        )
+        with SessionLocal() as session:
+            digest = generate_daily_digest(
+                session,
+                Settings(openai_api_key="test-key"),
+                user_id,
+                datetime(2099, 1, 1, tzinfo=UTC),
+                max_triage=0,
+                now=datetime(2099, 1, 5, tzinfo=UTC),
+            )
+            return len(statements), hydrate_digest(session, digest)
+
+    few_queries, few = count_queries(2)
+    many_queries, many = count_queries(20)
+
+    assert few_queries == many_queries
+    assert many["counts"]["needs_reply"] == 10
+    assert many["counts"]["important_fyi"] == 10
+    assert many["vip_count"] == 20
+    assert many["vip_senders"] == ["vip0@example.com", "vip1@example.com"]
+    assert few["sections"]["needs_reply"][0]["why_important"] == "VIP"
+
+
+def test_digest_entries_are_maintained_incrementally():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    settings = Settings(openai_api_key="test-key")
+    now = datetime(2099, 1, 5, 7, tzinfo=UTC)
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-4")
+        session.add(user)
+        session.flush()
+        open_digest(session, user.id, now, since_ts=datetime(2099, 1, 1, tzinfo=UTC))
+
+        old = Email(
+            user_id=user.id,
+            gmail_message_id="msg-old",
+            subject="Before the window",
+            internal_date_ts=datetime(2098, 12, 31, tzinfo=UTC),
+        )
+        first = Email(
+            user_id=user.id,
+            gmail_message_id="msg-1",
+            subject="First",
+            internal_date_ts=datetime(2099, 1, 2, tzinfo=UTC),
+        )
+        second = Email(
+            user_id=user.id,
+            gmail_message_id="msg-2",
+            subject="Second",
+            internal_date_ts=datetime(2099, 1, 3, tzinfo=UTC),
+        )
+        session.add_all([old, first, second])
+        session.flush()
+        for email in (old, first, second):
+            upsert_digest_entry(session, email)
+        triage = EmailTriage(
+            user_id=user.id,
+            email_id=first.id,
+            importance_label="HIGH",
+            needs_response=True,
+            reasoning={"why_important": "Asked a question"},
+        )
+        session.add(triage)
+        upsert_digest_entry(session, first, triage)
+        first.subject = "First (edited)"
+        upsert_digest_entry(session, first)
+        session.commit()
+
+        content = hydrate_digest(session, open_digest(session, user.id))
+        assert content["counts"] == {
+            "needs_reply": 1,
+            "important_fyi": 0,
+            "newsletters": 0,
+            "everything_else": 1,
+        }
+        entry = content["sections"]["needs_reply"][0]
+        assert (entry["subject"], entry["why_important"]) == (
+            "First (edited)",
+            "Asked a question",
+        )
+
+        statements = []
+
+        def record(*args):
+            statements.append(args[2])
+
+        event.listen(engine, "before_cursor_execute", record)
+        digest = generate_daily_digest(
+            session, settings, user.id, max_triage=0, now=now
+        )
+        event.remove(engine, "before_cursor_execute", record)
+        # Publishing reads the materialized state, not the email window.
+        assert not any("email_triage" in statement for statement in statements)
+        assert digest.digest_date == now.date()
+        assert digest.content_json["triage_cap_hit"] is True
+        assert digest.content_json["sections"]["everything_else"]["ids"] == [second.id]
+
+        later = Email(
+            user_id=user.id,
+            gmail_message_id="msg-3",
+            subject="After publishing",
+            internal_date_ts=now + timedelta(hours=1),
+        )
+        session.add(later)
+        session.flush()
+        upsert_digest_entry(session, later, now=now + timedelta(hours=1))
+        session.commit()
+        next_digest = open_digest(session, user.id)
+        assert next_digest.id != digest.id
+        assert next_digest.content_json["since_ts"] == now.isoformat()
+        assert next_digest.content_json["counts"]["everything_else"] == 1
+
+        republished = generate_daily_digest(
+            session, settings, user.id, max_triage=0, now=now + timedelta(hours=2)
+        )
+        dated = session.execute(select(Digest)).scalars().all()
+        assert [item.id for item in dated] == [republished.id]
+
+
+def test_hydrate_digest_pages_sections_newest_first():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    user = User(email="user@example.com", google_sub="sub-5")
+    session.add(user)
+    session.flush()
+    digest = open_digest(
+        session,
+        user.id,
+        datetime(2099, 1, 5, tzinfo=UTC),
+        since_ts=datetime(2099, 1, 1, tzinfo=UTC),
+    )
+    emails = []
+    # Ingested out of order; entries are kept sorted by date.
+    for day in (3, 1, 4, 2):
+        email = Email(
+            user_id=user.id,
+            gmail_message_id=f"msg-{day}",
+            subject=f"Day {day}",
+            snippet="x" * 200,
+            internal_date_ts=datetime(2099, 1, day, 12, tzinfo=UTC),
+        )
+        session.add(email)
+        session.flush()
+        upsert_digest_entry(session, email)
+        emails.append(email)
+    session.commit()
+
+    stored = digest.content_json["sections"]["everything_else"]
+    assert "subject" not in str(digest.content_json)
+    assert stored["ts"] == sorted(stored["ts"])
+
+    page = hydrate_digest(session, digest, "everything_else", limit=2, offset=1)
+    assert [item["subject"] for item in page["sections"]["everything_else"]] == [
+        "Day 3",
+        "Day 2",
+    ]
+    assert list(page["sections"]) == ["everything_else"]
+    assert page["counts"]["everything_else"] == 4
+    assert "pending" not in page
+    assert "index" not in page
+
+
+def test_digest_entries_move_through_the_index():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    user = User(email="user@example.com", google_sub="sub-6")
+    session.add(user)
+    session.flush()
+    digest = open_digest(
+        session,
+        user.id,
+        datetime(2099, 1, 5, tzinfo=UTC),
+        since_ts=datetime(2099, 1, 1, tzinfo=UTC),
+    )
+    emails = []
+    for day in (1, 2, 3):
+        email = Email(
+            user_id=user.id,
+            gmail_message_id=f"msg-{day}",
+            internal_date_ts=datetime(2099, 1, day, tzinfo=UTC),
+        )
+        session.add(email)
+        session.flush()
+        upsert_digest_entry(session, email)
+        emails.append(email)
+    content = digest.content_json
+    assert content["index"][str(emails[1].id)] == [
+        "everything_else",
+        "2099-01-02T00:00:00+00:00",
+    ]
+
+    # Digests stored before the index existed get it rebuilt on first use.
+    del content["index"]
+    triage = SimpleNamespace(needs_response=False, importance_label="LOW")
+    upsert_digest_entry(session, emails[1], triage)
+
+    sections = content["sections"]
+    assert sections["newsletters"]["ids"] == [emails[1].id]
+    assert sections["everything_else"]["ids"] == [emails[0].id, emails[2].id]
+    assert content["pending"] == [emails[0].id, emails[2].id]
+    assert content["index"][str(emails[1].id)][0] == "newsletters"
+    assert set(content["index"]) == {str(email.id) for email in emails}
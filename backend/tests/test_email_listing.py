@@ -0,0 +1,127 @@
+"""Tests for keyset-paginated email listing."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Email, EmailTriage, User
+from app.routes.emails import list_emails
+from app.services.email_listing import (
+    InvalidCursorError,
+    decode_cursor,
+    list_email_page,
+)
+
+
+def _session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def test_list_email_page_walks_dated_then_undated_emails():
+    engine, session = _session()
+    user = User(email="a@example.com", google_sub="sub-a")
+    session.add(user)
+    session.flush()
+    base = datetime(2024, 1, 1, tzinfo=UTC)
+    same_time = base + timedelta(hours=5)
+    for index in range(7):
+        email = Email(
+            user_id=user.id,
+            gmail_message_id=f"msg-{index}",
+            # Two emails share a timestamp, two have none.
+            internal_date_ts=(
+                None
+                if index >= 5
+                else same_time if index in (3, 4) else base + timedelta(hours=index)
+            ),
+            label_ids=["INBOX"],
+        )
+        session.add(email)
+        session.flush()
+        session.add(
+            EmailTriage(
+                user_id=user.id,
+                email_id=email.id,
+                importance_label="HIGH",
+                reasoning={"why_important": f"reason {index}"},
+            )
+        )
+    session.commit()
+
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        page = list_email_page(session, user.id, "all", 3, cursor)
+        seen += [item["gmail_message_id"] for item in page.items]
+        pages += 1
+        if page.next_cursor is None:
+            break
+        cursor = decode_cursor(page.next_cursor)
+
+    assert seen == [
+        "msg-4",
+        "msg-3",
+        "msg-2",
+        "msg-1",
+        "msg-0",
+        "msg-6",
+        "msg-5",
+    ]
+    assert pages == 3
+    # At most two queries per page (dated range, then undated range): no N+1.
+    assert len(statements) <= 2 * pages
+    first = list_email_page(session, user.id, "all", 1).items[0]
+    assert first["importance_label"] == "HIGH"
+    assert first["why_important"] == "reason 4"
+
+
+def test_inbox_filter_uses_maintained_flag():
+    _, session = _session()
+    user = User(email="a@example.com", google_sub="sub-a")
+    session.add(user)
+    session.flush()
+    inbox = Email(user_id=user.id, gmail_message_id="inbox", label_ids=["INBOX"])
+    archived = Email(user_id=user.id, gmail_message_id="archived", label_ids=[])
+    session.add_all([inbox, archived])
+    session.commit()
+
+    assert inbox.in_inbox is True
+    assert archived.in_inbox is False
+    page = list_email_page(session, user.id, "inbox", 10)
+    assert [item["gmail_message_id"] for item in page.items] == ["inbox"]
+
+    inbox.label_ids = ["CATEGORY_UPDATES"]
+    archived.label_ids = ["INBOX", "UNREAD"]
+    session.commit()
+    page = list_email_page(session, user.id, "inbox", 10)
+    assert [item["gmail_message_id"] for item in page.items] == ["archived"]
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
+
+
+def test_list_emails_rejects_offset_paging():
+    _, session = _session()
+    user = User(email="user@example.com", google_sub="sub-1")
+    session.add(user)
+    session.commit()
+
+    with pytest.raises(HTTPException) as excinfo:
+        list_emails(
+            Response(), user, session, filter="inbox", limit=50, cursor=None, offset=50
+        )
+    assert excinfo.value.status_code == 400
@@ -1,10 +1,16 @@
 """Tests for Gmail message parsing."""
 
+import base64
 import json
 from io import BytesIO
 from pathlib import Path
 
-from app.services.email_parser import parse_message
+from app.services.email_parser import (
+    _html_to_text,
+    _html_to_text_soup,
+    detect_reply_layout,
+    parse_message,
+)
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
@@ -30,6 +36,147 @@ def test_parse_html_email():
     assert parsed.clean_body_text == "Hi there"
 
 
+def test_parse_message_decodes_only_the_selected_body(monkeypatch):
+    from app.services import email_parser
+
+    def encode(text: str) -> str:
+        return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+    decoded = []
+    original = email_parser._decode_base64url
+
+    def tracking_decode(data: str) -> str:
+        decoded.append(data)
+        return original(data)
+
+    monkeypatch.setattr(email_parser, "_decode_base64url", tracking_decode)
+    message = {
+        "payload": {
+            "mimeType": "multipart/mixed",
+            "parts": [
+                {
+                    "mimeType": "multipart/alternative",
+                    "parts": [
+                        {"mimeType": "text/plain", "body": {"data": encode("Plain")}},
+                        {"mimeType": "text/html", "body": {"data": encode("<p>H")}},
+                    ],
+                },
+                {"mimeType": "image/png", "body": {"data": encode("png-bytes")}},
+                {
+                    "mimeType": "application/pdf",
+                    "filename": "a.pdf",
+                    "body": {"attachmentId": "att-1", "size": 10},
+                },
+            ],
+        }
+    }
+
+    parsed = parse_message(message)
+
+    assert parsed.clean_body_text == "Plain"
+    assert decoded == [encode("Plain")]
+    assert [item.attachment_id for item in parsed.attachments] == ["att-1"]
+
+
+def test_html_to_text_drops_hidden_content_and_keeps_blocks():
+    html = (
+        "<html><head><title>Promo</title><style>p {color: red}</style></head>"
+        '<body><div style="display: none">Preheader <div>nested</div> text</div>'
+        "<P>Hello&nbsp;<b>there</b>,\n  friend</P><span hidden>secret</span>"
+        "<table><tr><td>Cell A</td><td>Cell &amp; B</td></tr></table>"
+        "Line one<br/>Line two<!-- note --><script>var x = '<p>no</p>';</script>"
+        "</body></html>"
+    )
+
+    text = _html_to_text(html)
+
+    assert text == "Hello there, friend\nCell A\nCell & B\nLine one\nLine two"
+    assert text == _html_to_text_soup(html)
+
+
+def test_html_to_text_falls_back_for_unclosed_hidden_element(monkeypatch):
+    calls = []
+
+    def fake_soup(html):
+        calls.append(html)
+        return "fallback"
+
+    monkeypatch.setattr("app.services.email_parser._html_to_text_soup", fake_soup)
+
+    assert _html_to_text("<p>Visible</p><div hidden>never closed") == "fallback"
+    assert _html_to_text("<p>Visible</p>") == "Visible"
+    assert len(calls) == 1
+
+
+MALFORMED_HTML = [
+    ("<p class=x'y>A</p><p>B</p><p>it's</p>", "A\nB\nit's"),
+    (
+        "<table><tr><td width=100'>Price list</td></tr></table><p>Don't miss it</p>",
+        "Price list\nDon't miss it",
+    ),
+    ("<p title='a<b'>T</p>", "T"),
+    ("<p>a<![CDATA[x &amp; y]]>z</p>", "ax &amp; yz"),
+]
+
+
+def test_html_to_text_matches_soup_on_malformed_markup():
+    for html, expected in MALFORMED_HTML:
+        assert _html_to_text(html) == expected
+        assert _html_to_text_soup(html) == expected
+
+
+def test_html_to_text_falls_back_for_runaway_tags(monkeypatch):
+    monkeypatch.setattr(
+        "app.services.email_parser._html_to_text_soup", lambda html: "fallback"
+    )
+
+    assert _html_to_text("<p class=x'y>A</p><p>it's</p>") == "fallback"
+    assert _html_to_text(f'<p title="{"x" * 9000}">A</p>') == "fallback"
+    assert _html_to_text("<p title = 'it'>ok</p><a href=x?a=1>y</a>") == "ok\ny"
+
+
+def test_detect_reply_layout_returns_offsets():
+    text = "Hi Sam\n> inline quote\nSee notes\nThanks,\nAlex\nOn Tue, Sam wrote:\n> old"
+
+    layout = detect_reply_layout(text)
+
+    assert layout.quote_start == text.index("On Tue")
+    assert layout.signature_start == text.index("Thanks,")
+    assert layout.body_end == layout.signature_start
+    assert [text[start:end] for start, end in layout.quoted_lines] == [
+        "> inline quote\n"
+    ]
+
+
+def test_detect_reply_layout_recognizes_client_headers():
+    bodies = [
+        "Hallo\n\nAm 02.01.2024 um 10:00 schrieb Max <max@example.de>:\n> alt",
+        "Bonjour\nLe mar. 2 janv. 2024 à 10:00, Jean <j@example.fr> a écrit :\n> x",
+        "Hola\nEl mar, 2 ene 2024 a las 10:00, Ana (<ana@example.es>) escribió:\nx",
+        "Hi\nOn 2 Jan 2024, at 10:00, Alex <alex@example.com> wrote:\n\n> x",
+        "Hi\nOn Tue, Jan 2, 2024 at 10:00 AM Alexandra Longname <alex@example.com>\n"
+        "wrote:\n> x",
+        "Hi\n\n________________________________\nFrom: Alex <alex@example.com>\n"
+        "Sent: Tuesday, January 2, 2024 10:00 AM\nTo: Sam\n\nold",
+        "Hi\nVon: Max <max@example.de>\nGesendet: Dienstag, 2. Januar 2024\nold",
+        "Hi\n-----Ursprüngliche Nachricht-----\nold",
+    ]
+
+    for body in bodies:
+        layout = detect_reply_layout(body)
+        assert layout.quote_start is not None, body
+        assert body[: layout.body_end].strip() in {"Hi", "Hallo", "Bonjour", "Hola"}
+
+
+def test_detect_reply_layout_signature_rules():
+    assert detect_reply_layout("Thanksgiving plans\nok").signature_start is None
+    long_tail = "Thanks for the notes.\n" + "\n".join(["more"] * 5)
+    assert detect_reply_layout(long_tail).signature_start is None
+    delimited = "Body\n-- \nAlex\nTitle\nCompany\nPhone\nAddress"
+    assert detect_reply_layout(delimited).body_end == len("Body\n")
+    assert detect_reply_layout("Body\nMit freundlichen Grüßen\nMax").body_end == 5
+
+
 def test_docx_extraction():
     from docx import Document
 
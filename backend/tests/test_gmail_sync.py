@@ -158,6 +158,7 @@ def test_full_sync_inbox_paginates():
 
         emails = session.execute(select(Email)).scalars().all()
         assert len(emails) == 2
+        assert all(email.in_inbox for email in emails)
 
 
 def test_incremental_sync_ingests_history_messages():
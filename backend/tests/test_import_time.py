@@ -0,0 +1,39 @@
+"""Heavy packages stay out of the API process until first use.
+
+The wall-clock import budget lives in ``benchmarks/startup.py``.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Loaded on first use; importing any of them at boot is a regression.
+LAZY_PACKAGES = {"dateparser", "docx", "fitz", "icalendar", "openai"}
+
+
+def _imported_modules(module: str) -> set[str]:
+    """Modules loaded by importing ``module``, from ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules.add(name.strip())
+    return modules
+
+
+def test_api_import_skips_heavy_packages():
+    modules = _imported_modules("app.main_api")
+
+    loaded = {name.split(".")[0] for name in modules} & LAZY_PACKAGES
+    assert "app.main_api" in modules
+    assert not loaded, f"imported at API startup: {sorted(loaded)}"
@@ -20,7 +20,7 @@ def test_llm_client_fallback_chat(monkeypatch):
         def __init__(self, api_key: str):
             self.chat = SimpleNamespace(completions=DummyChatCompletions())
 
-    monkeypatch.setattr(llm_module, "OpenAI", DummyOpenAI)
+    monkeypatch.setattr("openai.OpenAI", DummyOpenAI)
     settings = Settings(openai_api_key="test-key")
     client = llm_module.LLMClient(settings)
     schema = {
@@ -1,6 +1,7 @@
 """Tests for meeting time suggestions."""
 
 from datetime import UTC, datetime
+from itertools import islice
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -9,7 +10,10 @@ from app.config import Settings
 from app.crypto import LocalDevCrypto
 from app.db import Base
 from app.models import CalendarCandidate, Email, User, UserPreferences
-from app.services.meeting_times import suggest_times
+from app.services.calendar_events import create_event
+from app.services.freebusy_cache import FreeBusyCache, freebusy_cache
+from app.services.intervals import BusyIndex
+from app.services.meeting_times import _generate_suggestions, suggest_times
 
 
 class FakeCalendarClient:
@@ -26,6 +30,7 @@ def test_suggest_times_respects_busy_and_lunch():
     Base.metadata.create_all(engine)
 
     settings = Settings()
+    freebusy_cache.clear()
     crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
 
     with SessionLocal() as session:
@@ -87,3 +92,319 @@ def test_suggest_times_respects_busy_and_lunch():
         stored = session.get(CalendarCandidate, candidate.id)
         payload = stored.payload or {}
         assert payload.get("suggested_times")
+
+
+def test_generate_suggestions_merges_busy_once_and_stops_at_limit():
+    window_start = datetime(2099, 1, 5, 8, 0, 30, tzinfo=UTC)
+    window_end = datetime(2099, 2, 4, tzinfo=UTC)
+    working_hours = {
+        "days": ["mon", "tue", "wed", "thu", "fri"],
+        "start_time": "09:00",
+        "end_time": "12:00",
+        "lunch_enabled": True,
+        "lunch_start": "10:00",
+        "lunch_end": "10:30",
+    }
+    busy = [
+        (
+            datetime(2099, 1, 5, 9, 0, tzinfo=UTC),
+            datetime(2099, 1, 5, 9, 20, tzinfo=UTC),
+        ),
+        (
+            datetime(2099, 1, 5, 9, 10, tzinfo=UTC),
+            datetime(2099, 1, 5, 9, 25, tzinfo=UTC),
+        ),
+        (
+            datetime(2099, 1, 5, 11, 20, tzinfo=UTC),
+            datetime(2099, 1, 6, 11, 0, 20, tzinfo=UTC),
+        ),
+    ]
+
+    slots = _generate_suggestions(window_start, window_end, busy, working_hours, 30)
+    first = [
+        (slot.start.strftime("%d %H:%M"), slot.end.strftime("%H:%M"))
+        for slot in islice(slots, 4)
+    ]
+
+    # 09:35 is after the merged 09:00-09:25 block plus buffer; lunch with its
+    # buffer blocks 09:50-10:40; the overnight event blocks until 11:11 on the 6th.
+    assert first == [
+        ("05 10:40", "11:10"),
+        ("06 11:11", "11:41"),
+        ("06 11:26", "11:56"),
+        ("07 09:00", "09:30"),
+    ]
+    assert BusyIndex([(5, 10), (0, 3), (3, 4)]).intervals == [(0, 4), (5, 10)]
+    assert list(BusyIndex([(5, 10)]).free_gaps(0, 20)) == [(0, 5), (10, 20)]
+
+
+class FakeMultiCalendarClient:
+    def __init__(self, busy_by_calendar):
+        self._busy = busy_by_calendar
+        self.queried = []
+
+    def freebusy_query(self, time_min, time_max, calendar_ids=None):
+        self.queried.append(list(calendar_ids))
+        calendars = {}
+        for calendar_id in calendar_ids:
+            if calendar_id in self._busy:
+                calendars[calendar_id] = {"busy": self._busy[calendar_id]}
+            else:
+                calendars[calendar_id] = {"errors": [{"reason": "notFound"}]}
+        return {"calendars": calendars}
+
+    def create_event(self, calendar_id, event_body, send_updates="all"):
+        return {"id": "evt-1"}
+
+
+def test_suggest_times_scores_slots_by_attendee_availability():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    settings = Settings()
+    freebusy_cache.clear()
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    visible = [f"colleague{index}@example.com" for index in range(59)]
+
+    def busy(start, end):
+        return [
+            {
+                "start": f"2099-01-05T{start}:00+00:00",
+                "end": f"2099-01-05T{end}:00+00:00",
+            }
+        ]
+
+    busy_by_calendar = {"primary": [], **{address: [] for address in visible}}
+    # Slots before 09:30 and the 09:45 slot each miss two colleagues; 09:30,
+    # 10:00 and 10:15 miss one; everyone is free from 10:30.
+    busy_by_calendar[visible[0]] = busy("09:00", "10:00")
+    busy_by_calendar[visible[1]] = busy("10:00", "10:30")
+    busy_by_calendar[visible[2]] = busy("09:00", "09:30")
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        session.add(user)
+        session.flush()
+        email = Email(user_id=user.id, gmail_message_id="msg-1")
+        session.add(email)
+        session.flush()
+        session.add(
+            UserPreferences(
+                user_id=user.id,
+                preferences={
+                    "working_hours": {
+                        "days": ["mon"],
+                        "start_time": "09:00",
+                        "end_time": "11:30",
+                    },
+                },
+            )
+        )
+        candidate = CalendarCandidate(
+            user_id=user.id,
+            email_id=email.id,
+            payload={
+                "type": "DATE_RANGE",
+                "start": "2099-01-05T09:00:00+00:00",
+                "end": "2099-01-05T11:30:00+00:00",
+                "attendees": ["User@example.com", "hidden@example.net", *visible],
+            },
+            status="PROPOSED",
+        )
+        session.add(candidate)
+        session.commit()
+
+        client = FakeMultiCalendarClient(busy_by_calendar)
+        suggestions = suggest_times(
+            session,
+            settings,
+            crypto,
+            user.id,
+            candidate.id,
+            duration_min=30,
+            client=client,
+        )
+
+        assert [len(chunk) for chunk in client.queried] == [50, 11]
+        assert "user@example.com" not in client.queried[0]
+        assert [(slot.start.strftime("%H:%M"), slot.score) for slot in suggestions] == [
+            ("10:30", 1.0),
+            ("10:45", 1.0),
+            ("11:00", 1.0),
+            ("09:30", 59 / 60),
+            ("10:00", 59 / 60),
+        ]
+        stored = session.get(CalendarCandidate, candidate.id).payload
+        assert stored["suggested_times"][0]["score"] == 1.0
+
+
+def test_suggest_times_reuses_cached_freebusy_until_an_event_is_created():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    settings = Settings()
+    freebusy_cache.clear()
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        session.add(user)
+        session.flush()
+        email = Email(user_id=user.id, gmail_message_id="msg-1")
+        session.add(email)
+        session.flush()
+        candidates = [
+            CalendarCandidate(
+                user_id=user.id,
+                email_id=email.id,
+                payload={
+                    "type": "DATE_RANGE",
+                    "start": f"2099-01-05T{start}:00+00:00",
+                    "end": "2099-01-05T17:00:00+00:00",
+                    "attendees": ["friend@example.com"],
+                },
+                status="PROPOSED",
+            )
+            for start in ("09:00", "13:00")
+        ]
+        session.add_all(candidates)
+        session.commit()
+
+        client = FakeMultiCalendarClient({"primary": [], "friend@example.com": []})
+        for candidate in candidates:
+            suggest_times(
+                session, settings, crypto, user.id, candidate.id, client=client
+            )
+        assert client.queried == [["primary", "friend@example.com"]]
+
+        create_event(
+            session, settings, crypto, user.id, candidates[0].id, client=client
+        )
+        suggest_times(
+            session, settings, crypto, user.id, candidates[1].id, client=client
+        )
+        assert len(client.queried) == 2
+
+
+def test_freebusy_cache_answers_sub_windows_until_expiry():
+    now = [0.0]
+    cache = FreeBusyCache(clock=lambda: now[0])
+    day = datetime(2099, 1, 5, tzinfo=UTC)
+
+    def at(hour):
+        return day.replace(hour=hour)
+
+    cache.put(
+        1,
+        "primary",
+        at(0),
+        at(23),
+        [(at(9), at(11)), (at(10), at(12)), (at(15), at(16))],
+        ttl_s=60,
+    )
+    cache.put(1, "hidden@example.com", at(0), at(23), None, ttl_s=60)
+
+    assert cache.get(1, "primary", at(8), at(14)) == (True, [(at(9), at(12))])
+    assert cache.get(1, "hidden@example.com", at(8), at(14)) == (True, None)
+    assert cache.get(1, "primary", at(8), day.replace(hour=23, minute=30))[0] is False
+    assert cache.get(2, "primary", at(8), at(14))[0] is False
+    now[0] = 61.0
+    assert cache.get(1, "primary", at(8), at(14))[0] is False
+
+
+def test_suggest_times_uses_every_occurrence_of_recurring_invites():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    SessionLocal = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    settings = Settings()
+    crypto = LocalDevCrypto("BB0iMhzIaIMZeMACaGkNykzlCaM3Ndoth7-vBeQiJ4U=")
+    occurrences = [
+        [f"2099-01-0{day}T11:00:00+00:00", f"2099-01-0{day}T11:30:00+00:00"]
+        for day in (5, 6)
+    ]
+
+    with SessionLocal() as session:
+        user = User(email="user@example.com", google_sub="sub-1")
+        session.add(user)
+        session.flush()
+        email = Email(user_id=user.id, gmail_message_id="msg-1")
+        session.add(email)
+        session.flush()
+        session.add(
+            UserPreferences(
+                user_id=user.id,
+                preferences={
+                    "working_hours": {
+                        "days": ["mon", "tue"],
+                        "start_time": "09:00",
+                        "end_time": "12:00",
+                    },
+                },
+            )
+        )
+        candidate = CalendarCandidate(
+            user_id=user.id,
+            email_id=email.id,
+            payload={
+                "type": "INVITE",
+                "start": "2099-01-05T11:00:00+00:00",
+                "end": "2099-01-05T11:30:00+00:00",
+                "recurrence": {
+                    "rules": ["FREQ=DAILY;BYDAY=MO,TU"],
+                    "occurrences": occurrences,
+                    "truncated": False,
+                },
+            },
+            status="PROPOSED",
+        )
+        session.add(candidate)
+        session.commit()
+
+        def proposed_first(busy):
+            freebusy_cache.clear()
+            suggestions = suggest_times(
+                session,
+                settings,
+                crypto,
+                user.id,
+                candidate.id,
+                duration_min=30,
+                client=FakeCalendarClient(busy),
+            )
+            return suggestions[0].start == datetime(2099, 1, 5, 11, tzinfo=UTC)
+
+        assert proposed_first([])
+        # Only the second occurrence clashes, which still rules the slot out.
+        tuesday = {"start": occurrences[1][0], "end": occurrences[1][1]}
+        assert not proposed_first([tuesday])
+
+        # The pending invite's occurrences also block time for other requests.
+        date_range = CalendarCandidate(
+            user_id=user.id,
+            email_id=email.id,
+            payload={
+                "type": "DATE_RANGE",
+                "start": "2099-01-06T10:00:00+00:00",
+                "end": "2099-01-06T12:00:00+00:00",
+            },
+            status="PROPOSED",
+        )
+        session.add(date_range)
+        session.commit()
+        freebusy_cache.clear()
+        suggestions = suggest_times(
+            session,
+            settings,
+            crypto,
+            user.id,
+            date_range.id,
+            duration_min=30,
+            client=FakeCalendarClient([]),
+        )
+        assert [slot.start.strftime("%H:%M") for slot in suggestions] == [
+            "10:00",
+            "10:15",
+        ]
@@ -0,0 +1,117 @@
+"""Tests for full-text search."""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Attachment, Email, EmailTriage, User
+from app.services.search import (
+    fts_query,
+    index_attachment,
+    index_email,
+    index_triage,
+    rebuild_search_index,
+    search_emails,
+)
+
+
+def _session():
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def _email(session, user, message_id, subject, body=None):
+    email = Email(
+        user_id=user.id,
+        gmail_message_id=message_id,
+        subject=subject,
+        clean_body_text=body,
+        label_ids=["INBOX"],
+    )
+    session.add(email)
+    session.flush()
+    index_email(session, email)
+    return email
+
+
+def test_search_matches_bodies_summaries_and_attachments():
+    session = _session()
+    user = User(email="a@example.com", google_sub="sub-a")
+    other = User(email="b@example.com", google_sub="sub-b")
+    session.add_all([user, other])
+    session.flush()
+
+    subject_hit = _email(session, user, "msg-subject", "Quarterly budget review")
+    _email(session, user, "msg-body", "Hello", "Notes on the budgets for next year.")
+    summary_hit = _email(session, user, "msg-summary", "Follow up")
+    triage = EmailTriage(
+        user_id=user.id, email_id=summary_hit.id, summary="Asks about the budget."
+    )
+    session.add(triage)
+    index_triage(session, triage)
+    attachment_hit = _email(session, user, "msg-attachment", "Files")
+    attachment = Attachment(
+        user_id=user.id,
+        email_id=attachment_hit.id,
+        filename="plan.txt",
+        extracted_text="Detailed budget spreadsheet",
+        extraction_status="OK",
+    )
+    session.add(attachment)
+    index_attachment(session, attachment)
+    _email(session, user, "msg-miss", "Lunch", "Tacos on Friday?")
+    _email(session, other, "msg-other", "Budget", "Someone else's budget")
+    session.commit()
+
+    results = search_emails(session, user.id, "budget", limit=10)
+
+    assert {item["gmail_message_id"]: item["matched_in"] for item in results} == {
+        "msg-subject": ["email"],
+        "msg-body": ["email"],
+        "msg-summary": ["summary"],
+        "msg-attachment": ["attachment"],
+    }
+    # Subject matches are weighted above body matches.
+    order = [item["gmail_message_id"] for item in results]
+    assert order.index("msg-subject") < order.index("msg-body")
+    assert all(item["rank"] > 0 for item in results)
+
+    page = search_emails(session, user.id, "budget", limit=2, offset=2)
+    assert [item["gmail_message_id"] for item in page] == order[2:4]
+
+    subject_hit.subject = "Team offsite"
+    index_email(session, subject_hit)
+    session.commit()
+    assert "msg-subject" not in {
+        item["gmail_message_id"]
+        for item in search_emails(session, user.id, "budget", limit=10)
+    }
+
+
+def test_search_quotes_query_syntax_and_rebuilds_index():
+    session = _session()
+    user = User(email="a@example.com", google_sub="sub-a")
+    session.add(user)
+    session.flush()
+    session.add(
+        Email(
+            user_id=user.id,
+            gmail_message_id="msg-1",
+            subject="Invoice NEAR due",
+            label_ids=["INBOX"],
+        )
+    )
+    session.commit()
+
+    assert fts_query('invoice OR "due" NEAR(x*') == '"invoice" "OR" "due" "NEAR" "x"'
+    assert search_emails(session, user.id, "invoice", limit=10) == []
+
+    rebuild_search_index(session)
+
+    assert [
+        item["gmail_message_id"]
+        for item in search_emails(session, user.id, 'invoice "near', limit=10)
+    ] == ["msg-1"]
+    assert search_emails(session, user.id, "invoice OR missing", limit=10) == []
+    assert search_emails(session, user.id, "***", limit=10) == []
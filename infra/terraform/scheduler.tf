@@ -15,6 +15,23 @@ resource "google_cloud_scheduler_job" "renew_watches" {
   depends_on = [google_project_service.services]
 }
 
+resource "google_cloud_scheduler_job" "renew_calendar_watches" {
+  name      = "renew-calendar-watches"
+  region    = var.region
+  schedule  = var.renew_calendar_watches_cron
+  time_zone = var.scheduler_timezone
+
+  http_target {
+    http_method = "POST"
+    uri         = "${google_cloud_run_service.worker.status[0].url}/internal/jobs/renew_calendar_watches"
+    oidc_token {
+      service_account_email = google_service_account.scheduler_invoker.email
+    }
+  }
+
+  depends_on = [google_project_service.services]
+}
+
 resource "google_cloud_scheduler_job" "daily_digest" {
   name      = "daily-digest"
   region    = var.region
@@ -48,3 +65,20 @@ resource "google_cloud_scheduler_job" "snooze_sweep" {
 
   depends_on = [google_project_service.services]
 }
+
+resource "google_cloud_scheduler_job" "attachment_extraction" {
+  name      = "attachment-extraction"
+  region    = var.region
+  schedule  = var.attachment_extraction_cron
+  time_zone = var.scheduler_timezone
+
+  http_target {
+    http_method = "POST"
+    uri         = "${google_cloud_run_service.worker.status[0].url}/internal/jobs/attachment_extraction"
+    oidc_token {
+      service_account_email = google_service_account.scheduler_invoker.email
+    }
+  }
+
+  depends_on = [google_project_service.services]
+}
@@ -161,6 +161,12 @@ variable "renew_watches_cron" {
   default     = "0 2 * * *"
 }
 
+variable "renew_calendar_watches_cron" {
+  description = "Cron schedule for Calendar push channel renewal and mirror catch-up"
+  type        = string
+  default     = "30 2 * * *"
+}
+
 variable "digest_cron" {
   description = "Cron schedule for daily digest generation"
   type        = string
@@ -173,6 +179,12 @@ variable "snooze_sweep_cron" {
   default     = "*/10 * * * *"
 }
 
+variable "attachment_extraction_cron" {
+  description = "Cron schedule for draining the attachment extraction queue"
+  type        = string
+  default     = "*/5 * * * *"
+}
+
 variable "api_cpu" {
   description = "CPU allocation for API service"
   type        = string
@@ -53,6 +53,7 @@ export default async function DashboardPage() {
   const needsReplyCount = digestContent?.counts?.needs_reply ?? 0;
   const importantCount = digestContent?.counts?.important_fyi ?? 0;
   const newsletterCount = digestContent?.counts?.newsletters ?? 0;
+  const everythingElseCount = digestContent?.counts?.everything_else ?? 0;
 
   return (
     <div className="page">
@@ -134,7 +135,7 @@ export default async function DashboardPage() {
                 newsletters
               </p>
               <details className="digest-section" open>
-                <summary>Needs reply ({sections.needs_reply.length})</summary>
+                <summary>Needs reply ({needsReplyCount})</summary>
                 {sections.needs_reply.length === 0 ? (
                   <p>No replies needed.</p>
                 ) : (
@@ -149,7 +150,7 @@ export default async function DashboardPage() {
                 )}
               </details>
               <details className="digest-section" open>
-                <summary>Important FYI ({sections.important_fyi.length})</summary>
+                <summary>Important FYI ({importantCount})</summary>
                 {sections.important_fyi.length === 0 ? (
                   <p>No important FYI emails.</p>
                 ) : (
@@ -164,7 +165,7 @@ export default async function DashboardPage() {
                 )}
               </details>
               <details className="digest-section">
-                <summary>Newsletters ({sections.newsletters.length})</summary>
+                <summary>Newsletters ({newsletterCount})</summary>
                 {sections.newsletters.length === 0 ? (
                   <p>No newsletters today.</p>
                 ) : (
@@ -179,7 +180,7 @@ export default async function DashboardPage() {
                 )}
               </details>
               <details className="digest-section">
-                <summary>Everything else ({sections.everything_else.length})</summary>
+                <summary>Everything else ({everythingElseCount})</summary>
                 {sections.everything_else.length === 0 ? (
                   <p>No additional messages.</p>
                 ) : (
@@ -21,6 +21,7 @@ export type DigestContent = {
   vip_count?: number;
   vip_senders?: string[];
   counts: Record<string, number>;
+  // One page per section (newest first); counts holds the section totals.
   sections: {
     needs_reply: DigestEmail[];
     important_fyi: DigestEmail[];
@@ -16,7 +16,7 @@ export type EmailSummary = {
 
 export async function getEmailsServer(cookieHeader: string): Promise<EmailSummary[]> {
   return apiFetchWithCookies<EmailSummary[]>(
-    '/api/emails?filter=inbox&limit=50&offset=0',
+    '/api/emails?filter=inbox&limit=50',
     cookieHeader,
   );
 }